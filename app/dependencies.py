@@ -13,6 +13,7 @@ import logging
 from app.database import get_db
 from app.models.user import User
 from app.utils.auth import verify_token
+from app.utils.principal_cache import principal_cache
 
 logger = logging.getLogger("app")
 
@@ -23,6 +24,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     現在のユーザーを取得する依存関数
     
     JWTトークンを検証し、対応するユーザーをデータベースから取得します。
+    取得したユーザーはprincipal_cacheに保持され、キャッシュにない場合のみデータベースを参照します。
     トークンが無効な場合や、ユーザーが存在しない場合は401エラーを返します。
     
     Args:
@@ -42,12 +44,20 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     )
     
     token_data = verify_token(token, credentials_exception)
+    user = principal_cache.get(token_data.username)
+    if user is not None:
+        return user
+        
+    generation = principal_cache.generation
     user = db.query(User).filter(User.username == token_data.username).first()
     
     if user is None:
         logger.warning(f"User {token_data.username} not found")
         raise credentials_exception
         
+    # リクエスト間で共有するため、セッションのコミットで属性が失効しないよう切り離す
+    db.expunge(user)
+    principal_cache.set(user, generation)
     return user
 
 def get_current_active_user(current_user: User = Depends(get_current_user)):
@@ -7,18 +7,51 @@ EM_test_project - FastAPIアプリケーションのメインモジュール
 """
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
 import logging
 import time
 import os
 from datetime import datetime
 
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+
 from app.database import engine, Base
 from app.routes.items import router as items_router
 from app.routes.auth import router as auth_router
 from app.routes.llm import router as llm_router
+from app.utils.openai_client import close_client
+from app.utils.resilience import llm_breaker
+from app.utils.item_search import ensure_search_index
+from app.utils.item_stats import ensure_item_stats
+from app.utils.item_changes import ensure_change_log, item_change_notifier, run_compaction
+from app.utils.password_hashing import password_pool
+from app.utils.principal_cache import principal_cache
+from app.utils.token_cache import verified_token_cache
+from app.utils.token_revocation import revocation_list, run_pruning
+from app.utils.refresh_tokens import run_pruning as run_refresh_token_pruning
 
 Base.metadata.create_all(bind=engine)
 
+# 既存のテーブルに後から追加された列（server_defaultを持つもの）とインデックスを作成する
+for table in Base.metadata.sorted_tables:
+    existing_columns = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    for column in table.columns:
+        if column.name not in existing_columns and column.server_default is not None:
+            with engine.begin() as connection:
+                connection.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {CreateColumn(column).compile(dialect=engine.dialect)}"
+                ))
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+ensure_search_index(engine)
+ensure_item_stats(engine)
+ensure_change_log(engine)
+revocation_list.load(engine)
+
 os.makedirs("logs", exist_ok=True)
 
 logger = logging.getLogger("app")
@@ -38,10 +71,30 @@ logger.addHandler(file_handler)
 
 app_logger = logger
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    アプリケーションのライフサイクル管理
+    
+    起動中はアイテム変更履歴、期限切れの失効トークンとリフレッシュトークンの定期的な削除を実行し、
+    終了時にパスワード処理のワーカーを停止し、OpenAIクライアントの共有コネクションプールを解放します。
+    """
+    compaction = asyncio.create_task(run_compaction(engine))
+    pruning = asyncio.create_task(run_pruning(engine))
+    refresh_token_pruning = asyncio.create_task(run_refresh_token_pruning(engine))
+    yield
+    compaction.cancel()
+    pruning.cancel()
+    refresh_token_pruning.cancel()
+    password_pool.shutdown()
+    await close_client()
+    app_logger.info("Application shutdown: OpenAI client closed")
+
 app = FastAPI(
     title="EM_test_project",
     description="FastAPIを使用したRESTful APIアプリケーション（SQLite認証とOpenAI連携機能付き）",
-    version="0.2.0"
+    version="0.2.0",
+    lifespan=lifespan
 )
 
 @app.middleware("http")
@@ -70,6 +123,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # すべてのHTTPメソッドを許可
     allow_headers=["*"],  # すべてのヘッダーを許可
+    expose_headers=["X-Next-Cursor", "ETag"],  # ページネーションと条件付きリクエスト用のレスポンスヘッダーを公開
 )
 
 app_logger.info("Application startup: CORS middleware configured")
@@ -99,6 +153,17 @@ async def health_check():
     ヘルスチェックエンドポイント
     
     アプリケーションの稼働状態を確認するためのエンドポイントです。
+    OpenAI API呼び出しのサーキットブレーカーの状態、アイテム変更履歴の待機状況、
+    パスワード処理のワーカープールの使用状況、認証済みユーザーと
+    検証済みJWTのキャッシュのヒット率、トークン失効リストの状況も返します。
     """
     app_logger.info("Health check endpoint accessed")
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "llm_circuit_breaker": llm_breaker.stats(),
+        "item_change_feed": item_change_notifier.stats(),
+        "password_hashing": password_pool.stats(),
+        "principal_cache": principal_cache.stats(),
+        "verified_token_cache": verified_token_cache.stats(),
+        "token_revocation": revocation_list.stats(),
+    }
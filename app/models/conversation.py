@@ -0,0 +1,48 @@
+"""
+会話履歴のデータベースモデル
+
+このモジュールはSQLAlchemyを使用して会話セッションと会話メッセージのテーブルを定義します。
+メッセージは追記のみで、会話ごとの連番（seq）で順序付けられます。
+"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
+
+from app.database import Base
+
+class Conversation(Base):
+    """
+    会話セッションモデル
+    
+    ユーザーが所有する1つの会話を表します。メッセージ数と、要約済みの範囲を保持し、
+    プロンプトのコンテキストを組み立てる際に全メッセージを読み込まずに済むようにします。
+    """
+    __tablename__ = "conversations"
+    
+    id = Column(Integer, primary_key=True, index=True, comment="会話の一意識別子")
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True, comment="所有者のユーザーID")
+    title = Column(String, nullable=True, comment="会話のタイトル")
+    message_count = Column(Integer, nullable=False, default=0, comment="会話のメッセージ数（最後のseq）")
+    summary = Column(Text, nullable=True, comment="コンテキストから外れた古いメッセージの要約")
+    summary_upto_seq = Column(Integer, nullable=False, default=0, comment="要約に含まれる最後のメッセージのseq")
+    created_at = Column(DateTime, default=datetime.utcnow, comment="作成日時（UTC）")
+    updated_at = Column(DateTime, default=datetime.utcnow, comment="最終更新日時（UTC）")
+
+class ConversationMessage(Base):
+    """
+    会話メッセージモデル
+    
+    会話内の1件のメッセージを表します。(conversation_id, seq)の複合インデックスにより、
+    最新のメッセージからの逆順走査やページングを索引のみで行えます。
+    """
+    __tablename__ = "conversation_messages"
+    __table_args__ = (
+        Index("ix_conversation_messages_conversation_seq", "conversation_id", "seq", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, comment="メッセージの一意識別子")
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False, comment="会話ID")
+    seq = Column(Integer, nullable=False, comment="会話内の連番（1始まり）")
+    role = Column(String, nullable=False, comment="メッセージの役割（user / assistant）")
+    content = Column(Text, nullable=False, comment="メッセージの内容")
+    tokens = Column(Integer, nullable=False, default=0, comment="メッセージ内容のトークン数")
+    created_at = Column(DateTime, default=datetime.utcnow, comment="作成日時（UTC）")
@@ -4,7 +4,7 @@
 このモジュールはSQLAlchemyを使用してアイテムのデータベーステーブルを定義します。
 アイテムはユーザーに所有され、名前、説明、価格、税金などの情報を持ちます。
 """
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -15,14 +15,25 @@ class Item(Base):
     
     アイテムはユーザーが所有する商品や製品を表します。
     各アイテムには名前、説明、価格、税金などの属性があります。
+    (owner_id, id)などの複合インデックスにより、ユーザーごとの一覧を
+    並び順や絞り込み条件に関わらずキーセット方式でページングできます。
     """
     __tablename__ = "items"
-
+    __table_args__ = (
+        Index("ix_items_owner_id_id", "owner_id", "id"),
+        Index("ix_items_owner_id_price_id", "owner_id", "price", "id"),
+        Index("ix_items_owner_id_name_id", "owner_id", "name", "id"),
+    )
+    
     id = Column(Integer, primary_key=True, index=True, comment="アイテムの一意識別子")
     name = Column(String, index=True, comment="アイテム名")
     description = Column(String, nullable=True, comment="アイテムの説明")
     price = Column(Float, comment="アイテムの価格")
     tax = Column(Float, nullable=True, comment="アイテムの税金")
     owner_id = Column(Integer, ForeignKey("users.id"), comment="所有者のユーザーID")
+    version = Column(Integer, nullable=False, server_default="1", comment="更新のたびに増加するバージョン（ETagに使用）")
+    
+    # ORMによる更新・削除は読み込んだ時点のバージョンを条件に行い、同時更新を検出する
+    __mapper_args__ = {"version_id_col": version}
     
     owner = relationship("User", back_populates="items", comment="アイテムの所有者")
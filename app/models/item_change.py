@@ -0,0 +1,30 @@
+"""
+アイテム変更履歴のデータベースモデル
+
+このモジュールはSQLAlchemyを使用してアイテムの変更履歴（チェンジフィード）のテーブルを定義します。
+履歴はitemsテーブルのトリガーによって挿入・更新・削除と同じトランザクションで追記され、
+単調増加する連番でクライアントが前回以降の差分のみを取得できるようにします。
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+
+from app.database import Base
+
+class ItemChange(Base):
+    """
+    アイテム変更履歴モデル
+    
+    アイテムの作成・更新・削除の1件を表します。連番はAUTOINCREMENTで採番されるため、
+    古い履歴を削除した後も再利用されません。
+    """
+    __tablename__ = "item_changes"
+    __table_args__ = (
+        Index("ix_item_changes_owner_id_seq", "owner_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+    
+    seq = Column(Integer, primary_key=True, comment="変更の連番（単調増加）")
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, comment="所有者のユーザーID")
+    item_id = Column(Integer, nullable=False, comment="変更されたアイテムのID")
+    operation = Column(String, nullable=False, comment="操作（create / update / delete）")
+    version = Column(Integer, nullable=False, comment="変更後のアイテムのバージョン（削除の場合は削除時点のバージョン）")
+    changed_at = Column(DateTime, nullable=False, index=True, comment="変更日時（UTC）")
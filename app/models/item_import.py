@@ -0,0 +1,35 @@
+"""
+アイテムインポートジョブのデータベースモデル
+
+このモジュールはSQLAlchemyを使用してアイテムの一括インポートジョブのテーブルを定義します。
+ジョブはインポートの進捗、取り込み件数、行ごとのエラーを保持し、
+処理済みの行数はアイテムの挿入と同じトランザクションで更新されるため、
+中断されたインポートを重複なく再開できます。
+"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, Text
+
+from app.database import Base
+
+class ItemImportJob(Base):
+    """
+    アイテムインポートジョブモデル
+    
+    1回のアップロードに対応するインポート処理の状態を表します。
+    """
+    __tablename__ = "item_import_jobs"
+    
+    id = Column(String, primary_key=True, comment="ジョブの一意識別子（UUID）")
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True, comment="所有者のユーザーID")
+    format = Column(String, nullable=False, comment="アップロードの形式（csv / ndjson）")
+    status = Column(String, nullable=False, default="pending", comment="状態（pending / running / completed / failed）")
+    total_bytes = Column(Integer, nullable=False, default=0, comment="アップロードのバイト数")
+    bytes_processed = Column(Integer, nullable=False, default=0, comment="処理済みのバイト数")
+    lines_processed = Column(Integer, nullable=False, default=0, comment="処理済みのレコード数（エラー行を含む）")
+    rows_imported = Column(Integer, nullable=False, default=0, comment="取り込んだアイテム数")
+    rows_failed = Column(Integer, nullable=False, default=0, comment="エラーになったレコード数")
+    errors = Column(Text, nullable=True, comment="行ごとのエラー（JSON配列、件数上限あり）")
+    error = Column(Text, nullable=True, comment="ジョブが失敗した場合のエラー内容")
+    elapsed_seconds = Column(Float, nullable=False, default=0.0, comment="処理に要した時間の合計（秒）")
+    created_at = Column(DateTime, default=datetime.utcnow, comment="作成日時（UTC）")
+    finished_at = Column(DateTime, nullable=True, comment="完了日時（UTC）")
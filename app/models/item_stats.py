@@ -0,0 +1,25 @@
+"""
+アイテム集計のデータベースモデル
+
+このモジュールはSQLAlchemyを使用してユーザーごとのアイテム集計テーブルを定義します。
+集計値はitemsテーブルのトリガーによって挿入・更新・削除のたびに差分で更新されるため、
+アイテム数に関わらず1行の読み込みで件数と合計を取得できます。
+"""
+from sqlalchemy import Column, Float, ForeignKey, Integer
+
+from app.database import Base
+
+class ItemStats(Base):
+    """
+    アイテム集計モデル
+    
+    ユーザーが所有するアイテムの件数、価格の合計、税金の合計と、
+    いずれかのアイテムが変更されるたびに増加するバージョンを保持します。
+    """
+    __tablename__ = "item_stats"
+    
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True, comment="所有者のユーザーID")
+    item_count = Column(Integer, nullable=False, default=0, comment="アイテム数")
+    price_sum = Column(Float, nullable=False, default=0.0, comment="価格の合計")
+    tax_sum = Column(Float, nullable=False, default=0.0, comment="税金の合計（未設定はゼロとして扱う）")
+    version = Column(Integer, nullable=False, default=0, server_default="0", comment="アイテムが変更されるたびに増加するバージョン（一覧のETagに使用）")
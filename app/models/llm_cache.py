@@ -0,0 +1,22 @@
+"""
+AI応答キャッシュのデータベースモデル
+
+このモジュールはSQLAlchemyを使用してAI応答キャッシュの永続化テーブルを定義します。
+メモリ上のLRUキャッシュの背後にある任意の永続層として使用されます。
+"""
+from sqlalchemy import Column, Float, String, Text
+
+from app.database import Base
+
+class LLMCacheEntry(Base):
+    """
+    AI応答キャッシュエントリモデル
+    
+    リクエスト内容のハッシュをキーとして、生成済みの応答をJSON形式で保持します。
+    有効期限を過ぎたエントリは参照時に削除されます。
+    """
+    __tablename__ = "llm_cache"
+    
+    key = Column(String, primary_key=True, comment="リクエスト内容のSHA-256ハッシュ")
+    response = Column(Text, comment="応答（JSON形式）")
+    expires_at = Column(Float, index=True, comment="有効期限（UNIX時刻）")
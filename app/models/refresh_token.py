@@ -0,0 +1,29 @@
+"""
+リフレッシュトークンのデータベースモデル
+
+このモジュールはSQLAlchemyを使用してリフレッシュトークンのテーブルを定義します。
+トークンの値そのものは保存せず、SHA-256ハッシュで検索します。同じログインから
+ローテーションで発行されたトークンは同じファミリーに属し、使用済みのトークンが
+再利用された場合はファミリー全体を失効させます。
+"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+
+from app.database import Base
+
+class RefreshToken(Base):
+    """
+    リフレッシュトークンモデル
+    
+    1回のみ使用でき、使用するとused_atが記録されて同じファミリーの新しいトークンが発行されます。
+    """
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, comment="リフレッシュトークンの一意識別子")
+    token_hash = Column(String, nullable=False, unique=True, comment="トークンのSHA-256ハッシュ")
+    family_id = Column(String, nullable=False, index=True, comment="ローテーションの系列の識別子（ログインごとに発行）")
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, comment="ユーザーID")
+    expires_at = Column(DateTime, nullable=False, index=True, comment="有効期限（UTC）")
+    created_at = Column(DateTime, default=datetime.utcnow, comment="発行日時（UTC）")
+    used_at = Column(DateTime, nullable=True, comment="ローテーションに使用された日時（UTC）")
+    revoked_at = Column(DateTime, nullable=True, comment="失効日時（UTC、再利用の検出やログアウト時に設定）")
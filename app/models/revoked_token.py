@@ -0,0 +1,26 @@
+"""
+失効したトークンのデータベースモデル
+
+このモジュールはSQLAlchemyを使用して、ログアウトなどで失効させたアクセストークンの
+テーブルを定義します。トークンはjti（トークンID）で識別され、有効期限を過ぎた行は
+トークン自体が無効になるため削除されます。
+"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, String
+
+from app.database import Base
+
+class RevokedToken(Base):
+    """
+    失効トークンモデル
+    
+    IDはAUTOINCREMENTで採番されるため、各プロセスは前回読み込んだID以降の行のみを
+    読み込むことで、他のプロセスで失効させたトークンを取り込めます。
+    """
+    __tablename__ = "revoked_tokens"
+    __table_args__ = {"sqlite_autoincrement": True}
+    
+    id = Column(Integer, primary_key=True, comment="失効の連番")
+    jti = Column(String, nullable=False, unique=True, comment="失効させたトークンのID")
+    expires_at = Column(DateTime, nullable=False, index=True, comment="トークンの有効期限（UTC、この後に削除される）")
+    revoked_at = Column(DateTime, default=datetime.utcnow, comment="失効日時（UTC）")
@@ -0,0 +1,22 @@
+"""
+トークン使用量のデータベースモデル
+
+このモジュールはSQLAlchemyを使用してユーザーごと・日ごとのトークン使用量テーブルを定義します。
+1ユーザー1日あたり1行のみを持つ集計テーブルで、日次のトークン予算の判定に使用されます。
+"""
+from sqlalchemy import Column, Integer, String, ForeignKey
+
+from app.database import Base
+
+class TokenUsage(Base):
+    """
+    トークン使用量モデル
+    
+    ユーザーID（user_id）と日付（day）の組を主キーとし、
+    その日にOpenAI APIで消費したトークン数の合計を保持します。
+    """
+    __tablename__ = "token_usage"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True, comment="ユーザーID")
+    day = Column(String, primary_key=True, comment="日付（UTC、YYYY-MM-DD形式）")
+    tokens = Column(Integer, nullable=False, default=0, comment="消費したトークン数の合計")
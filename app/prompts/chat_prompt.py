@@ -33,3 +33,58 @@ def get_chat_prompt(user_input, system_prompt=SYSTEM_PROMPT):
     ]
     
     return messages
+
+CONVERSATION_SUMMARY_PROMPT = """
+これまでの会話の要約: {summary}
+"""
+
+SUMMARIZE_PROMPT = """
+以下の会話を、後の応答で必要になる事実・決定事項・ユーザーの意図を残して簡潔に要約してください。
+{previous_summary}
+会話:
+{transcript}
+"""
+
+def get_conversation_prompt(history, user_input, summary=None, system_prompt=SYSTEM_PROMPT):
+    """
+    会話履歴を含むOpenAI API用のチャットプロンプトを生成する
+    
+    システムプロンプト、古い会話の要約（ある場合）、直近の会話履歴、
+    新しいユーザー入力の順にメッセージリストを組み立てます。
+    
+    Args:
+        history: 直近の会話履歴（role, contentキーを持つ辞書の古い順のリスト）
+        user_input: ユーザーの質問や入力
+        summary: コンテキストから外れた古い会話の要約（オプション）
+        system_prompt: AIの振る舞いを設定するシステムプロンプト（オプション）
+        
+    Returns:
+        list: OpenAI API用のメッセージ辞書のリスト
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+    if summary:
+        messages.append({"role": "system", "content": CONVERSATION_SUMMARY_PROMPT.format(summary=summary)})
+    messages.extend({"role": message["role"], "content": message["content"]} for message in history)
+    messages.append({"role": "user", "content": DEFAULT_PROMPT.format(user_input=user_input)})
+    
+    return messages
+
+def get_summary_prompt(transcript, previous_summary=None, system_prompt=SYSTEM_PROMPT):
+    """
+    会話を要約するためのOpenAI API用のチャットプロンプトを生成する
+    
+    Args:
+        transcript: 要約する会話（「role: content」形式の行を連結した文字列）
+        previous_summary: それ以前の会話の要約（オプション、要約に引き継がれます）
+        system_prompt: AIの振る舞いを設定するシステムプロンプト（オプション）
+        
+    Returns:
+        list: OpenAI API用のメッセージ辞書のリスト
+    """
+    previous = f"\nこれまでの要約: {previous_summary}\n" if previous_summary else ""
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": SUMMARIZE_PROMPT.format(previous_summary=previous, transcript=transcript)}
+    ]
+    
+    return messages
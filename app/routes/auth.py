@@ -5,15 +5,22 @@
 ユーザー認証はOAuth2パスワードフローを使用し、JWTトークンを発行します。
 """
 from datetime import timedelta
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import logging
 
 from app.database import get_db
+from app.dependencies import oauth2_scheme
 from app.models.user import User
-from app.schemas.user import UserCreate, Token
-from app.utils.auth import verify_password, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.schemas.user import UserCreate, Token, RefreshTokenRequest
+from app.utils.auth import create_access_token, verify_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.utils.password_hashing import PasswordPoolSaturated, password_pool
+from app.utils.token_cache import verified_token_cache
+from app.utils.token_revocation import revocation_list
+from app.utils.refresh_tokens import RefreshTokenInvalid, issue_refresh_token, revoke_refresh_token, rotate_refresh_token
 
 logger = logging.getLogger("app")
 
@@ -22,12 +29,23 @@ router = APIRouter(
     tags=["認証"],
     responses={
         400: {"description": "ユーザー名またはメールアドレスが既に登録されています"},
-        401: {"description": "認証に失敗しました"}
+        401: {"description": "認証に失敗しました"},
+        503: {"description": "パスワード処理が混雑しています"}
     },
 )
 
+def _password_pool_saturated(e: PasswordPoolSaturated) -> HTTPException:
+    """
+    パスワード処理のワーカープールの飽和を503エラーに変換する
+    """
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry later",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
 @router.post("/register", status_code=status.HTTP_201_CREATED, response_model=dict)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     """
     新規ユーザー登録
     
@@ -38,9 +56,13 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     - **password**: パスワード（必須）
     
     ユーザー名またはメールアドレスが既に登録されている場合は400エラーが返されます。
+    パスワードのハッシュ化を待つ処理が上限に達している場合は503エラーが返されます。
     登録が成功した場合は成功メッセージを返します。
+    
+    ハッシュ化は専用のワーカープールで行い、データベースの操作のみを
+    共有のスレッドプールで実行します。
     """
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await run_in_threadpool(db.query(User).filter(User.username == user.username).first)
     if db_user:
         logger.warning(f"Registration failed: Username {user.username} already registered")
         raise HTTPException(
@@ -48,7 +70,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
             detail="Username already registered"
         )
         
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await run_in_threadpool(db.query(User).filter(User.email == user.email).first)
     if db_user:
         logger.warning(f"Registration failed: Email {user.email} already registered")
         raise HTTPException(
@@ -56,7 +78,10 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
             detail="Email already registered"
         )
     
-    hashed_password = get_password_hash(user.password)
+    try:
+        hashed_password = await password_pool.hash(user.password)
+    except PasswordPoolSaturated as e:
+        raise _password_pool_saturated(e)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -64,14 +89,13 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await run_in_threadpool(db.commit)
     
     logger.info(f"User {user.username} registered successfully")
     return {"message": "User registered successfully"}
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """
     アクセストークンの取得（ログイン）
     
@@ -81,13 +105,20 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     - **username**: ユーザー名（フォームデータ）
     - **password**: パスワード（フォームデータ）
     
-    認証に成功すると、JWTアクセストークンが返されます。
-    このトークンは他のAPIエンドポイントへのアクセスに使用できます。
+    認証に成功すると、JWTアクセストークンとリフレッシュトークンが返されます。
+    アクセストークンは他のAPIエンドポイントへのアクセスに使用できます。
+    アクセストークンの期限が切れた後は、パスワードを再送信せずに
+    リフレッシュトークンで/auth/refreshから新しいトークンを取得できます。
     
     認証に失敗した場合は401エラーが返されます。
+    パスワードの検証を待つ処理が上限に達している場合は503エラーが返されます。
     """
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await run_in_threadpool(db.query(User).filter(User.username == form_data.username).first)
+    try:
+        verified = user is not None and await password_pool.verify(form_data.password, user.hashed_password)
+    except PasswordPoolSaturated as e:
+        raise _password_pool_saturated(e)
+    if not verified:
         logger.warning(f"Login failed: Invalid credentials for username {form_data.username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -99,6 +130,77 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
+    refresh_token = issue_refresh_token(db, user.id)
+    await run_in_threadpool(db.commit)
     
     logger.info(f"User {user.username} logged in successfully")
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/refresh", response_model=Token)
+def refresh_access_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """
+    アクセストークンの更新
+    
+    リフレッシュトークンを使用して、新しいアクセストークンとリフレッシュトークンを取得します。
+    
+    - **refresh_token**: ログインまたは前回の更新で取得したリフレッシュトークン
+    
+    リフレッシュトークンは1回のみ使用でき、使用したトークンは無効になります。
+    使用済みのトークンが再び提示された場合は漏洩したものとみなし、同じログインから
+    発行されたすべてのリフレッシュトークンを失効させます。
+    
+    トークンが無効、期限切れ、失効済み、またはユーザーが非アクティブの場合は401エラーが返されます。
+    """
+    try:
+        user, refresh_token = rotate_refresh_token(db, request.refresh_token)
+    except RefreshTokenInvalid as e:
+        logger.warning(f"Token refresh failed: {e.reason}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        
+    access_token = create_access_token(
+        data={"sub": user.username}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    logger.info(f"User {user.username} refreshed access token")
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/logout", response_model=dict)
+def logout(
+    request: Optional[RefreshTokenRequest] = None,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """
+    ログアウト
+    
+    リクエストに使用したアクセストークンを失効させます。
+    失効したトークンは有効期限前でもすべてのエンドポイントで401エラーになります。
+    
+    - **refresh_token**: 同時に失効させるリフレッシュトークン（オプション、リクエストボディ）。
+      認証されたユーザーが所有していないトークンは無視されます
+      
+    トークンが無効な場合は401エラー、失効に対応していない（jtiを持たない）
+    古いトークンの場合は400エラーが返されます。
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    token_data = verify_token(token, credentials_exception)
+    if token_data.jti is None or token_data.exp is None:
+        logger.warning(f"Logout failed: token for user {token_data.username} cannot be revoked")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token cannot be revoked"
+        )
+        
+    revocation_list.revoke(db, token_data.jti, token_data.exp)
+    verified_token_cache.invalidate(token)
+    if request is not None and not revoke_refresh_token(db, request.refresh_token, token_data.username):
+        logger.warning(f"Logout for user {token_data.username}: refresh token not found, not owned or already revoked")
+    logger.info(f"User {token_data.username} logged out")
+    return {"message": "Logged out successfully"}
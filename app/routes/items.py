@@ -5,16 +5,42 @@
 提供するエンドポイントを定義します。すべてのエンドポイントは認証が必要で、
 ユーザーは自分のアイテムのみにアクセスできます。
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from typing import List, Literal, Optional
+import os
+import shutil
 import logging
+from pydantic import ValidationError
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.dependencies import get_current_active_user
 from app.models.item import Item as ItemModel
+from app.models.item_import import ItemImportJob as ItemImportJobModel
 from app.models.user import User
-from app.schemas.item import Item, ItemCreate
+from app.schemas.item import (
+    Item, ItemCreate, ItemUpdate, ItemUpdateRow, ItemBulkCreate, ItemBulkUpdate, ItemBulkDelete, ItemBulkResult, ItemBulkResponse,
+    ItemImportJob, ItemSearchHit, ItemStats, ItemChangeFeed
+)
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+from app.utils.item_export import EXPORT_MEDIA_TYPES, iter_export
+from app.utils.item_search import build_match_query, search_items
+from app.utils.item_query import apply_item_filters, apply_item_sort, cursor_keys
+from app.utils.item_stats import get_collection_version, get_item_stats
+from app.utils.etag import collection_etag, etag_matches, item_etag, matching_versions
+from app.utils.item_changes import (
+    ITEM_CHANGES_MAX_WAIT_SECONDS, ChangesCompacted, ChangesSinceAhead, get_head_seq, item_change_notifier,
+    wait_for_changes
+)
+from app.utils.item_import import (
+    ITEMS_IMPORT_SYNC_MAX_BYTES, ImportJobConflict, claim_job, claim_new_job, create_job, job_summary,
+    prepare_resume, release_job, run_import, spool_path, upload_path
+)
 
 logger = logging.getLogger("app")
 
@@ -27,6 +53,7 @@ router = APIRouter(
 @router.post("/", response_model=Item, status_code=status.HTTP_201_CREATED)
 def create_item(
     item: ItemCreate, 
+    response: Response,
     db: Session = Depends(get_db), 
     current_user: User = Depends(get_current_active_user)
 ):
@@ -41,6 +68,7 @@ def create_item(
     - **tax**: アイテムの税金
     
     作成されたアイテムはリクエストを行ったユーザーに紐づけられます。
+    レスポンスの`ETag`ヘッダーは更新・削除時の`If-Match`に使用できます。
     """
     db_item = ItemModel(
         name=item.name,
@@ -51,14 +79,189 @@ def create_item(
     )
     db.add(db_item)
     db.commit()
+    item_change_notifier.notify(current_user.id)
     db.refresh(db_item)
+    response.headers["ETag"] = item_etag(db_item.id, db_item.version)
     logger.info(f"Item created with ID: {db_item.id} by user {current_user.username}")
     return db_item
 
+def _validation_error(e: ValidationError) -> str:
+    """
+    検証エラーを1行のエラー内容に変換する
+    """
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in error['loc']) or 'item'}: {error['msg']}"
+        for error in e.errors()
+    )
+
+def _bulk_response(results: List[ItemBulkResult]) -> ItemBulkResponse:
+    """
+    要素ごとの結果から一括操作のレスポンスを組み立てる
+    """
+    failed = sum(1 for result in results if result.status_code >= 400)
+    return ItemBulkResponse(succeeded=len(results) - failed, failed=failed, results=results)
+
+def _bulk_write_failed(e: SQLAlchemyError, db: Session, operation: str, current_user: User) -> HTTPException:
+    """
+    一括操作のトランザクションをロールバックし、500エラーに変換する
+    """
+    db.rollback()
+    logger.error(f"Bulk {operation} of items failed for user {current_user.username}: {str(e)}")
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Bulk {operation} failed, no items were changed"
+    )
+
+@router.post("/bulk", response_model=ItemBulkResponse)
+def create_items_bulk(
+    bulk: ItemBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    アイテムを一括作成
+    
+    最大5000件のアイテムを1つのトランザクションでまとめて作成します。
+    
+    - **items**: 作成するアイテムのリスト（各要素はPOST /items/と同じ形式）
+    
+    各要素は個別に検証され、不正な要素はstatus_code 422として報告されます。
+    有効な要素は1回の複数行INSERTで作成され、status_code 201と作成されたIDが
+    リクエストと同じ順序で返されます。データベースエラーの場合はどの要素も作成されません。
+    """
+    results: List[Optional[ItemBulkResult]] = [None] * len(bulk.items)
+    rows = []
+    indexes = []
+    for index, raw in enumerate(bulk.items):
+        try:
+            item = ItemCreate.model_validate(raw)
+        except ValidationError as e:
+            results[index] = ItemBulkResult(index=index, status_code=422, error=_validation_error(e))
+            continue
+        rows.append({**item.model_dump(), "owner_id": current_user.id})
+        indexes.append(index)
+        
+    if rows:
+        try:
+            ids = db.scalars(
+                insert(ItemModel).returning(ItemModel.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+            db.commit()
+        except SQLAlchemyError as e:
+            raise _bulk_write_failed(e, db, "create", current_user)
+        item_change_notifier.notify(current_user.id)
+        for index, item_id in zip(indexes, ids):
+            results[index] = ItemBulkResult(index=index, status_code=status.HTTP_201_CREATED, id=item_id)
+            
+    logger.info(f"Bulk created {len(rows)} items ({len(bulk.items) - len(rows)} invalid) for user {current_user.username}")
+    return _bulk_response(results)
+
+@router.put("/bulk", response_model=ItemBulkResponse)
+def update_items_bulk(
+    bulk: ItemBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    アイテムを一括更新
+    
+    最大5000件のアイテムを1つのトランザクションでまとめて更新します。
+    
+    - **items**: 更新するアイテムのリスト（各要素はidと、PUT /items/{item_id}と同じ属性）
+    
+    不正な要素はstatus_code 422、存在しないか他のユーザーのアイテムは404として報告されます。
+    有効な要素は1回のexecutemanyのUPDATEで更新され、status_code 200が返されます。
+    """
+    results: List[Optional[ItemBulkResult]] = [None] * len(bulk.items)
+    rows = {}
+    for index, raw in enumerate(bulk.items):
+        try:
+            rows[index] = ItemUpdateRow.model_validate(raw)
+        except ValidationError as e:
+            results[index] = ItemBulkResult(index=index, status_code=422, error=_validation_error(e))
+            
+    table = ItemModel.__table__
+    try:
+        owned = set(db.scalars(
+            select(ItemModel.id).where(
+                ItemModel.owner_id == current_user.id,
+                ItemModel.id.in_({row.id for row in rows.values()})
+            )
+        )) if rows else set()
+        params = []
+        for index, row in rows.items():
+            if row.id not in owned:
+                results[index] = ItemBulkResult(index=index, status_code=404, id=row.id, error="Item not found")
+                continue
+            params.append({"_id": row.id, "_owner_id": current_user.id, **row.model_dump(exclude={"id"})})
+            results[index] = ItemBulkResult(index=index, status_code=status.HTTP_200_OK, id=row.id)
+        if params:
+            db.execute(
+                update(table)
+                .where(table.c.id == bindparam("_id"), table.c.owner_id == bindparam("_owner_id"))
+                .values(version=table.c.version + 1),
+                params
+            )
+        db.commit()
+    except SQLAlchemyError as e:
+        raise _bulk_write_failed(e, db, "update", current_user)
+    item_change_notifier.notify(current_user.id)
+    
+    logger.info(f"Bulk updated {len(params)} of {len(bulk.items)} items for user {current_user.username}")
+    return _bulk_response(results)
+
+@router.post("/bulk/delete", response_model=ItemBulkResponse)
+def delete_items_bulk(
+    bulk: ItemBulkDelete,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    アイテムを一括削除
+    
+    最大5000件のアイテムを1回のDELETEでまとめて削除します。
+    
+    - **ids**: 削除するアイテムのIDのリスト
+    
+    削除されたアイテムはstatus_code 200、存在しないか他のユーザーのアイテムは
+    404として報告されます。
+    """
+    table = ItemModel.__table__
+    try:
+        deleted = set(db.scalars(
+            delete(table)
+            .where(table.c.owner_id == current_user.id, table.c.id.in_(set(bulk.ids)))
+            .returning(table.c.id)
+        ))
+        db.commit()
+    except SQLAlchemyError as e:
+        raise _bulk_write_failed(e, db, "delete", current_user)
+    item_change_notifier.notify(current_user.id)
+    
+    results = [
+        ItemBulkResult(index=index, status_code=status.HTTP_200_OK, id=item_id)
+        if item_id in deleted else
+        ItemBulkResult(index=index, status_code=404, id=item_id, error="Item not found")
+        for index, item_id in enumerate(bulk.ids)
+    ]
+    logger.info(f"Bulk deleted {len(deleted)} of {len(bulk.ids)} items for user {current_user.username}")
+    return _bulk_response(results)
+
 @router.get("/", response_model=List[Item])
 def read_items(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_tax: Optional[float] = None,
+    max_tax: Optional[float] = None,
+    name_prefix: Optional[str] = None,
+    sort: Literal["id", "-id", "price", "-price", "name", "-name"] = "id",
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -69,16 +272,311 @@ def read_items(
     
     - **skip**: スキップするアイテム数（ページネーション用、デフォルト: 0）
     - **limit**: 取得するアイテム数の上限（ページネーション用、デフォルト: 100）
+    - **cursor**: 前のページの`X-Next-Cursor`レスポンスヘッダーの値（カーソルページネーション用）
+    - **min_price** / **max_price**: 価格の範囲（両端を含む）
+    - **min_tax** / **max_tax**: 税金の範囲（両端を含む）
+    - **name_prefix**: 名前の接頭辞（大文字と小文字を区別）
+    - **sort**: 並び順（id / price / name、先頭に-を付けると降順。デフォルト: id）
+    
+    続きのページがある場合は`X-Next-Cursor`レスポンスヘッダーにカーソルが返されます。
+    cursorを指定すると、skipと異なりページの深さに関わらず一定の時間で次のページを取得できます。
+    skipとcursorは同時に指定できません。カーソルは同じ並び順でのみ使用できます。
+    
+    レスポンスの`ETag`ヘッダーの値を`If-None-Match`に指定すると、
+    ユーザーのアイテムがいずれも変更されていない場合は本文なしの304が返されます。
     
     返される結果は現在のユーザーが所有するアイテムのみです。
     """
-    items = db.query(ItemModel).filter(ItemModel.owner_id == current_user.id).offset(skip).limit(limit).all()
-    logger.info(f"Retrieved items list for user {current_user.username} with skip={skip}, limit={limit}")
+    # アイテム全体のバージョンは集計行の主キー検索で取得でき、一覧のクエリより先に判定できる
+    etag = collection_etag(current_user.id, get_collection_version(db, current_user.id), request.url.query)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
+    query = db.query(ItemModel).filter(ItemModel.owner_id == current_user.id)
+    query = apply_item_filters(query, min_price, max_price, min_tax, max_tax, name_prefix)
+    if cursor is not None and skip:
+        raise HTTPException(status_code=400, detail="skip and cursor cannot be used together")
+    try:
+        query = apply_item_sort(query, sort, cursor)
+    except InvalidCursor:
+        logger.warning(f"Invalid items cursor from user {current_user.username}")
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if skip:
+        query = query.offset(skip)
+        
+    # (owner_id, 並び替えキー, id)のインデックスを順に走査し、1件多く取得して続きの有無を判定する
+    items = query.limit(limit + 1).all()
+    if len(items) > limit:
+        items = items[:limit]
+        if items:
+            response.headers["X-Next-Cursor"] = encode_cursor(cursor_keys(items[-1], sort))
+    logger.info(f"Retrieved items list for user {current_user.username} with skip={skip}, limit={limit}, sort={sort}, cursor={cursor is not None}")
     return items
 
+@router.get("/stats", response_model=ItemStats)
+def read_item_stats(
+    buckets: int = Query(10, ge=0, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    アイテムの集計値を取得
+    
+    認証されたユーザーが所有するアイテムの件数、価格と税金の合計、平均価格、
+    最小・最大価格、価格のヒストグラムを返します。
+    
+    - **buckets**: ヒストグラムの区間数（0〜100、0の場合はヒストグラムを省略。デフォルト: 10）
+    
+    件数と合計はアイテムの変更時に更新される集計行から取得するため、
+    アイテム数に関わらず一定の時間で返されます。
+    """
+    stats = get_item_stats(db, current_user.id, buckets)
+    logger.info(f"Retrieved item stats for user {current_user.username}")
+    return stats
+
+@router.get("/changes", response_model=ItemChangeFeed)
+async def read_item_changes(
+    since: Optional[int] = Query(None, ge=0, description="前回のレスポンスのnext_since（省略すると現在の連番のみを返す）"),
+    limit: int = Query(100, ge=1, le=1000),
+    wait: int = Query(0, ge=0, le=ITEM_CHANGES_MAX_WAIT_SECONDS, description="変更がない場合に待機する最大秒数"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    アイテムの変更履歴を取得
+    
+    認証されたユーザーのアイテムの作成・更新・削除を、連番の昇順に返します。
+    
+    - **since**: 前回のレスポンスの`next_since`。この連番より後の変更を返します
+    - **limit**: 返す最大件数（1〜1000、デフォルト: 100）
+    - **wait**: 変更がない場合に新しい変更を待機する最大秒数（ロングポーリング、デフォルト: 0）
+    
+    同期を始めるクライアントは、sinceを省略して現在の連番を取得してからアイテムの一覧を
+    取得し、以降はその連番から差分を取得します（一覧の取得中の変更は重複して届きますが、
+    バージョンを比較して無視できます）。保持期間を過ぎて削除された範囲や、現在の連番より
+    大きい値（データベースの再作成前の連番など）をsinceに指定した場合は410エラーが返されるため、
+    一覧を取得し直してください。
+    """
+    owner_id, username = current_user.id, current_user.username
+    if since is None:
+        head = await run_in_threadpool(get_head_seq, db)
+        logger.info(f"Retrieved item change head {head} for user {username}")
+        return {"changes": [], "next_since": head}
+        
+    # 待機中にコネクションプールの接続を占有しないよう、認証に使ったセッションを先に閉じる
+    db.close()
+    try:
+        changes, next_since = await wait_for_changes(owner_id, since, limit, wait)
+    except ChangesCompacted as e:
+        logger.warning(f"Item changes since {since} requested by user {username} have been compacted")
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Changes up to seq {e.oldest_seq} have been compacted, re-fetch the item list"
+        )
+    except ChangesSinceAhead as e:
+        logger.warning(f"Item changes since {since} requested by user {username} are ahead of head seq {e.head_seq}")
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Seq {since} is ahead of the current seq {e.head_seq}, re-fetch the item list"
+        )
+    logger.info(f"Retrieved {len(changes)} item changes since {since} for user {username}")
+    return {"changes": changes, "next_since": next_since}
+
+@router.get("/search", response_model=List[ItemSearchHit])
+def search_items_by_text(
+    response: Response,
+    q: str = Query(..., min_length=1, description="検索する語（空白区切りですべてを含むアイテムを検索、末尾の*で前方一致）"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    アイテムを全文検索
+    
+    認証されたユーザーが所有するアイテムを、名前と説明の全文検索で取得します。
+    
+    - **q**: 検索する語。空白で区切った語をすべて含むアイテムを返します。`lap*`のように末尾に*を付けると前方一致になります
+    - **limit**: 取得するアイテム数の上限（1〜100、デフォルト: 20）
+    - **cursor**: 前のページの`X-Next-Cursor`レスポンスヘッダーの値
+    
+    結果は関連度（BM25）の高い順に並び、一致した語を`<mark>`タグで囲んだスニペットを含みます。
+    続きのページがある場合は`X-Next-Cursor`レスポンスヘッダーにカーソルが返されます。
+    """
+    match = build_match_query(q)
+    if not match:
+        raise HTTPException(status_code=400, detail="Search query must contain at least one term")
+        
+    after = None
+    if cursor is not None:
+        try:
+            keys = decode_cursor(cursor)
+            after = (float(keys["rank"]), int(keys["id"]))
+        except (InvalidCursor, KeyError, TypeError, ValueError):
+            logger.warning(f"Invalid search cursor from user {current_user.username}")
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+            
+    hits = search_items(db, current_user.id, match, limit + 1, after)
+    if len(hits) > limit:
+        hits = hits[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor({"rank": hits[-1]["rank"], "id": hits[-1]["id"]})
+    logger.info(f"Searched items for user {current_user.username} with {len(hits)} results")
+    return hits
+
+@router.get("/export")
+def export_items(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    accept_encoding: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    アイテムをエクスポート
+    
+    認証されたユーザーが所有するすべてのアイテムをID順にストリーミングで返します。
+    
+    - **format**: 出力形式（ndjson: 1行1アイテムのJSON、csv: ヘッダー行付きのCSV。デフォルト: ndjson）
+    
+    アイテムはデータベースから一定件数ずつ読み込まれて逐次送信されるため、
+    アイテム数に関わらずサーバーのメモリ使用量は一定です。
+    `Accept-Encoding: gzip`を指定するとgzip圧縮して返します。
+    """
+    compress = bool(accept_encoding and "gzip" in accept_encoding.lower())
+    headers = {
+        "Content-Disposition": f'attachment; filename="items.{export_format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    logger.info(f"Exporting items as {export_format} for user {current_user.username} (gzip={compress})")
+    return StreamingResponse(
+        iter_export(current_user.id, export_format, compress),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers=headers
+    )
+
+def _get_import_job_or_404(db: Session, job_id: str, current_user: User) -> ItemImportJobModel:
+    """
+    ユーザーが所有するインポートジョブを取得し、存在しない場合は404エラーを送出する
+    """
+    job = db.query(ItemImportJobModel).filter(
+        ItemImportJobModel.id == job_id,
+        ItemImportJobModel.owner_id == current_user.id
+    ).first()
+    if job is None:
+        logger.warning(f"Import job {job_id} not found for user {current_user.username}")
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+async def _spool_upload(request: Request, path: str) -> int:
+    """
+    アップロードを一時ファイルに保存し、そのバイト数を返す
+    
+    multipart/form-dataの場合はfileフィールドを、それ以外の場合はリクエスト本文
+    （チャンク転送を含む）をそのまま保存します。ファイルへの書き込みはスレッドプールで行います。
+    """
+    content_type = request.headers.get("content-type", "")
+    with open(path, "wb") as out:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if not isinstance(upload, UploadFile):
+                raise HTTPException(status_code=400, detail="Multipart upload must contain a 'file' field")
+            await run_in_threadpool(shutil.copyfileobj, upload.file, out)
+            await form.close()
+        else:
+            async for chunk in request.stream():
+                await run_in_threadpool(out.write, chunk)
+        return out.tell()
+
+@router.post("/import", response_model=ItemImportJob)
+async def import_items(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    import_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    resume_job_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    アイテムをインポート
+    
+    CSVまたはNDJSON形式のアップロードから、認証されたユーザーのアイテムを一括で作成します。
+    アップロードはリクエスト本文（チャンク転送可）またはmultipart/form-dataのfileフィールドで送信します。
+    
+    - **format**: アップロードの形式（csv: ヘッダー行付きのCSV、ndjson: 1行1アイテムのJSON。デフォルト: csv）
+    - **resume_job_id**: 中断されたジョブを再開する場合のジョブID（同じファイルを再アップロードします）
+    
+    各行はPOST /items/と同じ形式で一定件数ずつ検証・挿入され、エラー行はジョブの
+    errorsに行番号付きで記録されます。/items/exportの出力はそのままインポートできます。
+    
+    小さなアップロードはリクエスト内で処理して完了したジョブを返します（200）。
+    ITEMS_IMPORT_SYNC_MAX_BYTESを超えるアップロードはバックグラウンドで処理し、
+    ジョブをすぐに返します（202）。進捗はGET /items/import/{job_id}で確認できます。
+    
+    完了したジョブや、既に受け付け済み（アップロードの受信中、実行待ち、実行中）のジョブを
+    再開しようとした場合は409エラーが返されます。
+    """
+    # アップロードを受信する前にジョブを確保し、同じジョブへの再開が重ならないようにする
+    resumed = None
+    if resume_job_id is not None:
+        resumed = await run_in_threadpool(_get_import_job_or_404, db, resume_job_id, current_user)
+        try:
+            await run_in_threadpool(claim_job, db, resumed)
+        except ImportJobConflict as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        job_id = resumed.id
+    else:
+        job_id = claim_new_job()
+        
+    spool = spool_path(job_id)
+    path = upload_path(job_id)
+    try:
+        total_bytes = await _spool_upload(request, spool)
+        await run_in_threadpool(os.replace, spool, path)
+        if resumed is not None:
+            job = await run_in_threadpool(prepare_resume, db, resumed, total_bytes)
+        else:
+            job = await run_in_threadpool(create_job, db, job_id, current_user.id, import_format, total_bytes)
+    except Exception:
+        for leftover in (spool, path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        release_job(job_id)
+        raise
+        
+    logger.info(f"Import job {job.id} accepted for user {current_user.username} ({job.format}, {total_bytes} bytes)")
+    
+    if total_bytes <= ITEMS_IMPORT_SYNC_MAX_BYTES:
+        await run_in_threadpool(run_import, job.id, path)
+        await run_in_threadpool(db.refresh, job)
+        return job_summary(job)
+        
+    background_tasks.add_task(run_import, job.id, path)
+    response.status_code = status.HTTP_202_ACCEPTED
+    return job_summary(job)
+
+@router.get("/import/{job_id}", response_model=ItemImportJob)
+def read_import_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    インポートジョブの状態を取得
+    
+    - **job_id**: POST /items/importで返されたジョブID（パスパラメータ）
+    
+    状態、進捗、取り込み件数、毎秒の処理行数、行ごとのエラーを返します。
+    """
+    return job_summary(_get_import_job_or_404(db, job_id, current_user))
+
 @router.get("/{item_id}", response_model=Item)
 def read_item(
     item_id: int, 
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -89,6 +587,9 @@ def read_item(
     
     - **item_id**: 取得するアイテムのID（パスパラメータ）
     
+    レスポンスの`ETag`ヘッダーの値を`If-None-Match`に指定すると、
+    アイテムが変更されていない場合は本文なしの304が返されます。
+    
     アイテムが存在しない場合や、他のユーザーのアイテムにアクセスしようとした場合は
     404エラーが返されます。
     """
@@ -96,13 +597,86 @@ def read_item(
     if item is None:
         logger.warning(f"Item with ID {item_id} not found for user {current_user.username}")
         raise HTTPException(status_code=404, detail="Item not found")
+    etag = item_etag(item.id, item.version)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     logger.info(f"Retrieved item with ID: {item_id} for user {current_user.username}")
     return item
 
+def _precondition_failed(item_id: int, current_user: User) -> HTTPException:
+    """
+    If-Matchの不一致を412エラーに変換する
+    """
+    logger.warning(f"Precondition failed for item with ID {item_id} for user {current_user.username}")
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Item has been modified"
+    )
+
+def _write_conditions(item_id: int, current_user: User, if_match: Optional[str]) -> list:
+    """
+    単一のアイテムへの書き込みのWHERE条件を作成する
+    
+    If-Matchが指定されている場合は、ETagに対応するバージョンも条件に含めます。
+    """
+    table = ItemModel.__table__
+    conditions = [table.c.id == item_id, table.c.owner_id == current_user.id]
+    versions = matching_versions(if_match, item_id)
+    if versions is not None:
+        conditions.append(table.c.version.in_(versions))
+    return conditions
+
+def _write_missed(db: Session, item_id: int, if_match: Optional[str], operation: str, current_user: User) -> HTTPException:
+    """
+    書き込みの対象行がなかった場合に、404と412のどちらかのエラーを作成する
+    
+    アイテムが存在するかの確認は、If-Matchが指定されて書き込みが行われなかった場合にのみ行います。
+    """
+    db.rollback()
+    if matching_versions(if_match, item_id) is not None:
+        exists = db.query(ItemModel.id).filter(ItemModel.id == item_id, ItemModel.owner_id == current_user.id).first()
+        if exists is not None:
+            return _precondition_failed(item_id, current_user)
+    logger.warning(f"Attempted to {operation} non-existent item with ID {item_id} for user {current_user.username}")
+    return HTTPException(status_code=404, detail="Item not found")
+
+def _update_item_row(
+    db: Session,
+    item_id: int,
+    values: dict,
+    if_match: Optional[str],
+    response: Response,
+    current_user: User
+) -> dict:
+    """
+    アイテムを1つのUPDATE ... RETURNING文で更新し、更新後の行を返す
+    
+    更新する属性がない場合は、同じ条件のSELECTで現在の行を返します。
+    """
+    table = ItemModel.__table__
+    conditions = _write_conditions(item_id, current_user, if_match)
+    if values:
+        statement = update(table).where(*conditions).values(**values, version=table.c.version + 1).returning(table)
+    else:
+        statement = select(table).where(*conditions)
+    row = db.execute(statement).mappings().first()
+    if row is None:
+        raise _write_missed(db, item_id, if_match, "update", current_user)
+    row = dict(row)
+    if values:
+        db.commit()
+        item_change_notifier.notify(current_user.id)
+    response.headers["ETag"] = item_etag(row["id"], row["version"])
+    logger.info(f"Updated item with ID: {item_id} for user {current_user.username}")
+    return row
+
 @router.put("/{item_id}", response_model=Item)
 def update_item(
     item_id: int, 
     item: ItemCreate, 
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -117,25 +691,43 @@ def update_item(
     - **price**: 新しいアイテムの価格（必須）
     - **tax**: 新しいアイテムの税金
     
+    `If-Match`ヘッダーにETagを指定すると、アイテムがそのETagの時点から変更されていない
+    場合のみ更新し、変更されていた場合は412エラーが返されます。
+    
     アイテムが存在しない場合や、他のユーザーのアイテムを更新しようとした場合は
     404エラーが返されます。
     """
-    db_item = db.query(ItemModel).filter(ItemModel.id == item_id, ItemModel.owner_id == current_user.id).first()
-    if db_item is None:
-        logger.warning(f"Attempted to update non-existent item with ID {item_id} for user {current_user.username}")
-        raise HTTPException(status_code=404, detail="Item not found")
+    return _update_item_row(db, item_id, item.model_dump(), if_match, response, current_user)
+
+@router.patch("/{item_id}", response_model=Item)
+def patch_item(
+    item_id: int, 
+    item: ItemUpdate, 
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    アイテムを部分的に更新
     
-    for key, value in item.model_dump().items():
-        setattr(db_item, key, value)
+    指定されたIDのアイテムのうち、リクエストに含まれる属性のみを更新します。
     
-    db.commit()
-    db.refresh(db_item)
-    logger.info(f"Updated item with ID: {item_id} for user {current_user.username}")
-    return db_item
+    - **item_id**: 更新するアイテムのID（パスパラメータ）
+    - **name**: 新しいアイテム名
+    - **description**: 新しいアイテムの説明（nullで削除）
+    - **price**: 新しいアイテムの価格
+    - **tax**: 新しいアイテムの税金（nullで削除）
+    
+    `If-Match`ヘッダーの扱いと、アイテムが存在しない場合のエラーはPUTと同じです。
+    属性を1つも含まない場合は更新せずに現在のアイテムを返します。
+    """
+    return _update_item_row(db, item_id, item.model_dump(exclude_unset=True), if_match, response, current_user)
 
 @router.delete("/{item_id}")
 def delete_item(
     item_id: int, 
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -146,17 +738,21 @@ def delete_item(
     
     - **item_id**: 削除するアイテムのID（パスパラメータ）
     
+    `If-Match`ヘッダーにETagを指定すると、アイテムがそのETagの時点から変更されていない
+    場合のみ削除し、変更されていた場合は412エラーが返されます。
+    
     アイテムが存在しない場合や、他のユーザーのアイテムを削除しようとした場合は
     404エラーが返されます。
     
     削除が成功した場合は成功メッセージを返します。
     """
-    db_item = db.query(ItemModel).filter(ItemModel.id == item_id, ItemModel.owner_id == current_user.id).first()
-    if db_item is None:
-        logger.warning(f"Attempted to delete non-existent item with ID {item_id} for user {current_user.username}")
-        raise HTTPException(status_code=404, detail="Item not found")
-    
-    db.delete(db_item)
+    table = ItemModel.__table__
+    deleted = db.execute(
+        delete(table).where(*_write_conditions(item_id, current_user, if_match)).returning(table.c.id)
+    ).first()
+    if deleted is None:
+        raise _write_missed(db, item_id, if_match, "delete", current_user)
     db.commit()
+    item_change_notifier.notify(current_user.id)
     logger.info(f"Deleted item with ID: {item_id} for user {current_user.username}")
     return {"message": "Item deleted successfully"}
@@ -5,32 +5,69 @@ AI問い合わせのためのAPIルーター
 すべてのエンドポイントは認証が必要で、プロンプトテンプレートを使用して
 OpenAI APIにリクエストを送信します。
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
+import os
+import json
+from datetime import datetime, timedelta, timezone
+import math
+import asyncio
 import logging
+import openai
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.dependencies import get_current_active_user
 from app.models.user import User
-from app.schemas.llm import LLMRequest, LLMResponse
-from app.utils.openai_client import generate_response
+from app.schemas.llm import LLMRequest, LLMResponse, LLMBatchRequest, LLMBatchItemResult, LLMBatchResponse
+from app.schemas.conversation import (
+    Conversation, ConversationCreate, ConversationPage, ConversationMessagePage,
+    ConversationChatRequest, ConversationChatResponse
+)
+from app.utils.openai_client import OPENAI_MODEL, generate_response, stream_response
+from app.utils.llm_cache import make_cache_key, response_cache
+from app.utils.single_flight import llm_single_flight
+from app.utils.bulkhead import BulkheadRejected, llm_bulkhead
+from app.utils.resilience import CircuitOpenError, llm_breaker, llm_retry_stats
+from app.utils.tokens import TokenLimitExceeded, preflight_prompt
+from app.utils.token_budget import (
+    TokenBudgetExceeded, record_token_usage, release_token_reservation, reserve_tokens, usage_summary
+)
+from app.utils.conversation import (
+    LLM_CONVERSATION_SUMMARY_TOKENS, ConversationConflict, append_exchange, build_context, get_conversation
+)
+from app.models.conversation import Conversation as ConversationModel, ConversationMessage as ConversationMessageModel
 from app.prompts.chat_prompt import get_chat_prompt
 
 logger = logging.getLogger("app")
 
+LLM_BATCH_CONCURRENCY = int(os.environ.get("LLM_BATCH_CONCURRENCY", "4"))
+
 router = APIRouter(
     prefix="/llm",
     tags=["AI問い合わせ"],
     responses={
         401: {"description": "認証されていません"},
-        500: {"description": "OpenAI APIエラー"}
+        404: {"description": "会話が見つかりません"},
+        409: {"description": "会話が同時に更新されました"},
+        413: {"description": "プロンプトがモデルのコンテキスト長を超えています"},
+        429: {"description": "同時実行数またはOpenAI APIのレート制限の上限に達しています"},
+        500: {"description": "OpenAI APIエラー"},
+        502: {"description": "OpenAI APIが一時的なエラーを返しました"},
+        503: {"description": "OpenAI APIのサーキットブレーカーが開いています"},
+        504: {"description": "OpenAI APIがタイムアウトしました"}
     },
 )
 
 @router.post("/chat", response_model=LLMResponse, status_code=status.HTTP_200_OK)
 async def chat_with_ai(
     request: LLMRequest,
-    db: Session = Depends(get_db),
+    http_response: Response,
+    cache_control: Optional[str] = Header(None),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -45,32 +82,610 @@ async def chat_with_ai(
     プロンプトはテンプレートに適用され、OpenAI APIに送信されます。
     応答には生成されたテキスト、使用されたモデル、トークン使用量が含まれます。
     
+    キャッシュ対象のリクエスト（デフォルトではtemperatureが0のもの）は
+    同一内容の応答がキャッシュから返されます。`Cache-Control: no-cache`ヘッダーを
+    指定するとキャッシュをバイパスします。キャッシュの利用結果は
+    `X-LLM-Cache`レスポンスヘッダー（HIT / MISS / BYPASS）で確認できます。
+    
+    OpenAI APIへの同時リクエスト数には上限があり、待機キューが満杯の場合や
+    待機がタイムアウトした場合はRetry-Afterヘッダー付きの429エラーが返されます。
+    
+    OpenAI APIの一時的なエラー（429、5xx、タイムアウト）は自動的に再試行されます。
+    再試行しても失敗した場合は429 / 502 / 504エラー、サーキットブレーカーが
+    開いている場合は503エラーが返されます。
+    
     APIキーが設定されていない場合や、OpenAI APIでエラーが発生した場合は
     500エラーが返されます。
     """
+    bypass_cache = bool(cache_control and ("no-cache" in cache_control or "no-store" in cache_control))
+    try:
+        response, cache_status = await _complete(request, current_user, bypass_cache)
+    except Exception as e:
+        raise _to_http_exception(e)
+    
+    if cache_status:
+        http_response.headers["X-LLM-Cache"] = cache_status
+    return response
+
+async def _complete(
+    request: LLMRequest,
+    current_user: User,
+    bypass_cache: bool = False
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    1件のチャットリクエストを処理する
+    
+    トークン数の事前確認、キャッシュ参照、日次トークン予算の確認、リクエスト集約、
+    同時実行数制限を適用してOpenAI APIを呼び出します。
+    
+    Returns:
+        Tuple[Dict[str, Any], Optional[str]]: 応答と、キャッシュの利用結果（HIT / MISS / BYPASS、対象外の場合はNone）
+    """
+    prompt, prompt_tokens = preflight_prompt(request.prompt, request.max_tokens, request.truncate)
+    messages = get_chat_prompt(prompt)
+    
+    logger.info(f"LLM request from user {current_user.username} with prompt length {len(request.prompt)} ({prompt_tokens} tokens)")
+    
+    return await _complete_messages(
+        messages, prompt_tokens, request.max_tokens, request.temperature, current_user, bypass_cache
+    )
+
+async def _complete_messages(
+    messages: List[Dict[str, str]],
+    prompt_tokens: int,
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+    current_user: User,
+    bypass_cache: bool = False
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    組み立て済みのメッセージリストでOpenAI APIを呼び出す
+    
+    キャッシュ参照、日次トークン予算の確認、リクエスト集約、同時実行数制限を適用します。
+    
+    Returns:
+        Tuple[Dict[str, Any], Optional[str]]: 応答と、キャッシュの利用結果（HIT / MISS / BYPASS、対象外の場合はNone）
+    """
+    request_key = make_cache_key(messages, max_tokens, temperature, OPENAI_MODEL)
+    cache_status = None
+    if response_cache.is_cacheable(temperature):
+        if bypass_cache:
+            response_cache.record_bypass()
+            cache_status = "BYPASS"
+        else:
+            cached = await response_cache.get(request_key)
+            if cached is not None:
+                logger.info(f"LLM response served from cache for user {current_user.username}")
+                return cached, "HIT"
+            cache_status = "MISS"
+    
+    user_id = current_user.id
+    reservation = await run_in_threadpool(reserve_tokens, user_id, prompt_tokens + (max_tokens or 0))
+    
+    async def call_upstream():
+        async with llm_bulkhead.slot(user_id):
+            response = await generate_response(
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+        # 集約されたリクエストでは上流呼び出しを行ったユーザーのみに計上する
+        await run_in_threadpool(record_token_usage, user_id, (response.get("usage") or {}).get("total_tokens", 0))
+        return response
+        
     try:
-        messages = get_chat_prompt(request.prompt)
+        # 同一内容の同時リクエストは1回の上流呼び出しに集約する。上流呼び出しを行うユーザーの
+        # 同時実行数の上限による拒否は他のユーザーに共有せず、待機していたリクエストがやり直す
+        response = await llm_single_flight.do(request_key, call_upstream, unshared_errors=(BulkheadRejected,))
+    finally:
+        # 実際の使用量は上流呼び出しで加算済みのため、成功・失敗に関わらず予約を解放する
+        await run_in_threadpool(release_token_reservation, reservation)
+        
+    if cache_status == "MISS":
+        await response_cache.set(request_key, response)
+    
+    logger.info(f"LLM response generated for user {current_user.username}, tokens used: {response.get('usage', {}).get('total_tokens', 0)}")
+    
+    return response, cache_status
+
+def _to_http_exception(e: Exception) -> HTTPException:
+    """
+    チャット処理中の例外をHTTPエラーに変換する
+    """
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, ValueError):
+        logger.error(f"Value error in LLM request: {str(e)}")
+        return HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"API configuration error: {str(e)}"
+        )
+    if isinstance(e, TokenLimitExceeded):
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Prompt is too long: {e.prompt_tokens} tokens exceeds the limit of {e.limit} tokens"
+        )
+    if isinstance(e, TokenBudgetExceeded):
+        tomorrow = (datetime.now(timezone.utc) + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Daily token budget exceeded ({e.used} of {e.budget} tokens used)",
+            headers={"Retry-After": str(math.ceil((tomorrow - datetime.now(timezone.utc)).total_seconds()))},
+        )
+    if isinstance(e, ConversationConflict):
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Conversation was modified by another request, please retry"
+        )
+    if isinstance(e, BulkheadRejected):
+        return _too_many_requests(e)
+    if isinstance(e, CircuitOpenError):
+        logger.warning("LLM request rejected by open circuit breaker")
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="OpenAI API is temporarily unavailable",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    if isinstance(e, openai.RateLimitError):
+        logger.error(f"OpenAI API rate limit in LLM request: {str(e)}")
+        headers = {}
+        if "retry-after" in e.response.headers:
+            headers["Retry-After"] = e.response.headers["retry-after"]
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="OpenAI API rate limit exceeded",
+            headers=headers or None,
+        )
+    if isinstance(e, openai.APITimeoutError):
+        logger.error(f"OpenAI API timeout in LLM request: {str(e)}")
+        return HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="OpenAI API timed out"
+        )
+    if isinstance(e, (openai.APIConnectionError, openai.InternalServerError)):
+        logger.error(f"OpenAI API unavailable in LLM request: {str(e)}")
+        return HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"OpenAI API error: {str(e)}"
+        )
+    logger.error(f"Error in LLM request: {str(e)}")
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Error generating AI response: {str(e)}"
+    )
+
+@router.post("/chat/batch", response_model=LLMBatchResponse, status_code=status.HTTP_200_OK)
+async def chat_with_ai_batch(
+    batch: LLMBatchRequest,
+    stream: bool = False,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    AIと一括でチャットする
+    
+    複数のプロンプトを1回のリクエストで受け付け、同時実行数の上限
+    （LLM_BATCH_CONCURRENCY）の範囲で並行してOpenAI APIに送信します。
+    各要素にはキャッシュ、リクエスト集約、同時実行数制限、リトライが適用されます。
+    
+    - **requests**: AI問い合わせリクエストのリスト（最大500件）
+    - **stream**: trueの場合、完了した要素から順にNDJSON形式で返します（クエリパラメータ）
+    
+    各要素は個別に検証され、不正な要素はstatus_code 422として報告されます。
+    一部の要素が失敗してもバッチ全体は失敗せず、要素ごとのstatus_codeと
+    errorで結果が報告されます。streamがfalseの場合、結果はリクエストと同じ順序で返されます。
+    """
+    logger.info(f"LLM batch request from user {current_user.username} with {len(batch.requests)} prompts")
+    
+    requests: Dict[int, LLMRequest] = {}
+    invalid: List[LLMBatchItemResult] = []
+    for index, raw in enumerate(batch.requests):
+        try:
+            requests[index] = LLMRequest.model_validate(raw)
+        except ValidationError as e:
+            invalid.append(LLMBatchItemResult(index=index, status_code=422, error=_validation_error(e)))
+            
+    semaphore = asyncio.Semaphore(LLM_BATCH_CONCURRENCY)
+    
+    async def run_one(index: int, request: LLMRequest) -> LLMBatchItemResult:
+        async with semaphore:
+            try:
+                response, _ = await _complete(request, current_user)
+                return LLMBatchItemResult(index=index, status_code=status.HTTP_200_OK, result=response)
+            except Exception as e:
+                http_exception = _to_http_exception(e)
+                return LLMBatchItemResult(index=index, status_code=http_exception.status_code, error=str(http_exception.detail))
+                
+    def start() -> List[asyncio.Future]:
+        return [asyncio.ensure_future(run_one(index, request)) for index, request in requests.items()]
         
-        logger.info(f"LLM request from user {current_user.username} with prompt length {len(request.prompt)}")
+    if not stream:
+        results = sorted(invalid + list(await asyncio.gather(*start())), key=lambda result: result.index)
+        failed = sum(1 for result in results if result.status_code != status.HTTP_200_OK)
+        logger.info(f"LLM batch completed for user {current_user.username}: {len(results) - failed} succeeded, {failed} failed")
+        return LLMBatchResponse(results=results)
         
-        response = await generate_response(
+    async def ndjson_stream():
+        # タスクは本文の送信を始めてから開始し、送信が中断された場合はキャンセルする
+        tasks = start()
+        try:
+            for result in invalid:
+                yield result.model_dump_json() + "\n"
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                yield result.model_dump_json() + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+def _validation_error(e: ValidationError) -> str:
+    """
+    検証エラーを1行のエラー内容に変換する
+    """
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in error['loc']) or 'request'}: {error['msg']}"
+        for error in e.errors()
+    )
+
+@router.get("/usage", response_model=dict)
+def read_token_usage(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    本日のトークン使用量を取得
+    
+    認証されたユーザーの本日（UTC）のトークン使用量、日次予算、残量を返します。
+    """
+    return usage_summary(db, current_user.id)
+
+@router.get("/cache/stats", response_model=dict)
+async def read_cache_stats(current_user: User = Depends(get_current_active_user)):
+    """
+    応答キャッシュの統計情報を取得
+    
+    キャッシュのヒット数、ミス数、ヒット率、現在のエントリ数などを返します。
+    """
+    return response_cache.stats()
+
+@router.get("/stats", response_model=dict)
+async def read_llm_stats(current_user: User = Depends(get_current_active_user)):
+    """
+    AI問い合わせ経路の統計情報を取得
+    
+    応答キャッシュ、リクエスト集約（シングルフライト）、
+    同時実行数制限（キューの深さ、待機時間、拒否数）、リトライ、
+    サーキットブレーカーの統計情報をまとめて返します。
+    """
+    return {
+        "cache": response_cache.stats(),
+        "single_flight": llm_single_flight.stats(),
+        "bulkhead": llm_bulkhead.stats(),
+        "retry": llm_retry_stats.stats(),
+        "circuit_breaker": llm_breaker.stats(),
+    }
+
+def _too_many_requests(rejected: BulkheadRejected) -> HTTPException:
+    """
+    バルクヘッドの拒否を429エラーに変換する
+    """
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"Too many concurrent LLM requests ({rejected.reason})",
+        headers={"Retry-After": str(rejected.retry_after)},
+    )
+
+async def _prepend(first: Dict[str, Any], rest: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    受信済みの最初のイベントに続けて、残りのイベントを返す
+    """
+    yield first
+    async for item in rest:
+        yield item
+
+def _sse_event(event: str, data: dict) -> str:
+    """
+    Server-Sent Events形式の1イベントを組み立てる
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/chat/stream", status_code=status.HTTP_200_OK)
+async def chat_with_ai_stream(
+    request: LLMRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    AIとチャットする（ストリーミング）
+    
+    /llm/chatと同じリクエストを受け付け、生成されたトークンを
+    Server-Sent Events（text/event-stream）として到着順に返します。
+    
+    - **delta**イベント: 生成されたテキスト片（content）
+    - **done**イベント: 使用されたモデルとトークン使用量（usage）
+    - **error**イベント: ストリーム開始後にOpenAI APIでエラーが発生した場合
+    
+    APIキーが設定されていない場合は500エラー、プロンプトがコンテキスト長を超える場合は
+    413エラー、同時実行数や日次トークン予算の上限に達している場合は429エラーが返されます。
+    OpenAI APIのストリームは応答を返す前に開始するため、再試行しても開始できなかった場合は
+    /llm/chatと同じ429 / 502 / 504エラー、サーキットブレーカーが開いている場合は503エラーが返されます。
+    ストリームの終了まで実行枠を保持します。
+    """
+    try:
+        prompt, prompt_tokens = preflight_prompt(request.prompt, request.max_tokens, request.truncate)
+    except TokenLimitExceeded as e:
+        raise _to_http_exception(e)
+    messages = get_chat_prompt(prompt)
+    
+    logger.info(f"LLM stream request from user {current_user.username} with prompt length {len(request.prompt)} ({prompt_tokens} tokens)")
+    
+    try:
+        chunks = stream_response(
             messages=messages,
             max_tokens=request.max_tokens,
             temperature=request.temperature
         )
-        
-        logger.info(f"LLM response generated for user {current_user.username}, tokens used: {response.get('usage', {}).get('total_tokens', 0)}")
-        
-        return response
     except ValueError as ve:
         logger.error(f"Value error in LLM request: {str(ve)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"API configuration error: {str(ve)}"
         )
+        
+    username = current_user.username
+    user_id = current_user.id
+    
+    try:
+        reservation = await run_in_threadpool(reserve_tokens, user_id, prompt_tokens + (request.max_tokens or 0))
+    except TokenBudgetExceeded as e:
+        await chunks.aclose()
+        raise _to_http_exception(e)
+        
+    try:
+        await llm_bulkhead.acquire(user_id)
+    except BulkheadRejected as br:
+        await chunks.aclose()
+        await run_in_threadpool(release_token_reservation, reservation)
+        raise _too_many_requests(br)
+        
+    closed = False
+    
+    async def close_stream():
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+        llm_bulkhead.release(user_id)
+        await chunks.aclose()
+        await run_in_threadpool(release_token_reservation, reservation)
+        
+    # リトライとサーキットブレーカーの結果をステータスコードで返すため、最初のイベントまで受信してから応答する
+    primed = False
+    try:
+        first = await chunks.__anext__()
+        primed = True
     except Exception as e:
-        logger.error(f"Error in LLM request: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error generating AI response: {str(e)}"
+        raise _to_http_exception(e)
+    finally:
+        if not primed:
+            await close_stream()
+            
+    async def event_stream():
+        try:
+            async for chunk in _prepend(first, chunks):
+                if chunk["event"] == "done":
+                    usage = chunk["data"].get("usage") or {}
+                    await run_in_threadpool(record_token_usage, user_id, usage.get("total_tokens", 0))
+                    logger.info(f"LLM stream completed for user {username}, tokens used: {usage.get('total_tokens', 0)}")
+                yield _sse_event(chunk["event"], chunk["data"])
+        except Exception as e:
+            logger.error(f"Error in LLM stream: {str(e)}")
+            yield _sse_event("error", {"detail": f"Error generating AI response: {str(e)}"})
+        finally:
+            await close_stream()
+            
+    # ストリームが送信されずに終了した場合もバックグラウンドタスクで枠と上流のストリームを解放する
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(close_stream)
+    )
+
+def _get_conversation_or_404(db: Session, conversation_id: int, current_user: User) -> ConversationModel:
+    """
+    ユーザーが所有する会話を取得し、存在しない場合は404エラーを送出する
+    """
+    conversation = get_conversation(db, conversation_id, current_user.id)
+    if conversation is None:
+        logger.warning(f"Conversation with ID {conversation_id} not found for user {current_user.username}")
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return conversation
+
+@router.post("/conversations", response_model=Conversation, status_code=status.HTTP_201_CREATED)
+def create_conversation(
+    conversation: ConversationCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    新しい会話を作成
+    
+    認証されたユーザーの会話を新規作成します。
+    
+    - **title**: 会話のタイトル（オプション）
+    """
+    db_conversation = ConversationModel(title=conversation.title, owner_id=current_user.id)
+    db.add(db_conversation)
+    db.commit()
+    db.refresh(db_conversation)
+    logger.info(f"Conversation created with ID: {db_conversation.id} by user {current_user.username}")
+    return db_conversation
+
+@router.get("/conversations", response_model=ConversationPage)
+def read_conversations(
+    before_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    会話一覧を取得
+    
+    認証されたユーザーの会話を新しい順に取得します。
+    
+    - **before_id**: このIDより古い会話を取得します（前のページのnext_before_id、省略時は最新から）
+    - **limit**: 取得する会話数の上限（1〜100、デフォルト: 20）
+    """
+    query = db.query(ConversationModel).filter(ConversationModel.owner_id == current_user.id)
+    if before_id is not None:
+        query = query.filter(ConversationModel.id < before_id)
+    conversations = query.order_by(ConversationModel.id.desc()).limit(limit + 1).all()
+    
+    next_before_id = None
+    if len(conversations) > limit:
+        conversations = conversations[:limit]
+        next_before_id = conversations[-1].id
+    return ConversationPage(items=conversations, next_before_id=next_before_id)
+
+@router.get("/conversations/{conversation_id}", response_model=Conversation)
+def read_conversation(
+    conversation_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    特定の会話を取得
+    
+    - **conversation_id**: 取得する会話のID（パスパラメータ）
+    
+    会話が存在しない場合や、他のユーザーの会話にアクセスしようとした場合は
+    404エラーが返されます。
+    """
+    return _get_conversation_or_404(db, conversation_id, current_user)
+
+@router.delete("/conversations/{conversation_id}")
+def delete_conversation(
+    conversation_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    会話を削除
+    
+    指定された会話とそのすべてのメッセージを削除します。
+    
+    - **conversation_id**: 削除する会話のID（パスパラメータ）
+    """
+    conversation = _get_conversation_or_404(db, conversation_id, current_user)
+    db.query(ConversationMessageModel).filter(
+        ConversationMessageModel.conversation_id == conversation.id
+    ).delete(synchronize_session=False)
+    db.delete(conversation)
+    db.commit()
+    logger.info(f"Deleted conversation with ID: {conversation_id} for user {current_user.username}")
+    return {"message": "Conversation deleted successfully"}
+
+@router.get("/conversations/{conversation_id}/messages", response_model=ConversationMessagePage)
+def read_conversation_messages(
+    conversation_id: int,
+    after_seq: Optional[int] = None,
+    before_seq: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    会話のメッセージ一覧を取得
+    
+    メッセージは常にseqの昇順で返されます。
+    
+    - **after_seq**: このseqより後のメッセージを古い順に取得します（前のページのnext_cursor）
+    - **before_seq**: このseqより前のメッセージを取得します（最新側から遡る場合、前のページのnext_cursor）
+    - **limit**: 取得するメッセージ数の上限（1〜200、デフォルト: 50）
+    
+    after_seqとbefore_seqをどちらも省略した場合は最初のメッセージから取得します。
+    """
+    conversation = _get_conversation_or_404(db, conversation_id, current_user)
+    query = db.query(ConversationMessageModel).filter(
+        ConversationMessageModel.conversation_id == conversation.id
+    )
+    
+    if before_seq is not None:
+        rows = query.filter(ConversationMessageModel.seq < before_seq).order_by(
+            ConversationMessageModel.seq.desc()
+        ).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = list(reversed(rows[:limit]))
+        next_cursor = rows[0].seq if has_more else None
+    else:
+        rows = query.filter(ConversationMessageModel.seq > (after_seq or 0)).order_by(
+            ConversationMessageModel.seq
+        ).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = rows[-1].seq if has_more else None
+        
+    return ConversationMessagePage(items=rows, next_cursor=next_cursor)
+
+@router.post("/conversations/{conversation_id}/chat", response_model=ConversationChatResponse)
+async def chat_in_conversation(
+    conversation_id: int,
+    request: ConversationChatRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    会話の中でAIとチャットする
+    
+    会話履歴をサーバー側でプロンプトに含めてOpenAI APIに送信し、
+    ユーザーの入力とAIの応答を会話に追記します。
+    
+    - **prompt**: ユーザーの質問やプロンプト（必須）
+    - **max_tokens**: 生成する最大トークン数（オプション、デフォルト: 1000）
+    - **temperature**: 応答の多様性を制御するパラメータ（オプション、デフォルト: 0.7）
+    - **strategy**: コンテキスト長に収まらない古いメッセージの扱い
+      （sliding: 含めない、summary: 要約して含める。デフォルト: sliding）
+      
+    履歴は最新のメッセージから逆順に、コンテキスト長から新しいプロンプトと
+    max_tokensを除いた範囲で含められます。summaryを指定した場合、
+    要約は会話に保存され、以降のリクエストでは新たに外れたメッセージのみが要約に追加されます。
+    
+    同じ会話に対する同時リクエストで追記が競合した場合は409エラーが返されます。
+    その他のエラーは/llm/chatと同じです。
+    """
+    conversation = await run_in_threadpool(_get_conversation_or_404, db, conversation_id, current_user)
+    
+    async def summarize(messages: List[Dict[str, str]], prompt_tokens: int) -> str:
+        response, _ = await _complete_messages(
+            messages, prompt_tokens, LLM_CONVERSATION_SUMMARY_TOKENS, 0.0, current_user
+        )
+        return response["response"]
+        
+    try:
+        context = await build_context(
+            db, conversation, request.prompt, request.max_tokens, request.strategy, summarize
         )
+        logger.info(
+            f"LLM conversation request from user {current_user.username} in conversation {conversation.id} "
+            f"with {context['context_messages']} history messages ({context['prompt_tokens']} tokens)"
+        )
+        response, _ = await _complete_messages(
+            context["messages"], context["prompt_tokens"], request.max_tokens, request.temperature, current_user
+        )
+        completion_tokens = (response.get("usage") or {}).get("completion_tokens")
+        user_seq, assistant_seq = await run_in_threadpool(
+            append_exchange, db, conversation, request.prompt, response["response"], completion_tokens
+        )
+    except Exception as e:
+        raise _to_http_exception(e)
+        
+    return ConversationChatResponse(
+        **response,
+        conversation_id=conversation.id,
+        user_seq=user_seq,
+        assistant_seq=assistant_seq,
+        context_messages=context["context_messages"],
+        summarized=context["summarized"],
+    )
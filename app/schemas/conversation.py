@@ -0,0 +1,104 @@
+"""
+会話履歴のPydanticスキーマ
+
+このモジュールは会話セッションと会話メッセージのデータ検証と変換のための
+Pydanticモデルを定義します。会話一覧とメッセージ一覧はカーソル形式でページングされます。
+"""
+from datetime import datetime
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+
+from app.schemas.llm import LLMResponse
+
+class ConversationCreate(BaseModel):
+    """
+    会話作成スキーマ
+    
+    新しい会話を作成する際に使用されるスキーマです。
+    """
+    title: Optional[str] = Field(None, description="会話のタイトル")
+
+class Conversation(BaseModel):
+    """
+    会話レスポンススキーマ
+    
+    APIレスポンスで返される会話のスキーマです。
+    """
+    id: int = Field(..., description="会話の一意識別子")
+    title: Optional[str] = Field(None, description="会話のタイトル")
+    message_count: int = Field(..., description="会話のメッセージ数")
+    summary: Optional[str] = Field(None, description="コンテキストから外れた古いメッセージの要約")
+    created_at: datetime = Field(..., description="作成日時（UTC）")
+    updated_at: datetime = Field(..., description="最終更新日時（UTC）")
+    
+    class Config:
+        """
+        Pydantic設定
+        
+        SQLAlchemyモデルからPydanticモデルへの変換を可能にします。
+        """
+        from_attributes = True
+
+class ConversationPage(BaseModel):
+    """
+    会話一覧のページスキーマ
+    
+    新しい順に並んだ会話と、次のページを取得するためのカーソルを含みます。
+    """
+    items: List[Conversation] = Field(..., description="会話のリスト（新しい順）")
+    next_before_id: Optional[int] = Field(None, description="次のページを取得する際のbefore_id（最後のページの場合はNone）")
+
+class ConversationMessage(BaseModel):
+    """
+    会話メッセージレスポンススキーマ
+    
+    APIレスポンスで返される会話メッセージのスキーマです。
+    """
+    seq: int = Field(..., description="会話内の連番")
+    role: str = Field(..., description="メッセージの役割（user / assistant）")
+    content: str = Field(..., description="メッセージの内容")
+    tokens: int = Field(..., description="メッセージ内容のトークン数")
+    created_at: datetime = Field(..., description="作成日時（UTC）")
+    
+    class Config:
+        """
+        Pydantic設定
+        
+        SQLAlchemyモデルからPydanticモデルへの変換を可能にします。
+        """
+        from_attributes = True
+
+class ConversationMessagePage(BaseModel):
+    """
+    会話メッセージ一覧のページスキーマ
+    
+    seqの順に並んだメッセージと、次のページを取得するためのカーソルを含みます。
+    """
+    items: List[ConversationMessage] = Field(..., description="メッセージのリスト")
+    next_cursor: Optional[int] = Field(None, description="次のページを取得する際のafter_seqまたはbefore_seq（最後のページの場合はNone）")
+
+class ConversationChatRequest(BaseModel):
+    """
+    会話チャットリクエストスキーマ
+    
+    会話に新しいユーザーメッセージを追加し、AIの応答を生成する際に使用されるスキーマです。
+    """
+    prompt: str = Field(..., description="ユーザーの入力または質問", min_length=1)
+    max_tokens: Optional[int] = Field(1000, description="生成する最大トークン数", ge=1, le=4096)
+    temperature: Optional[float] = Field(0.7, description="応答の多様性を制御するパラメータ（0.0〜2.0）", ge=0.0, le=2.0)
+    strategy: Literal["sliding", "summary"] = Field(
+        "sliding",
+        description="コンテキストから外れた古いメッセージの扱い（sliding: 破棄、summary: 要約して含める）"
+    )
+
+class ConversationChatResponse(LLMResponse):
+    """
+    会話チャットレスポンススキーマ
+    
+    AIの応答に加えて、保存されたメッセージのseqとコンテキストの情報を含みます。
+    """
+    conversation_id: int = Field(..., description="会話ID")
+    user_seq: int = Field(..., description="保存されたユーザーメッセージのseq")
+    assistant_seq: int = Field(..., description="保存されたAI応答メッセージのseq")
+    context_messages: int = Field(..., description="プロンプトに含めた履歴メッセージ数")
+    summarized: bool = Field(False, description="要約をプロンプトに含めたかどうか")
@@ -5,7 +5,8 @@
 これらのモデルはAPIリクエストとレスポンスのデータ構造を定義し、
 SQLAlchemyモデルとの変換を行います。
 """
-from typing import Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 
 class ItemBase(BaseModel):
@@ -29,6 +30,17 @@ class ItemCreate(ItemBase):
     """
     pass
 
+class ItemUpdate(BaseModel):
+    """
+    アイテム部分更新スキーマ
+    
+    PATCHで指定された属性のみを更新します。名前と価格はnullにできません。
+    """
+    name: str = Field(None, description="アイテム名")
+    description: Optional[str] = Field(None, description="アイテムの説明")
+    price: float = Field(None, description="アイテムの価格", gt=0)
+    tax: Optional[float] = Field(None, description="アイテムの税金")
+
 class Item(ItemBase):
     """
     アイテムレスポンススキーマ
@@ -37,7 +49,8 @@ class Item(ItemBase):
     データベースから取得したアイテムをこの形式に変換して返します。
     """
     id: int = Field(..., description="アイテムの一意識別子")
-
+    version: int = Field(1, description="更新のたびに増加するバージョン（ETagに対応）")
+    
     class Config:
         """
         Pydantic設定
@@ -45,3 +58,133 @@ class Item(ItemBase):
         SQLAlchemyモデルからPydanticモデルへの変換を可能にします。
         """
         from_attributes = True
+
+class ItemUpdateRow(ItemCreate):
+    """
+    アイテム一括更新の要素スキーマ
+    
+    更新するアイテムのIDと、ItemCreateと同じ新しい属性を持ちます。
+    """
+    id: int = Field(..., description="更新するアイテムのID")
+
+class ItemBulkCreate(BaseModel):
+    """
+    アイテム一括作成リクエストスキーマ
+    
+    要素はItemCreateとして1件ずつ検証され、不正な要素があっても
+    他の要素の作成は行われます。
+    """
+    items: List[Dict[str, Any]] = Field(..., description="作成するアイテム（ItemCreate形式）のリスト", min_length=1, max_length=5000)
+
+class ItemBulkUpdate(BaseModel):
+    """
+    アイテム一括更新リクエストスキーマ
+    
+    要素はItemUpdateRowとして1件ずつ検証されます。
+    """
+    items: List[Dict[str, Any]] = Field(..., description="更新するアイテム（ItemUpdateRow形式）のリスト", min_length=1, max_length=5000)
+
+class ItemBulkDelete(BaseModel):
+    """
+    アイテム一括削除リクエストスキーマ
+    """
+    ids: List[int] = Field(..., description="削除するアイテムのIDのリスト", min_length=1, max_length=5000)
+
+class ItemBulkResult(BaseModel):
+    """
+    アイテム一括操作の要素ごとの結果スキーマ
+    
+    リクエストリスト内の位置、処理結果のステータスコード、
+    対象のアイテムID、失敗時のエラー内容を含みます。
+    """
+    index: int = Field(..., description="リクエストリスト内の位置（0始まり）")
+    status_code: int = Field(..., description="要素ごとの処理結果を表すHTTPステータスコード")
+    id: Optional[int] = Field(None, description="作成・更新・削除されたアイテムのID")
+    error: Optional[str] = Field(None, description="失敗時のエラー内容")
+
+class ItemBulkResponse(BaseModel):
+    """
+    アイテム一括操作レスポンススキーマ
+    
+    リクエストと同じ順序で並んだ要素ごとの結果と、成功・失敗の件数を含みます。
+    """
+    succeeded: int = Field(..., description="成功した要素の数")
+    failed: int = Field(..., description="失敗した要素の数")
+    results: List[ItemBulkResult] = Field(..., description="要素ごとの結果のリスト（リクエストと同じ順序）")
+
+class ItemImportError(BaseModel):
+    """
+    アイテムインポートの行ごとのエラースキーマ
+    """
+    line: int = Field(..., description="アップロード内の行番号（1始まり、CSVはヘッダー行を含む）")
+    error: str = Field(..., description="エラー内容")
+
+class ItemImportJob(BaseModel):
+    """
+    アイテムインポートジョブレスポンススキーマ
+    
+    インポートの状態、進捗、取り込み件数、スループット、行ごとのエラーを含みます。
+    """
+    id: str = Field(..., description="ジョブID")
+    status: str = Field(..., description="状態（pending / running / completed / failed）")
+    format: str = Field(..., description="アップロードの形式（csv / ndjson）")
+    progress: float = Field(..., description="進捗（処理済みバイト数の割合、0.0〜1.0）")
+    lines_processed: int = Field(..., description="処理済みのレコード数（エラー行を含む）")
+    rows_imported: int = Field(..., description="取り込んだアイテム数")
+    rows_failed: int = Field(..., description="エラーになったレコード数")
+    rows_per_second: float = Field(..., description="処理済みレコード数の毎秒のスループット")
+    errors: List[ItemImportError] = Field(default_factory=list, description="行ごとのエラー（件数上限あり）")
+    error: Optional[str] = Field(None, description="ジョブが失敗した場合のエラー内容")
+    created_at: datetime = Field(..., description="作成日時（UTC）")
+    finished_at: Optional[datetime] = Field(None, description="完了日時（UTC）")
+
+class ItemSearchHit(Item):
+    """
+    アイテム検索結果スキーマ
+    
+    アイテムの属性に、検索の関連度スコアと一致箇所を強調したスニペットを加えたものです。
+    """
+    rank: float = Field(..., description="BM25による関連度スコア（小さいほど関連性が高い）")
+    snippet: str = Field(..., description="一致した語を<mark>タグで囲んだ名前または説明の抜粋")
+
+class ItemPriceBucket(BaseModel):
+    """
+    価格のヒストグラムの区間スキーマ
+    """
+    lower: float = Field(..., description="区間の下限（この値を含む）")
+    upper: float = Field(..., description="区間の上限（最後の区間のみこの値を含む）")
+    count: int = Field(..., description="区間に含まれるアイテム数")
+
+class ItemStats(BaseModel):
+    """
+    アイテム集計レスポンススキーマ
+    
+    ユーザーが所有するアイテムの件数、合計、平均、価格の範囲とヒストグラムを含みます。
+    """
+    count: int = Field(..., description="アイテム数")
+    total_price: float = Field(..., description="価格の合計")
+    total_tax: float = Field(..., description="税金の合計（未設定はゼロとして扱う）")
+    average_price: Optional[float] = Field(None, description="平均価格（アイテムがない場合はNone）")
+    min_price: Optional[float] = Field(None, description="最小価格")
+    max_price: Optional[float] = Field(None, description="最大価格")
+    histogram: List[ItemPriceBucket] = Field(default_factory=list, description="最小価格から最大価格までの等幅ヒストグラム")
+
+class ItemChange(BaseModel):
+    """
+    アイテム変更履歴の要素スキーマ
+    
+    作成・更新の変更にはアイテムの現在の内容が含まれ、削除の変更には含まれません。
+    """
+    seq: int = Field(..., description="変更の連番（単調増加）")
+    item_id: int = Field(..., description="変更されたアイテムのID")
+    operation: str = Field(..., description="操作（create / update / delete）")
+    version: int = Field(..., description="変更後のアイテムのバージョン")
+    changed_at: datetime = Field(..., description="変更日時（UTC）")
+    item: Optional[Item] = Field(None, description="アイテムの現在の内容（削除された場合はNone）")
+
+class ItemChangeFeed(BaseModel):
+    """
+    アイテム変更履歴レスポンススキーマ
+    """
+    changes: List[ItemChange] = Field(default_factory=list, description="連番の昇順の変更のリスト")
+    next_since: int = Field(..., description="次回のリクエストでsinceに指定する連番")
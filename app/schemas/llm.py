@@ -14,9 +14,10 @@ class LLMRequest(BaseModel):
     OpenAI APIへのリクエストパラメータを定義します。
     ユーザーの入力プロンプトと生成設定を含みます。
     """
-    prompt: str = Field(..., description="ユーザーの入力または質問")
-    max_tokens: Optional[int] = Field(1000, description="生成する最大トークン数")
-    temperature: Optional[float] = Field(0.7, description="応答の多様性を制御するパラメータ（0.0〜1.0）")
+    prompt: str = Field(..., description="ユーザーの入力または質問", min_length=1)
+    max_tokens: Optional[int] = Field(1000, description="生成する最大トークン数", ge=1, le=4096)
+    temperature: Optional[float] = Field(0.7, description="応答の多様性を制御するパラメータ（0.0〜2.0）", ge=0.0, le=2.0)
+    truncate: bool = Field(False, description="プロンプトがコンテキスト長を超える場合に、拒否せず切り詰めるかどうか")
 
 class LLMResponse(BaseModel):
     """
@@ -28,3 +29,32 @@ class LLMResponse(BaseModel):
     response: str = Field(..., description="AIから生成された応答テキスト")
     model: Optional[str] = Field(None, description="使用されたAIモデル")
     usage: Optional[Dict[str, Any]] = Field(None, description="トークン使用量情報")
+
+class LLMBatchRequest(BaseModel):
+    """
+    AI一括問い合わせリクエストスキーマ
+    
+    複数のAI問い合わせリクエストをまとめて送信するためのスキーマです。
+    各要素はバッチ全体を拒否しないよう、エンドポイントで個別にLLMRequestとして検証されます。
+    """
+    requests: List[Dict[str, Any]] = Field(..., description="AI問い合わせリクエスト（LLMRequest形式）のリスト", min_length=1, max_length=500)
+
+class LLMBatchItemResult(BaseModel):
+    """
+    AI一括問い合わせの要素ごとの結果スキーマ
+    
+    リクエストリスト内の位置、処理結果のステータスコード、
+    成功時の応答または失敗時のエラー内容を含みます。
+    """
+    index: int = Field(..., description="リクエストリスト内の位置（0始まり）")
+    status_code: int = Field(..., description="要素ごとの処理結果を表すHTTPステータスコード")
+    result: Optional[LLMResponse] = Field(None, description="成功時のAI応答")
+    error: Optional[str] = Field(None, description="失敗時のエラー内容")
+
+class LLMBatchResponse(BaseModel):
+    """
+    AI一括問い合わせレスポンススキーマ
+    
+    リクエストと同じ順序で並んだ要素ごとの結果を含みます。
+    """
+    results: List[LLMBatchItemResult] = Field(..., description="要素ごとの結果のリスト（リクエストと同じ順序）")
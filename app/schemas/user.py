@@ -56,6 +56,13 @@ class Token(BaseModel):
     """
     access_token: str = Field(..., description="JWTアクセストークン")
     token_type: str = Field(..., description="トークンタイプ（通常は'bearer'）")
+    refresh_token: Optional[str] = Field(None, description="アクセストークンの更新に使用するリフレッシュトークン（1回のみ使用可能）")
+
+class RefreshTokenRequest(BaseModel):
+    """
+    リフレッシュトークンのリクエストスキーマ
+    """
+    refresh_token: str = Field(..., description="ログインまたは前回の更新で取得したリフレッシュトークン")
 
 class TokenData(BaseModel):
     """
@@ -65,3 +72,5 @@ class TokenData(BaseModel):
     ユーザー名を含みます。
     """
     username: Optional[str] = Field(None, description="トークンに含まれるユーザー名")
+    jti: Optional[str] = Field(None, description="トークンのID（失効に使用）")
+    exp: Optional[float] = Field(None, description="トークンの有効期限（UNIX時刻）")
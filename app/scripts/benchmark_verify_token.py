@@ -0,0 +1,53 @@
+"""
+JWT検証のマイクロベンチマークスクリプト
+
+同じアクセストークンをverify_tokenで繰り返し検証し、検証済みJWTのキャッシュを
+無効にした場合（毎回jwt.decodeで署名を検証）と有効にした場合の1回あたりの処理時間を表示します。
+
+使用例:
+    python app/scripts/benchmark_verify_token.py --iterations 20000
+"""
+import sys
+import os
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.utils.auth import create_access_token, verify_token
+from app.utils.token_cache import verified_token_cache
+
+def measure(token: str, iterations: int) -> float:
+    """
+    verify_tokenの1回あたりの平均処理時間を求める
+    
+    Returns:
+        float: 平均処理時間（マイクロ秒）
+    """
+    exception = Exception("invalid token")
+    started = time.perf_counter()
+    for _ in range(iterations):
+        verify_token(token, exception)
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+def main():
+    parser = argparse.ArgumentParser(description="JWT検証のマイクロベンチマーク")
+    parser.add_argument("--iterations", type=int, default=10000)
+    args = parser.parse_args()
+    
+    token = create_access_token({"sub": "benchmark"})
+    
+    verified_token_cache.enabled = False
+    uncached = measure(token, args.iterations)
+    
+    verified_token_cache.enabled = True
+    verified_token_cache.clear()
+    cached = measure(token, args.iterations)
+    
+    print(f"iterations: {args.iterations}")
+    print(f"jwt.decode every request: {uncached:.1f} us/op")
+    print(f"verified token cache:     {cached:.1f} us/op  ({uncached / cached:.1f}x)")
+    print(f"cache: {verified_token_cache.stats()}")
+
+if __name__ == "__main__":
+    main()
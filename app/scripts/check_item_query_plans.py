@@ -0,0 +1,66 @@
+"""
+アイテム一覧のクエリプランの回帰チェックスクリプト
+
+GET /items/が生成する代表的なクエリ（絞り込み条件、並び順、カーソルの組み合わせ）について
+EXPLAIN QUERY PLANを取得し、テーブルの全件走査や並び替え用の一時B-Treeが
+発生していないことを確認します。インデックスや検索条件を変更した際に実行し、
+問題があれば終了コード1で終了します。
+
+使用例:
+    python app/scripts/check_item_query_plans.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models.item import Item
+from app.models.user import User
+from app.utils.item_query import apply_item_filters, apply_item_sort
+from app.utils.pagination import encode_cursor
+
+# (説明, 絞り込み条件, 並び順, カーソル, 並び替えのための一時B-Treeを許容するか)
+QUERY_SHAPES = [
+    ("id order", {}, "id", None, False),
+    ("id order, next page", {}, "id", {"id": 100}, False),
+    ("id descending, next page", {}, "-id", {"sort": "-id", "id": 100}, False),
+    ("price order", {}, "price", None, False),
+    ("price range, price order, next page", {"min_price": 10, "max_price": 100}, "price", {"sort": "price", "value": 50.0, "id": 100}, False),
+    ("price descending, next page", {}, "-price", {"sort": "-price", "value": 50.0, "id": 100}, False),
+    ("name prefix, name order", {"name_prefix": "Lap"}, "name", None, False),
+    ("name prefix, name order, next page", {"name_prefix": "Lap"}, "name", {"sort": "name", "value": "Laptop", "id": 100}, False),
+    ("name descending", {}, "-name", None, False),
+    ("price range, id order", {"min_price": 10, "max_price": 100}, "id", None, True),
+    ("tax range, id order", {"min_tax": 1, "max_tax": 5}, "id", None, True),
+    ("name prefix, price order", {"name_prefix": "Lap"}, "price", None, True),
+]
+
+def explain(session: Session, filters: dict, sort: str, cursor: dict) -> list:
+    query = session.query(Item).filter(Item.owner_id == 1)
+    query = apply_item_filters(query, **filters)
+    query = apply_item_sort(query, sort, encode_cursor(cursor) if cursor else None).limit(101)
+    sql = str(query.statement.compile(session.bind, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+def check_query_plans() -> bool:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Item.__table__])
+    ok = True
+    with Session(engine) as session:
+        for description, filters, sort, cursor, allow_sort in QUERY_SHAPES:
+            plan = explain(session, filters, sort, cursor)
+            problems = [
+                step for step in plan
+                if (step.startswith("SCAN items") and "INDEX" not in step)
+                or (not allow_sort and "TEMP B-TREE" in step)
+            ]
+            print(f"{'NG' if problems else 'OK'}  {description}: {' / '.join(plan)}")
+            ok = ok and not problems
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if check_query_plans() else 1)
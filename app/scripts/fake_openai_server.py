@@ -0,0 +1,229 @@
+"""
+OpenAI互換の負荷試験用スタブサーバー
+
+このスクリプトはOpenAIのチャット完了API（/v1/chat/completions）と互換性のある
+ローカルサーバーを起動します。実際のAPIを呼び出さずに/llmルーターの
+スループットやレイテンシを再現性のある条件で測定するために使用します。
+
+応答までの待機時間の分布、トークン生成速度、エラー注入率を設定でき、
+stream=trueのリクエストにはSSE形式で応答します。
+
+使用例:
+    python app/scripts/fake_openai_server.py --port 8001 --latency lognormal --latency-mean 0.8 --error-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=dummy python main.py
+"""
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+class FakeServerConfig:
+    """
+    スタブサーバーの設定
+    
+    Attributes:
+        latency: 最初のトークンまでの待機時間の分布
+        latency_mean: 待機時間の平均（秒）
+        latency_stddev: 待機時間の標準偏差（秒、normal / lognormalで使用）
+        tokens_per_second: 応答トークンの生成速度
+        completion_tokens: 応答のトークン数（max_tokensが小さい場合はそちらを優先）
+        error_rate: エラーを返す確率（0.0〜1.0）
+        error_statuses: 注入するエラーのHTTPステータスコード
+        retry_after: 429 / 503応答に付与するRetry-Afterの秒数（0の場合は付与しない）
+        model: 応答に含めるモデル名
+        seed: 乱数のシード（再現性のある試験のため）
+    """
+    
+    def __init__(
+        self,
+        latency: str = "fixed",
+        latency_mean: float = 0.5,
+        latency_stddev: float = 0.1,
+        tokens_per_second: float = 50.0,
+        completion_tokens: int = 64,
+        error_rate: float = 0.0,
+        error_statuses: List[int] = None,
+        retry_after: float = 0.0,
+        model: str = "fake-gpt",
+        seed: int = None
+    ):
+        self.latency = latency
+        self.latency_mean = latency_mean
+        self.latency_stddev = latency_stddev
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses or [429, 500, 503]
+        self.retry_after = retry_after
+        self.model = model
+        self.random = random.Random(seed)
+        
+    def sample_latency(self) -> float:
+        """
+        設定された分布から待機時間を1つ取り出す
+        
+        Returns:
+            float: 待機時間（秒、0以上）
+        """
+        mean, stddev = self.latency_mean, self.latency_stddev
+        if self.latency == "uniform":
+            value = self.random.uniform(max(0.0, mean - stddev), mean + stddev)
+        elif self.latency == "normal":
+            value = self.random.gauss(mean, stddev)
+        elif self.latency == "lognormal":
+            # 平均と標準偏差が指定値になるように対数正規分布のパラメータを求める
+            sigma2 = math.log(1 + (stddev ** 2) / (mean ** 2)) if mean > 0 else 0.0
+            value = self.random.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2)) if mean > 0 else 0.0
+        elif self.latency == "exponential":
+            value = self.random.expovariate(1 / mean) if mean > 0 else 0.0
+        else:
+            value = mean
+        return max(0.0, value)
+        
+    def should_fail(self) -> bool:
+        """
+        このリクエストでエラーを注入するかどうかを判定する
+        """
+        return self.error_rate > 0 and self.random.random() < self.error_rate
+
+def _estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    # 英語でおよそ4文字1トークンとして概算する
+    return max(1, sum(len(str(message.get("content", ""))) for message in messages) // 4)
+
+def create_app(config: FakeServerConfig) -> FastAPI:
+    """
+    スタブサーバーのFastAPIアプリケーションを作成する
+    
+    Args:
+        config: スタブサーバーの設定
+        
+    Returns:
+        FastAPI: /v1/chat/completionsと/statsを持つアプリケーション
+    """
+    app = FastAPI(title="Fake OpenAI server")
+    counters = {"requests": 0, "streamed": 0, "errors": 0}
+    
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        counters["requests"] += 1
+        created = int(time.time())
+        completion_id = f"chatcmpl-fake-{counters['requests']}"
+        model = body.get("model") or config.model
+        
+        await asyncio.sleep(config.sample_latency())
+        
+        if config.should_fail():
+            counters["errors"] += 1
+            status_code = config.random.choice(config.error_statuses)
+            headers = {}
+            if config.retry_after and status_code in (429, 503):
+                headers["retry-after"] = str(config.retry_after)
+            return JSONResponse(
+                {"error": {"message": "Injected error from fake server", "type": "server_error", "code": None}},
+                status_code=status_code,
+                headers=headers,
+            )
+            
+        max_tokens = body.get("max_tokens") or config.completion_tokens
+        completion_tokens = min(config.completion_tokens, max_tokens)
+        prompt_tokens = _estimate_tokens(body.get("messages", []))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        words = [f"token{i}" for i in range(completion_tokens)]
+        token_interval = 1 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        
+        if not body.get("stream"):
+            await asyncio.sleep(token_interval * completion_tokens)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": " ".join(words)},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            }
+            
+        counters["streamed"] += 1
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+        
+        def chunk(choices: List[Dict[str, Any]], chunk_usage: Dict[str, Any] = None) -> str:
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": choices,
+            }
+            if chunk_usage is not None:
+                data["usage"] = chunk_usage
+            return f"data: {json.dumps(data)}\n\n"
+            
+        async def event_stream():
+            yield chunk([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+            for i, word in enumerate(words):
+                await asyncio.sleep(token_interval)
+                content = word if i == 0 else f" {word}"
+                yield chunk([{"index": 0, "delta": {"content": content}, "finish_reason": None}])
+            yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if include_usage:
+                yield chunk([], usage)
+            yield "data: [DONE]\n\n"
+            
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+        
+    @app.get("/stats")
+    async def stats():
+        return counters
+        
+    return app
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="OpenAI互換の負荷試験用スタブサーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="fixed", help="最初のトークンまでの待機時間の分布")
+    parser.add_argument("--latency-mean", type=float, default=0.5, help="待機時間の平均（秒）")
+    parser.add_argument("--latency-stddev", type=float, default=0.1, help="待機時間の標準偏差（秒）")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="応答トークンの生成速度")
+    parser.add_argument("--completion-tokens", type=int, default=64, help="応答のトークン数")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="エラーを返す確率（0.0〜1.0）")
+    parser.add_argument("--error-statuses", default="429,500,503", help="注入するエラーのステータスコード（カンマ区切り）")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="429 / 503応答に付与するRetry-After（秒）")
+    parser.add_argument("--model", default="fake-gpt")
+    parser.add_argument("--seed", type=int, default=None, help="乱数のシード")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    args = parse_args()
+    config = FakeServerConfig(
+        latency=args.latency,
+        latency_mean=args.latency_mean,
+        latency_stddev=args.latency_stddev,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        error_statuses=[int(code) for code in args.error_statuses.split(",") if code],
+        retry_after=args.retry_after,
+        model=args.model,
+        seed=args.seed,
+    )
+    print(f"Fake OpenAI server listening on http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,105 @@
+"""
+/llmルーターの負荷試験スクリプト
+
+起動中のアプリケーションに対して/llm/chat（または/llm/chat/stream）へ
+指定した同時実行数でリクエストを送信し、スループットとレイテンシの分位点を表示します。
+fake_openai_server.pyと組み合わせることで、実際のトークンを消費せずに
+再現性のある試験を行えます。
+
+使用例:
+    python app/scripts/fake_openai_server.py --port 8001 --latency lognormal --seed 1
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=dummy python main.py
+    python app/scripts/llm_load_test.py --requests 500 --concurrency 50
+"""
+import time
+import asyncio
+import argparse
+from collections import Counter
+from typing import List
+
+import httpx
+
+def percentile(values: List[float], ratio: float) -> float:
+    """
+    ソート済みのリストから分位点を求める（最近傍法）
+    """
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(ratio * len(values))) - 1))
+    return values[index]
+
+async def get_token(client: httpx.AsyncClient, username: str, password: str) -> str:
+    """
+    試験用ユーザーを登録（既に存在する場合は無視）し、アクセストークンを取得する
+    """
+    await client.post("/auth/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": password,
+    })
+    response = await client.post("/auth/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def run(args: argparse.Namespace):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        token = await get_token(client, args.username, args.password)
+        headers = {"Authorization": f"Bearer {token}"}
+        path = "/llm/chat/stream" if args.stream else "/llm/chat"
+        
+        latencies: List[float] = []
+        first_byte: List[float] = []
+        statuses: Counter = Counter()
+        semaphore = asyncio.Semaphore(args.concurrency)
+        
+        async def one(i: int):
+            prompt = args.prompt if args.same_prompt else f"{args.prompt} #{i}"
+            payload = {"prompt": prompt, "max_tokens": args.max_tokens, "temperature": args.temperature}
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    async with client.stream("POST", path, json=payload, headers=headers) as response:
+                        received_first = False
+                        async for _ in response.aiter_bytes():
+                            if not received_first:
+                                received_first = True
+                                first_byte.append(time.perf_counter() - started)
+                        statuses[response.status_code] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - started)
+                
+        started = time.perf_counter()
+        await asyncio.gather(*[one(i) for i in range(args.requests)])
+        elapsed = time.perf_counter() - started
+        
+    latencies.sort()
+    first_byte.sort()
+    print(f"requests: {args.requests}  concurrency: {args.concurrency}  path: {path}")
+    print(f"elapsed: {elapsed:.2f}s  throughput: {args.requests / elapsed:.1f} req/s")
+    print(f"status: {dict(statuses)}")
+    for label, values in (("latency", latencies), ("ttfb", first_byte)):
+        print(
+            f"{label:8} p50={percentile(values, 0.50) * 1000:.0f}ms "
+            f"p90={percentile(values, 0.90) * 1000:.0f}ms "
+            f"p99={percentile(values, 0.99) * 1000:.0f}ms "
+            f"max={(values[-1] if values else 0) * 1000:.0f}ms"
+        )
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="/llmルーターの負荷試験")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", default="loadtest")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--prompt", default="Hello")
+    parser.add_argument("--same-prompt", action="store_true", help="全リクエストで同じプロンプトを使用する（キャッシュ・集約の効果測定用）")
+    parser.add_argument("--max-tokens", type=int, default=64)
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--stream", action="store_true", help="/llm/chat/streamを使用する")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
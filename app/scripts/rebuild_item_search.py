@@ -0,0 +1,25 @@
+"""
+アイテムの全文検索インデックスの再構築スクリプト
+
+検索インデックス（items_fts）と同期用のトリガーを作成し、itemsテーブルの
+現在の内容からインデックスを再構築します。全文検索の導入前から存在する
+データベースや、インデックスとitemsテーブルの内容がずれた場合に実行します。
+
+使用例:
+    python app/scripts/rebuild_item_search.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.database import engine
+from app.utils.item_search import ensure_search_index, rebuild_search_index
+
+def rebuild():
+    ensure_search_index(engine)
+    rebuild_search_index(engine)
+    print("Item search index rebuilt.")
+
+if __name__ == "__main__":
+    rebuild()
@@ -8,15 +8,21 @@ from datetime import datetime, timedelta
 from typing import Optional
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+import os
+import uuid
 import logging
 
 from app.schemas.user import TokenData
+from app.utils.token_cache import verified_token_cache
+from app.utils.token_revocation import revocation_list
 
 logger = logging.getLogger("app")
 
 SECRET_KEY = "YOUR_SECRET_KEY_HERE"  # Should be stored in environment variables in production
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# 有効期限の判定に許容するサーバー間の時計のずれ（秒）
+JWT_LEEWAY_SECONDS = int(os.environ.get("JWT_LEEWAY_SECONDS", "0"))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -67,7 +73,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # jtiはトークンを個別に失効させるために使用する
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -76,6 +83,9 @@ def verify_token(token: str, credentials_exception):
     JWTトークン検証関数
     
     JWTトークンを検証し、含まれるユーザー名を取得します。
+    検証に成功したトークンのクレームはverified_token_cacheに保持され、
+    有効期限までの2回目以降の提示では署名の検証を省略します。
+    失効リストに含まれるトークンは、キャッシュの有無に関わらず拒否されます。
     
     Args:
         token: 検証するJWTトークン
@@ -85,15 +95,22 @@ def verify_token(token: str, credentials_exception):
         TokenData: トークンから取得したユーザーデータ
         
     Raises:
-        credentials_exception: トークンが無効または期限切れの場合
+        credentials_exception: トークンが無効、期限切れ、または失効している場合
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
+    payload = verified_token_cache.get(token, leeway=JWT_LEEWAY_SECONDS)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"leeway": JWT_LEEWAY_SECONDS})
+        except JWTError as e:
+            logger.warning(f"JWT verification failed: {e}")
             raise credentials_exception
-        token_data = TokenData(username=username)
-        return token_data
-    except JWTError as e:
-        logger.warning(f"JWT verification failed: {e}")
+        verified_token_cache.set(token, payload)
+        
+    username = payload.get("sub")
+    if username is None:
+        raise credentials_exception
+    if revocation_list.is_revoked(payload.get("jti")):
+        logger.warning(f"Revoked token presented for user {username}")
         raise credentials_exception
+    token_data = TokenData(username=username, jti=payload.get("jti"), exp=payload.get("exp"))
+    return token_data
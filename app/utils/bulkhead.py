@@ -0,0 +1,190 @@
+"""
+バルクヘッド（同時実行数制限）ユーティリティ
+
+このモジュールは上流のOpenAI API呼び出しの同時実行数を制限する機能を提供します。
+同時実行数の上限を超えたリクエストは上限付きの待機キューで順番を待ち、
+キューが満杯の場合や待機時間がタイムアウトした場合は拒否されます。
+ユーザーごとの同時実行数にも上限を設け、特定のユーザーが枠を占有しないようにします。
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Hashable, Tuple
+
+logger = logging.getLogger("app")
+
+LLM_MAX_CONCURRENT = int(os.environ.get("LLM_MAX_CONCURRENT", "16"))
+LLM_MAX_QUEUE = int(os.environ.get("LLM_MAX_QUEUE", "64"))
+LLM_QUEUE_TIMEOUT = float(os.environ.get("LLM_QUEUE_TIMEOUT", "10"))
+LLM_PER_USER_MAX_CONCURRENT = int(os.environ.get("LLM_PER_USER_MAX_CONCURRENT", "4"))
+LLM_RETRY_AFTER_SECONDS = int(os.environ.get("LLM_RETRY_AFTER_SECONDS", "5"))
+
+class BulkheadRejected(Exception):
+    """
+    バルクヘッドによりリクエストが拒否されたことを示す例外
+    
+    Attributes:
+        reason: 拒否理由（"queue_full" または "queue_timeout"）
+        retry_after: クライアントが再試行するまでの推奨待機秒数
+    """
+    
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"LLM request rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class Bulkhead:
+    """
+    バルクヘッド
+    
+    プロセス内の同時実行数と、ユーザーごとの同時実行数を制限します。
+    空きがない場合は到着順の待機キューに入り、枠が解放されると
+    ユーザーごとの上限に達していない先頭の待機者から順に枠が割り当てられます。
+    """
+    
+    def __init__(
+        self,
+        max_concurrent: int = LLM_MAX_CONCURRENT,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+        per_user_max: int = LLM_PER_USER_MAX_CONCURRENT,
+        retry_after: int = LLM_RETRY_AFTER_SECONDS
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_user_max = per_user_max
+        self.retry_after = retry_after
+        self._active = 0
+        self._active_by_user: Dict[Hashable, int] = {}
+        self._waiters: Deque[Tuple[Hashable, asyncio.Future]] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        
+    async def acquire(self, user_id: Hashable):
+        """
+        実行枠を取得する
+        
+        空きがあれば即座に取得し、なければ待機キューで枠が割り当てられるのを待ちます。
+        
+        Args:
+            user_id: 枠を要求するユーザーのID
+            
+        Raises:
+            BulkheadRejected: 待機キューが満杯の場合、または待機がタイムアウトした場合
+        """
+        # 割り当て可能な待機者は解放時に必ず割り当て済みのため、空きがあれば即座に取得できる
+        if self._has_capacity(user_id):
+            self._grant(user_id)
+            return
+            
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            logger.warning(f"LLM bulkhead queue full, rejecting request from user {user_id}")
+            raise BulkheadRejected("queue_full", self.retry_after)
+            
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (user_id, waiter)
+        self._waiters.append(entry)
+        self.queued += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # タイムアウトと同時に枠が割り当てられた場合は返却する
+                self.release(user_id)
+            else:
+                waiter.cancel()
+                self._waiters.remove(entry)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected_timeout += 1
+                logger.warning(f"LLM bulkhead queue timeout for user {user_id}")
+                raise BulkheadRejected("queue_timeout", self.retry_after)
+            raise
+        finally:
+            waited = time.monotonic() - started
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            
+    def release(self, user_id: Hashable):
+        """
+        実行枠を解放し、待機中のリクエストに割り当てる
+        
+        Args:
+            user_id: 枠を保持していたユーザーのID
+        """
+        self._active -= 1
+        remaining = self._active_by_user.get(user_id, 1) - 1
+        if remaining > 0:
+            self._active_by_user[user_id] = remaining
+        else:
+            self._active_by_user.pop(user_id, None)
+        self._wake_waiters()
+        
+    @asynccontextmanager
+    async def slot(self, user_id: Hashable):
+        """
+        実行枠を保持するコンテキストマネージャ
+        
+        Args:
+            user_id: 枠を要求するユーザーのID
+        """
+        await self.acquire(user_id)
+        try:
+            yield
+        finally:
+            self.release(user_id)
+            
+    def stats(self) -> Dict[str, Any]:
+        """
+        バルクヘッドの統計情報を取得する
+        
+        Returns:
+            Dict[str, Any]: 実行中の数、キューの深さ、待機時間、拒否数などの統計情報
+        """
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "per_user_max": self.per_user_max,
+            "active": self._active,
+            "queue_depth": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_wait_seconds": self.total_wait_seconds / self.queued if self.queued else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
+        
+    def _has_capacity(self, user_id: Hashable) -> bool:
+        return (
+            self._active < self.max_concurrent
+            and self._active_by_user.get(user_id, 0) < self.per_user_max
+        )
+        
+    def _grant(self, user_id: Hashable):
+        self._active += 1
+        self._active_by_user[user_id] = self._active_by_user.get(user_id, 0) + 1
+        self.admitted += 1
+        
+    def _wake_waiters(self):
+        for entry in list(self._waiters):
+            if self._active >= self.max_concurrent:
+                break
+            user_id, waiter = entry
+            if waiter.done():
+                continue
+            if self._active_by_user.get(user_id, 0) < self.per_user_max:
+                self._waiters.remove(entry)
+                self._grant(user_id)
+                waiter.set_result(None)
+
+llm_bulkhead = Bulkhead()
@@ -0,0 +1,241 @@
+"""
+会話履歴ユーティリティ
+
+このモジュールは会話履歴の保存と、OpenAI APIに送信するプロンプトのコンテキスト組み立てを
+サーバー側で行う機能を提供します。メッセージは追記のみで(conversation_id, seq)の
+インデックスに沿って保存され、プロンプトには最新のメッセージから逆順に
+トークン数の上限まで含めます。上限から外れた古いメッセージは破棄（sliding）するか、
+要約（summary）して会話に保存し、以降のリクエストで再利用します。
+"""
+import os
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models.conversation import Conversation, ConversationMessage
+from app.prompts.chat_prompt import CONVERSATION_SUMMARY_PROMPT, get_conversation_prompt, get_summary_prompt
+from app.utils.tokens import (
+    LLM_CONTEXT_TOKENS, TOKENS_PER_MESSAGE, TokenLimitExceeded,
+    count_message_tokens, count_tokens, preflight_prompt, truncate_to_tokens
+)
+
+logger = logging.getLogger("app")
+
+# プロンプトに含める履歴メッセージ数の上限（トークン数の上限とは別に適用）
+LLM_CONVERSATION_MAX_MESSAGES = int(os.environ.get("LLM_CONVERSATION_MAX_MESSAGES", "50"))
+# 要約の生成に使用する最大トークン数（summary戦略ではこの分をコンテキストに確保する）
+LLM_CONVERSATION_SUMMARY_TOKENS = int(os.environ.get("LLM_CONVERSATION_SUMMARY_TOKENS", "512"))
+# 1回の要約で読み込む古いメッセージ数の上限
+LLM_CONVERSATION_SUMMARY_BATCH = int(os.environ.get("LLM_CONVERSATION_SUMMARY_BATCH", "200"))
+
+STRATEGY_SLIDING = "sliding"
+STRATEGY_SUMMARY = "summary"
+
+class ConversationConflict(Exception):
+    """
+    同じ会話に対する同時書き込みにより、メッセージを追記できなかったことを示す例外
+    
+    Attributes:
+        conversation_id: 会話ID
+    """
+    
+    def __init__(self, conversation_id: int):
+        super().__init__(f"Conversation {conversation_id} was modified concurrently")
+        self.conversation_id = conversation_id
+
+def get_conversation(db: Session, conversation_id: int, owner_id: int) -> Optional[Conversation]:
+    """
+    ユーザーが所有する会話を取得する
+    
+    Args:
+        db: データベースセッション
+        conversation_id: 会話ID
+        owner_id: 所有者のユーザーID
+        
+    Returns:
+        Optional[Conversation]: 会話、存在しないか他のユーザーの会話の場合はNone
+    """
+    return db.query(Conversation).filter(
+        Conversation.id == conversation_id,
+        Conversation.owner_id == owner_id
+    ).first()
+
+def _message_tokens(row: ConversationMessage) -> int:
+    return TOKENS_PER_MESSAGE + count_tokens(row.role) + row.tokens
+
+def _recent_messages(db: Session, conversation: Conversation, after_seq: int, budget: int) -> List[ConversationMessage]:
+    # (conversation_id, seq)のインデックスを逆順に走査し、上限に達した時点で打ち切る
+    rows = db.query(ConversationMessage).filter(
+        ConversationMessage.conversation_id == conversation.id,
+        ConversationMessage.seq > after_seq
+    ).order_by(ConversationMessage.seq.desc()).limit(LLM_CONVERSATION_MAX_MESSAGES)
+    
+    window = []
+    used = 0
+    for row in rows:
+        tokens = _message_tokens(row)
+        if used + tokens > budget:
+            break
+        used += tokens
+        window.append(row)
+    window.reverse()
+    return window
+
+async def _summarize(
+    db: Session,
+    conversation: Conversation,
+    upto_seq: int,
+    summarize: Callable[[List[Dict[str, str]], int], Awaitable[str]]
+):
+    rows = await run_in_threadpool(
+        db.query(ConversationMessage).filter(
+            ConversationMessage.conversation_id == conversation.id,
+            ConversationMessage.seq > conversation.summary_upto_seq,
+            ConversationMessage.seq <= upto_seq
+        ).order_by(ConversationMessage.seq.desc()).limit(LLM_CONVERSATION_SUMMARY_BATCH).all
+    )
+    
+    # 要約対象が長すぎる場合は新しいメッセージを優先して残す
+    overhead = count_message_tokens(get_summary_prompt("", conversation.summary))
+    budget = LLM_CONTEXT_TOKENS - LLM_CONVERSATION_SUMMARY_TOKENS - overhead
+    lines = []
+    for row in rows:
+        line = f"{row.role}: {row.content}"
+        tokens = count_tokens(line) + 1
+        if tokens > budget:
+            break
+        budget -= tokens
+        lines.append(line)
+    lines.reverse()
+    transcript = "\n".join(lines)
+    
+    messages = get_summary_prompt(transcript, conversation.summary)
+    summary = await summarize(messages, count_message_tokens(messages))
+    
+    conversation.summary = truncate_to_tokens(summary.strip(), LLM_CONVERSATION_SUMMARY_TOKENS)
+    conversation.summary_upto_seq = upto_seq
+    await run_in_threadpool(_commit_and_refresh, db, conversation)
+    logger.info(f"Summarized conversation {conversation.id} up to seq {upto_seq} ({len(lines)} messages)")
+
+def _commit_and_refresh(db: Session, conversation: Conversation):
+    # コミットで期限切れになった属性をイベントループ上で遅延読み込みしないよう、続けて再読み込みする
+    db.commit()
+    db.refresh(conversation)
+
+async def build_context(
+    db: Session,
+    conversation: Conversation,
+    prompt: str,
+    max_tokens: Optional[int],
+    strategy: str = STRATEGY_SLIDING,
+    summarize: Callable[[List[Dict[str, str]], int], Awaitable[str]] = None
+) -> Dict[str, Any]:
+    """
+    会話履歴を含むプロンプトを組み立てる
+    
+    新しいプロンプトと生成する最大トークン数を除いた残りのコンテキスト長に収まる範囲で、
+    最新のメッセージから逆順に履歴を含めます。summary戦略では、コンテキストから外れた
+    未要約のメッセージをsummarizeで要約して会話に保存し、プロンプトの先頭に含めます。
+    データベースへのアクセスはスレッドプールで実行します。
+    
+    Args:
+        db: データベースセッション
+        conversation: 会話
+        prompt: 新しいユーザー入力
+        max_tokens: 生成する最大トークン数
+        strategy: 古いメッセージの扱い（sliding / summary）
+        summarize: 要約用のメッセージリストとトークン数を受け取り、要約文を返すコルーチン関数
+        
+    Returns:
+        Dict[str, Any]: メッセージリスト（messages）、そのトークン数（prompt_tokens）、
+        含めた履歴メッセージ数（context_messages）、要約を含めたかどうか（summarized）
+        
+    Raises:
+        TokenLimitExceeded: 新しいプロンプトだけでコンテキスト長を超える場合
+    """
+    prompt, base_tokens = preflight_prompt(prompt, max_tokens)
+    budget = LLM_CONTEXT_TOKENS - (max_tokens or 0) - base_tokens
+    
+    use_summary = strategy == STRATEGY_SUMMARY and summarize is not None
+    if use_summary:
+        budget -= (
+            TOKENS_PER_MESSAGE + count_tokens("system")
+            + count_tokens(CONVERSATION_SUMMARY_PROMPT.format(summary=""))
+            + LLM_CONVERSATION_SUMMARY_TOKENS
+        )
+        if budget < 0:
+            raise TokenLimitExceeded(base_tokens, base_tokens + budget)
+            
+    after_seq = conversation.summary_upto_seq if use_summary else 0
+    window = await run_in_threadpool(_recent_messages, db, conversation, after_seq, max(budget, 0))
+    window_start = window[0].seq if window else conversation.message_count + 1
+    
+    if use_summary and window_start - 1 > conversation.summary_upto_seq:
+        await _summarize(db, conversation, window_start - 1, summarize)
+        
+    summary = conversation.summary if use_summary else None
+    history = [{"role": row.role, "content": row.content} for row in window]
+    messages = get_conversation_prompt(history, prompt, summary)
+    return {
+        "messages": messages,
+        "prompt_tokens": count_message_tokens(messages),
+        "context_messages": len(window),
+        "summarized": bool(summary),
+    }
+
+def append_exchange(
+    db: Session,
+    conversation: Conversation,
+    prompt: str,
+    reply: str,
+    reply_tokens: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    ユーザーの入力とAIの応答を会話に追記する
+    
+    会話のメッセージ数を条件付きで更新することで、同じ会話への同時書き込みを検出し、
+    2件のメッセージと会話の更新を1つのトランザクションで行います。
+    データベースにアクセスするため、非同期処理からはスレッドプールで呼び出してください。
+    
+    Args:
+        db: データベースセッション
+        conversation: 会話
+        prompt: ユーザーの入力
+        reply: AIの応答
+        reply_tokens: 応答のトークン数（Noneの場合はローカルで計算）
+        
+    Returns:
+        Tuple[int, int]: ユーザーメッセージとAI応答メッセージのseq
+        
+    Raises:
+        ConversationConflict: 会話が同時に更新された場合
+    """
+    expected = conversation.message_count
+    now = datetime.utcnow()
+    result = db.execute(
+        update(Conversation)
+        .where(Conversation.id == conversation.id, Conversation.message_count == expected)
+        .values(message_count=expected + 2, updated_at=now)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        logger.warning(f"Concurrent write detected on conversation {conversation.id}")
+        raise ConversationConflict(conversation.id)
+        
+    user_seq, assistant_seq = expected + 1, expected + 2
+    db.add_all([
+        ConversationMessage(
+            conversation_id=conversation.id, seq=user_seq, role="user",
+            content=prompt, tokens=count_tokens(prompt), created_at=now
+        ),
+        ConversationMessage(
+            conversation_id=conversation.id, seq=assistant_seq, role="assistant",
+            content=reply, tokens=reply_tokens if reply_tokens is not None else count_tokens(reply), created_at=now
+        ),
+    ])
+    db.commit()
+    db.refresh(conversation)
+    return user_seq, assistant_seq
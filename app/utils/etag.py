@@ -0,0 +1,89 @@
+"""
+ETagユーティリティ
+
+このモジュールはアイテムの弱いETagの生成と、If-None-Match / If-Matchヘッダーとの
+照合を提供します。単一のアイテムのETagは行のバージョンから、一覧のETagは
+ユーザーのアイテム全体のバージョンとクエリ文字列から生成するため、
+レスポンス本文をシリアライズせずに変更の有無を判定できます。
+"""
+import re
+import hashlib
+from typing import List, Optional
+
+def item_etag(item_id: int, version: int) -> str:
+    """
+    単一のアイテムのETagを生成する
+    
+    Args:
+        item_id: アイテムID
+        version: アイテムのバージョン
+        
+    Returns:
+        str: 弱いETag
+    """
+    return f'W/"{item_id}-{version}"'
+
+def collection_etag(owner_id: int, version: int, query: str) -> str:
+    """
+    アイテム一覧のETagを生成する
+    
+    同じバージョンでも絞り込み条件やページが異なれば内容が異なるため、
+    クエリ文字列をETagに含めます。
+    
+    Args:
+        owner_id: アイテムの所有者のユーザーID
+        version: ユーザーのアイテム全体のバージョン
+        query: リクエストのクエリ文字列
+        
+    Returns:
+        str: 弱いETag
+    """
+    digest = hashlib.sha256(f"{owner_id}:{query}".encode("utf-8")).hexdigest()[:16]
+    return f'W/"c{version}-{digest}"'
+
+def _opaque(etag: str) -> str:
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match / If-MatchヘッダーにETagが含まれるかを判定する
+    
+    弱い比較（W/の有無を無視した比較）を行います。
+    
+    Args:
+        header: ヘッダーの値（カンマ区切りのETagのリスト、または*）
+        etag: 現在のETag
+        
+    Returns:
+        bool: ヘッダーが*であるか、いずれかのETagが一致する場合はTrue
+    """
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(candidate) for candidate in header.split(",")}
+
+def matching_versions(header: Optional[str], item_id: int) -> Optional[List[int]]:
+    """
+    If-MatchヘッダーからアイテムのETagに対応するバージョンを取り出す
+    
+    更新・削除の条件にバージョンを含めることで、ETagの照合と書き込みを1つの文で行えます。
+    
+    Args:
+        header: If-Matchヘッダーの値
+        item_id: 書き込み対象のアイテムID
+        
+    Returns:
+        Optional[List[int]]: 一致を許すバージョンのリスト（空の場合はどのバージョンとも一致しない）。
+        ヘッダーがない場合や*の場合は条件がないことを表すNone
+    """
+    if not header or header.strip() == "*":
+        return None
+    pattern = re.compile(rf'"{item_id}-(\d+)"')
+    versions = []
+    for candidate in header.split(","):
+        matched = pattern.fullmatch(_opaque(candidate))
+        if matched:
+            versions.append(int(matched.group(1)))
+    return versions
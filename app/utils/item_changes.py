@@ -0,0 +1,320 @@
+"""
+アイテム変更履歴（チェンジフィード）ユーティリティ
+
+このモジュールはアイテムの作成・更新・削除を追記専用のitem_changesテーブルに記録し、
+クライアントが前回取得した連番以降の差分のみを取得できるようにする機能を提供します。
+履歴はitemsテーブルのトリガーで追記されるため、単体のエンドポイントだけでなく
+一括操作やインポートによる変更も漏れなく記録されます。
+
+新しい変更がない場合はロングポーリングで待機します。同じプロセス内の書き込みは
+通知で即座に待機者を起こし、他のプロセスによる書き込みは一定間隔の再確認で検出します。
+保持期間を過ぎた履歴は定期的に削除され、削除済みの範囲を要求したクライアントには
+全件の再取得を求めます。
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+from sqlalchemy import and_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.models.item import Item
+from app.models.item_change import ItemChange
+
+logger = logging.getLogger("app")
+
+ITEM_CHANGES_RETENTION_SECONDS = int(os.environ.get("ITEM_CHANGES_RETENTION_SECONDS", str(7 * 24 * 3600)))
+ITEM_CHANGES_COMPACT_INTERVAL_SECONDS = float(os.environ.get("ITEM_CHANGES_COMPACT_INTERVAL_SECONDS", "3600"))
+ITEM_CHANGES_POLL_INTERVAL_SECONDS = float(os.environ.get("ITEM_CHANGES_POLL_INTERVAL_SECONDS", "2"))
+ITEM_CHANGES_MAX_WAIT_SECONDS = int(os.environ.get("ITEM_CHANGES_MAX_WAIT_SECONDS", "30"))
+
+_TRIGGER_NAMES = ("item_changes_after_insert", "item_changes_after_delete", "item_changes_after_update")
+
+_TRIGGER_STATEMENTS = (
+    """
+    CREATE TRIGGER item_changes_after_insert AFTER INSERT ON items WHEN new.owner_id IS NOT NULL BEGIN
+        INSERT INTO item_changes (owner_id, item_id, operation, version, changed_at)
+        VALUES (new.owner_id, new.id, 'create', new.version, datetime('now'));
+    END
+    """,
+    """
+    CREATE TRIGGER item_changes_after_delete AFTER DELETE ON items WHEN old.owner_id IS NOT NULL BEGIN
+        INSERT INTO item_changes (owner_id, item_id, operation, version, changed_at)
+        VALUES (old.owner_id, old.id, 'delete', old.version, datetime('now'));
+    END
+    """,
+    """
+    CREATE TRIGGER item_changes_after_update AFTER UPDATE ON items WHEN new.owner_id IS NOT NULL BEGIN
+        INSERT INTO item_changes (owner_id, item_id, operation, version, changed_at)
+        VALUES (new.owner_id, new.id, 'update', new.version, datetime('now'));
+    END
+    """,
+)
+
+class ChangesCompacted(Exception):
+    """
+    要求された連番以降の履歴の一部が保持期間を過ぎて削除されていることを示す例外
+    
+    Attributes:
+        oldest_seq: 取得可能な最も古い連番の直前の値（sinceにこれ以上の値を指定できる）
+    """
+    
+    def __init__(self, oldest_seq: int):
+        super().__init__(f"Changes up to seq {oldest_seq} have been compacted")
+        self.oldest_seq = oldest_seq
+
+class ChangesSinceAhead(Exception):
+    """
+    要求された連番がこれまでに採番された最大の連番より大きいことを示す例外
+    
+    データベースを作り直した後の古い連番などを指定された場合で、そのまま受け付けると
+    その連番までの変更が返されなくなります。
+    
+    Attributes:
+        head_seq: これまでに採番された最大の連番
+    """
+    
+    def __init__(self, head_seq: int):
+        super().__init__(f"Requested seq is ahead of the current head seq {head_seq}")
+        self.head_seq = head_seq
+
+def ensure_change_log(engine: Engine):
+    """
+    変更履歴を追記するトリガーを作成する
+    
+    トリガーの定義の変更を反映するため、起動のたびに作り直します。
+    
+    Args:
+        engine: データベースエンジン
+    """
+    with engine.begin() as connection:
+        for name in _TRIGGER_NAMES:
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        for statement in _TRIGGER_STATEMENTS:
+            connection.execute(text(statement))
+
+def get_head_seq(db: Session) -> int:
+    """
+    これまでに採番された最大の連番を取得する
+    
+    全件を取得した直後のクライアントは、この値をsinceとして以降の差分を取得します。
+    
+    Args:
+        db: データベースセッション
+        
+    Returns:
+        int: 最大の連番（変更がまだない場合は0）
+    """
+    seq = db.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'item_changes'")).scalar()
+    return seq or 0
+
+def _compacted_seq(db: Session) -> int:
+    # 連番は欠番なく採番されるため、残っている最小の連番より前はすべて削除済み
+    oldest = db.execute(text("SELECT min(seq) FROM item_changes")).scalar()
+    if oldest is None:
+        return get_head_seq(db)
+    return oldest - 1
+
+def fetch_changes(db: Session, owner_id: int, since: int, limit: int) -> List[Dict[str, Any]]:
+    """
+    指定した連番より後の変更を取得する
+    
+    作成・更新の変更には、アイテムの現在の内容を付加します（取得時点で削除されている場合はNone）。
+    同じアイテムに複数の変更がある場合、いずれにも最新の内容が付加されるため、
+    クライアントは連番の順に適用すれば最新の状態になります。
+    
+    Args:
+        db: データベースセッション
+        owner_id: アイテムの所有者のユーザーID
+        since: 前回取得した最後の連番
+        limit: 取得する最大件数
+        
+    Returns:
+        List[Dict[str, Any]]: 連番の昇順の変更のリスト
+        
+    Raises:
+        ChangesCompacted: sinceより後の履歴の一部が削除されている場合
+        ChangesSinceAhead: sinceが最大の連番より大きい場合
+    """
+    compacted = _compacted_seq(db)
+    if since < compacted:
+        raise ChangesCompacted(compacted)
+    head = get_head_seq(db)
+    if since > head:
+        raise ChangesSinceAhead(head)
+        
+    rows = db.query(ItemChange, Item).outerjoin(
+        Item, and_(Item.id == ItemChange.item_id, Item.owner_id == ItemChange.owner_id)
+    ).filter(
+        ItemChange.owner_id == owner_id, ItemChange.seq > since
+    ).order_by(ItemChange.seq).limit(limit).all()
+    return [
+        {
+            "seq": change.seq,
+            "item_id": change.item_id,
+            "operation": change.operation,
+            "version": change.version,
+            "changed_at": change.changed_at,
+            "item": item if change.operation != "delete" else None,
+        }
+        for change, item in rows
+    ]
+
+def compact_changes(engine: Engine, retention_seconds: int = ITEM_CHANGES_RETENTION_SECONDS) -> int:
+    """
+    保持期間を過ぎた変更履歴を削除する
+    
+    Args:
+        engine: データベースエンジン
+        retention_seconds: 履歴の保持期間（秒）
+        
+    Returns:
+        int: 削除した履歴の件数
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+    with engine.begin() as connection:
+        deleted = connection.execute(
+            ItemChange.__table__.delete().where(ItemChange.changed_at < cutoff)
+        ).rowcount
+    if deleted:
+        logger.info(f"Compacted {deleted} item changes older than {cutoff.isoformat()}")
+    return deleted
+
+async def run_compaction(engine: Engine, interval: float = ITEM_CHANGES_COMPACT_INTERVAL_SECONDS):
+    """
+    変更履歴の削除を一定間隔で実行し続ける
+    
+    アプリケーションのライフサイクルでタスクとして起動し、終了時にキャンセルします。
+    
+    Args:
+        engine: データベースエンジン
+        interval: 削除を実行する間隔（秒）
+    """
+    while True:
+        try:
+            await run_in_threadpool(compact_changes, engine)
+        except Exception as e:
+            logger.error(f"Item change compaction failed: {str(e)}")
+        await asyncio.sleep(interval)
+
+class ChangeNotifier:
+    """
+    変更の通知
+    
+    ユーザーごとに変更を待機しているリクエストを保持し、書き込みが確定したときに起こします。
+    書き込みはスレッドプールで実行されるため、通知はイベントループのスレッドに渡して処理します。
+    """
+    
+    def __init__(self):
+        self._waiters: Dict[Hashable, Set[asyncio.Future]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.notified = 0
+        self.woken = 0
+        
+    def subscribe(self, owner_id: Hashable) -> asyncio.Future:
+        """
+        変更の通知を待機するFutureを登録する
+        
+        変更の確認より前に登録することで、確認と待機の間の通知を取りこぼしません。
+        
+        Args:
+            owner_id: 変更を待機するユーザーのID
+            
+        Returns:
+            asyncio.Future: 通知されると完了するFuture
+        """
+        self._loop = asyncio.get_running_loop()
+        waiter = self._loop.create_future()
+        self._waiters.setdefault(owner_id, set()).add(waiter)
+        return waiter
+        
+    def unsubscribe(self, owner_id: Hashable, waiter: asyncio.Future):
+        """
+        待機を終了したFutureの登録を解除する
+        """
+        waiters = self._waiters.get(owner_id)
+        if waiters is not None:
+            waiters.discard(waiter)
+            if not waiters:
+                del self._waiters[owner_id]
+                
+    def notify(self, owner_id: Hashable):
+        """
+        ユーザーのアイテムが変更されたことを通知する
+        
+        任意のスレッドから呼び出せます。
+        
+        Args:
+            owner_id: アイテムが変更されたユーザーのID
+        """
+        loop = self._loop
+        if loop is None or owner_id not in self._waiters:
+            return
+        self.notified += 1
+        loop.call_soon_threadsafe(self._wake, owner_id)
+        
+    def stats(self) -> Dict[str, Any]:
+        """
+        通知の統計情報を取得する
+        
+        Returns:
+            Dict[str, Any]: 待機中のリクエスト数、通知数、起こした待機者の数
+        """
+        return {
+            "waiting": sum(len(waiters) for waiters in self._waiters.values()),
+            "notified": self.notified,
+            "woken": self.woken,
+        }
+        
+    def _wake(self, owner_id: Hashable):
+        for waiter in self._waiters.pop(owner_id, ()):
+            if not waiter.done():
+                waiter.set_result(None)
+                self.woken += 1
+
+item_change_notifier = ChangeNotifier()
+
+def _fetch(owner_id: int, since: int, limit: int) -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        return fetch_changes(db, owner_id, since, limit)
+    finally:
+        db.close()
+
+async def wait_for_changes(owner_id: int, since: int, limit: int, wait: float) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    指定した連番より後の変更を、ない場合は最大wait秒待機して取得する
+    
+    データベースの確認はスレッドプールで行い、待機中はコネクションを保持しません。
+    
+    Args:
+        owner_id: アイテムの所有者のユーザーID
+        since: 前回取得した最後の連番
+        limit: 取得する最大件数
+        wait: 変更がない場合に待機する最大秒数（0の場合は待機しない）
+        
+    Returns:
+        Tuple[List[Dict[str, Any]], int]: 変更のリストと、次回sinceに指定する連番
+        
+    Raises:
+        ChangesCompacted: sinceより後の履歴の一部が削除されている場合
+        ChangesSinceAhead: sinceが最大の連番より大きい場合
+    """
+    deadline = asyncio.get_running_loop().time() + wait
+    while True:
+        waiter = item_change_notifier.subscribe(owner_id)
+        try:
+            changes = await run_in_threadpool(_fetch, owner_id, since, limit)
+            remaining = deadline - asyncio.get_running_loop().time()
+            if changes or remaining <= 0:
+                return changes, changes[-1]["seq"] if changes else since
+            try:
+                await asyncio.wait_for(waiter, timeout=min(remaining, ITEM_CHANGES_POLL_INTERVAL_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            item_change_notifier.unsubscribe(owner_id, waiter)
@@ -0,0 +1,102 @@
+"""
+アイテムのエクスポートユーティリティ
+
+このモジュールはユーザーのアイテムをNDJSONまたはCSV形式で逐次出力する機能を提供します。
+アイテムは(owner_id, id)のインデックスに沿ったキーセット方式で一定件数ずつ読み込まれ、
+読み込んだ分だけをシリアライズして返すため、アイテム数に関わらずメモリ使用量は一定です。
+gzip圧縮も同じく逐次的に行います。
+
+SQLiteは読み込み中のトランザクションがある間は書き込みを待たせるため、各バッチは
+短いトランザクションで読み込み、クライアントへの送信中はロックを保持しません。
+そのため出力はある時点のスナップショットではなく、エクスポート中に作成されたアイテムも
+IDが未出力の範囲であれば含まれます。
+"""
+import io
+import os
+import csv
+import json
+import zlib
+import logging
+from typing import Iterator, List
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+
+from app.database import SessionLocal
+from app.models.item import Item
+
+logger = logging.getLogger("app")
+
+ITEMS_EXPORT_BATCH_SIZE = int(os.environ.get("ITEMS_EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_COLUMNS = ("id", "name", "description", "price", "tax")
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def _serialize_ndjson(rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+def _serialize_csv(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue()
+
+def _read_batch(owner_id: int, after_id: int) -> List[Row]:
+    # バッチごとにセッションを閉じ、読み込みのトランザクションを終了する
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(Item.id, Item.name, Item.description, Item.price, Item.tax)
+            .where(Item.owner_id == owner_id, Item.id > after_id)
+            .order_by(Item.id)
+            .limit(ITEMS_EXPORT_BATCH_SIZE)
+        ).all()
+    finally:
+        db.close()
+
+def iter_export(owner_id: int, export_format: str = "ndjson", compress: bool = False) -> Iterator[bytes]:
+    """
+    ユーザーのアイテムをエクスポート形式で逐次出力する
+    
+    StreamingResponseから直接使用できるよう、リクエストのセッションとは別に
+    バッチごとに専用のデータベースセッションを開き、読み込みが終わった時点で閉じます。
+    
+    Args:
+        owner_id: アイテムの所有者のユーザーID
+        export_format: 出力形式（ndjson / csv）
+        compress: Trueの場合はgzip形式で圧縮して出力する
+        
+    Yields:
+        bytes: ITEMS_EXPORT_BATCH_SIZE件ごとにシリアライズ（と圧縮）したデータ
+    """
+    serialize = _serialize_csv if export_format == "csv" else _serialize_ndjson
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    
+    def encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+        
+    exported = 0
+    if export_format == "csv":
+        yield encode(_serialize_csv([EXPORT_COLUMNS]))
+        
+    last_id = 0
+    while True:
+        rows = _read_batch(owner_id, last_id)
+        if not rows:
+            break
+        exported += len(rows)
+        last_id = rows[-1][0]
+        chunk = encode(serialize(rows))
+        if chunk:
+            yield chunk
+        if len(rows) < ITEMS_EXPORT_BATCH_SIZE:
+            break
+            
+    if compressor:
+        yield compressor.flush()
+    logger.info(f"Exported {exported} items as {export_format} for user ID {owner_id}")
@@ -0,0 +1,384 @@
+"""
+アイテムのインポートユーティリティ
+
+このモジュールはCSVまたはNDJSON形式のアップロードからアイテムを一括で取り込む機能を提供します。
+アップロードは一時ファイルに保存された後、1行ずつ読み込まれ、一定件数ごとに
+ItemBaseでまとめて検証されて1つのトランザクションで挿入されます。
+ジョブの処理済み行数は挿入と同じトランザクションで更新されるため、
+中断されたインポートは同じファイルを再アップロードすることで重複なく再開できます。
+"""
+import os
+import csv
+import json
+import time
+import uuid
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.item import Item
+from app.models.item_import import ItemImportJob
+from app.utils.item_changes import item_change_notifier
+from app.schemas.item import ItemBase
+
+logger = logging.getLogger("app")
+
+ITEMS_IMPORT_BATCH_SIZE = int(os.environ.get("ITEMS_IMPORT_BATCH_SIZE", "1000"))
+ITEMS_IMPORT_MAX_ERRORS = int(os.environ.get("ITEMS_IMPORT_MAX_ERRORS", "1000"))
+# この値以下のサイズのアップロードはリクエスト内で処理し、超える場合はバックグラウンドで処理する
+ITEMS_IMPORT_SYNC_MAX_BYTES = int(os.environ.get("ITEMS_IMPORT_SYNC_MAX_BYTES", str(1024 * 1024)))
+ITEMS_IMPORT_DIR = os.environ.get("ITEMS_IMPORT_DIR", tempfile.gettempdir())
+
+IMPORT_FIELDS = ("name", "description", "price", "tax")
+
+_item_rows = TypeAdapter(List[ItemBase])
+# このプロセスで受け付けてから実行が終わるまでのジョブ（サーバーの再起動で中断されたジョブと区別するため）
+_active_jobs: Set[str] = set()
+_active_jobs_lock = threading.Lock()
+# 再開できるジョブの状態（pending / runningはサーバーの再起動で中断された場合に残る）
+RESUMABLE_STATUSES = ("pending", "running", "failed")
+
+class ImportJobConflict(Exception):
+    """
+    ジョブが再開できない状態であることを示す例外
+    
+    Attributes:
+        job_id: ジョブID
+        status: ジョブの状態
+    """
+    
+    def __init__(self, job_id: str, status: str):
+        super().__init__(f"Import job {job_id} cannot be resumed while {status}")
+        self.job_id = job_id
+        self.status = status
+
+def new_job_id() -> str:
+    """
+    新しいジョブIDを生成する
+    """
+    return uuid.uuid4().hex
+
+def upload_path(job_id: str) -> str:
+    """
+    ジョブのアップロードを保存する一時ファイルのパスを取得する
+    """
+    return os.path.join(ITEMS_IMPORT_DIR, f"item-import-{job_id}.upload")
+
+def spool_path(job_id: str) -> str:
+    """
+    アップロードの受信中に書き込む一時ファイルのパスを取得する
+    
+    受信が完了してからupload_pathに名前を変更するため、受信中のアップロードが
+    処理中のファイルを上書きすることはありません。
+    """
+    return f"{upload_path(job_id)}.{uuid.uuid4().hex}.part"
+
+def _claim(job_id: str, status: str):
+    with _active_jobs_lock:
+        if job_id in _active_jobs:
+            raise ImportJobConflict(job_id, status)
+        _active_jobs.add(job_id)
+
+def release_job(job_id: str):
+    """
+    受け付けたジョブをこのプロセスの実行中のジョブから外す
+    
+    run_importは終了時に自動的に外すため、実行を開始せずに受け付けを取り消す場合にのみ使用します。
+    """
+    with _active_jobs_lock:
+        _active_jobs.discard(job_id)
+
+def claim_new_job() -> str:
+    """
+    新しいジョブIDを生成し、このプロセスで実行するジョブとして確保する
+    
+    Returns:
+        str: ジョブID
+    """
+    job_id = new_job_id()
+    _claim(job_id, "pending")
+    return job_id
+
+def create_job(db: Session, job_id: str, owner_id: int, import_format: str, total_bytes: int) -> ItemImportJob:
+    """
+    インポートジョブを作成する
+    
+    Args:
+        db: データベースセッション
+        job_id: new_job_idで生成したジョブID
+        owner_id: 所有者のユーザーID
+        import_format: アップロードの形式（csv / ndjson）
+        total_bytes: アップロードのバイト数
+        
+    Returns:
+        ItemImportJob: 作成されたジョブ
+    """
+    job = ItemImportJob(id=job_id, owner_id=owner_id, format=import_format, total_bytes=total_bytes)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def claim_job(db: Session, job: ItemImportJob):
+    """
+    再開するジョブを、アップロードを受信する前にこのプロセスで確保する
+    
+    完了したジョブと、このプロセスで受け付け済み（アップロードの受信中、実行待ち、実行中）の
+    ジョブは再開できません。サーバーの再起動で中断されたジョブ（running / pendingのまま残ったもの）は
+    再開できます。状態の変更は再開できる状態であることを条件とする1文の更新で行うため、
+    同時に完了したジョブを再開することはありません。確保したジョブはrun_importの終了時か
+    release_jobで解放されます。
+    
+    Args:
+        db: データベースセッション
+        job: 再開するジョブ
+        
+    Raises:
+        ImportJobConflict: 再開できない場合
+    """
+    _claim(job.id, job.status)
+    try:
+        claimed = db.execute(
+            update(ItemImportJob)
+            .where(ItemImportJob.id == job.id, ItemImportJob.status.in_(RESUMABLE_STATUSES))
+            .values(status="pending", error=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+    except Exception:
+        release_job(job.id)
+        raise
+    if claimed != 1:
+        release_job(job.id)
+        db.refresh(job)
+        raise ImportJobConflict(job.id, job.status)
+    db.refresh(job)
+
+def prepare_resume(db: Session, job: ItemImportJob, total_bytes: int) -> ItemImportJob:
+    """
+    再アップロードされたファイルでジョブを再開する準備をする
+    
+    claim_jobで確保したジョブに対して呼び出します。
+    
+    Args:
+        db: データベースセッション
+        job: 再開するジョブ
+        total_bytes: 再アップロードされたファイルのバイト数
+        
+    Returns:
+        ItemImportJob: 更新されたジョブ
+    """
+    job.status = "pending"
+    job.error = None
+    job.total_bytes = total_bytes
+    db.commit()
+    db.refresh(job)
+    return job
+
+def job_summary(job: ItemImportJob) -> Dict[str, Any]:
+    """
+    ジョブをレスポンス用の辞書に変換する
+    
+    Returns:
+        Dict[str, Any]: 進捗とスループットを含むジョブの情報
+    """
+    return {
+        "id": job.id,
+        "status": job.status,
+        "format": job.format,
+        "progress": min(1.0, job.bytes_processed / job.total_bytes) if job.total_bytes else 0.0,
+        "lines_processed": job.lines_processed,
+        "rows_imported": job.rows_imported,
+        "rows_failed": job.rows_failed,
+        "rows_per_second": job.lines_processed / job.elapsed_seconds if job.elapsed_seconds else 0.0,
+        "errors": json.loads(job.errors) if job.errors else [],
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+def _iter_lines(file: BinaryIO, position: List[int]) -> Iterator[str]:
+    # 読み込んだバイト数をpositionに記録しながら1行ずつ復号する
+    for number, raw in enumerate(file):
+        position[0] += len(raw)
+        text = raw.decode("utf-8", errors="replace")
+        yield text.lstrip("\ufeff") if number == 0 else text
+
+def _iter_csv(file: BinaryIO) -> Iterator[Tuple[int, int, Optional[Dict[str, Any]], Optional[str]]]:
+    position = [0]
+    reader = csv.reader(_iter_lines(file, position))
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [column.strip() for column in header]
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != len(header):
+            yield reader.line_num, position[0], None, f"expected {len(header)} columns, got {len(row)}"
+            continue
+        # 空欄はNoneとして扱い、エクスポートに含まれるidなどの余分な列は無視する
+        record = {
+            column: (value if value != "" else None)
+            for column, value in zip(header, row) if column in IMPORT_FIELDS
+        }
+        yield reader.line_num, position[0], record, None
+
+def _iter_ndjson(file: BinaryIO) -> Iterator[Tuple[int, int, Optional[Dict[str, Any]], Optional[str]]]:
+    position = [0]
+    for line, text in enumerate(_iter_lines(file, position), start=1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as e:
+            yield line, position[0], None, f"invalid JSON: {str(e)}"
+            continue
+        if not isinstance(record, dict):
+            yield line, position[0], None, "expected a JSON object"
+            continue
+        yield line, position[0], record, None
+
+def iter_records(file: BinaryIO, import_format: str) -> Iterator[Tuple[int, int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    アップロードからレコードを1件ずつ読み込む
+    
+    Args:
+        file: バイナリモードで開いたアップロードのファイル
+        import_format: アップロードの形式（csv / ndjson）
+        
+    Yields:
+        Tuple: 行番号、そのレコードまでに読み込んだバイト数、レコードの辞書（解析エラーの場合はNone）、
+        解析エラーの内容（正常な場合はNone）
+    """
+    if import_format == "csv":
+        return _iter_csv(file)
+    return _iter_ndjson(file)
+
+def _format_error(error: Dict[str, Any]) -> str:
+    location = ".".join(str(loc) for loc in error["loc"][1:])
+    return f"{location}: {error['msg']}" if location else error["msg"]
+
+def validate_batch(
+    batch: List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]
+) -> Tuple[List[ItemBase], List[Dict[str, Any]]]:
+    """
+    レコードをまとめてItemBaseで検証する
+    
+    通常はバッチ全体を1回で検証し、エラーがある場合のみエラーのないレコードを
+    再検証します。
+    
+    Args:
+        batch: 行番号、レコード、解析エラーの組のリスト
+        
+    Returns:
+        Tuple[List[ItemBase], List[Dict[str, Any]]]: 有効なアイテムと、行ごとのエラー（line, error）
+    """
+    errors = [{"line": line, "error": error} for line, record, error in batch if error is not None]
+    candidates = [(line, record) for line, record, error in batch if error is None]
+    records = [record for _, record in candidates]
+    try:
+        return _item_rows.validate_python(records), errors
+    except ValidationError as e:
+        invalid: Dict[int, List[str]] = {}
+        for error in e.errors():
+            invalid.setdefault(error["loc"][0], []).append(_format_error(error))
+            
+    for index, messages in invalid.items():
+        errors.append({"line": candidates[index][0], "error": "; ".join(messages)})
+    errors.sort(key=lambda error: error["line"])
+    valid = [record for index, record in enumerate(records) if index not in invalid]
+    return _item_rows.validate_python(valid), errors
+
+def _flush(
+    db: Session,
+    job: ItemImportJob,
+    batch: List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]],
+    position: int,
+    errors: List[Dict[str, Any]],
+    elapsed: float
+):
+    items, batch_errors = validate_batch(batch)
+    if items:
+        db.execute(insert(Item), [{**item.model_dump(), "owner_id": job.owner_id} for item in items])
+    job.lines_processed += len(batch)
+    job.rows_imported += len(items)
+    job.rows_failed += len(batch_errors)
+    job.bytes_processed = position
+    job.elapsed_seconds = elapsed
+    if batch_errors and len(errors) < ITEMS_IMPORT_MAX_ERRORS:
+        errors.extend(batch_errors[:ITEMS_IMPORT_MAX_ERRORS - len(errors)])
+        job.errors = json.dumps(errors, ensure_ascii=False)
+    # アイテムの挿入と処理済み行数の更新を同じトランザクションで確定する
+    db.commit()
+    if items:
+        item_change_notifier.notify(job.owner_id)
+
+def run_import(job_id: str, path: str):
+    """
+    インポートジョブを実行する
+    
+    バックグラウンドタスクまたはスレッドプールから呼び出され、専用のデータベースセッションで
+    アップロードを処理します。再開されたジョブでは処理済みのレコードを読み飛ばします。
+    完了または失敗した時点でアップロードの一時ファイルを削除し、claim_new_job / claim_jobで
+    確保したジョブを解放します。
+    
+    Args:
+        job_id: ジョブID
+        path: アップロードの一時ファイルのパス
+    """
+    db = SessionLocal()
+    started = time.monotonic()
+    try:
+        job = db.get(ItemImportJob, job_id)
+        skip = job.lines_processed
+        elapsed_before = job.elapsed_seconds
+        errors = json.loads(job.errors) if job.errors else []
+        job.status = "running"
+        db.commit()
+        logger.info(f"Import job {job_id} started for user ID {job.owner_id} (skipping {skip} records)")
+        
+        with open(path, "rb") as file:
+            batch = []
+            position = 0
+            for seen, (line, position, record, error) in enumerate(iter_records(file, job.format), start=1):
+                if seen <= skip:
+                    continue
+                batch.append((line, record, error))
+                if len(batch) >= ITEMS_IMPORT_BATCH_SIZE:
+                    _flush(db, job, batch, position, errors, elapsed_before + time.monotonic() - started)
+                    batch = []
+            if batch:
+                _flush(db, job, batch, position, errors, elapsed_before + time.monotonic() - started)
+                
+        job.status = "completed"
+        job.bytes_processed = job.total_bytes
+        job.elapsed_seconds = elapsed_before + time.monotonic() - started
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        logger.info(
+            f"Import job {job_id} completed: {job.rows_imported} imported, {job.rows_failed} failed, "
+            f"{job.lines_processed / job.elapsed_seconds if job.elapsed_seconds else 0.0:.0f} rows/s"
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Import job {job_id} failed: {str(e)}")
+        job = db.get(ItemImportJob, job_id)
+        if job is not None:
+            job.status = "failed"
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.commit()
+    finally:
+        release_job(job_id)
+        db.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,157 @@
+"""
+アイテム一覧の検索条件ユーティリティ
+
+このモジュールはアイテム一覧の絞り込み条件と並び順をSQLに変換する機能を提供します。
+並び順ごとに(owner_id, 並び替えキー, id)の複合インデックスがあり、
+価格の範囲指定や名前の前方一致と組み合わせても、インデックスの範囲走査のみで
+結果を取得できるようにしています。名前の前方一致はLIKEではなく範囲比較に変換するため、
+大文字と小文字は区別されます。
+"""
+import sys
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+from app.models.item import Item
+from app.utils.pagination import InvalidCursor, decode_cursor
+
+SORT_OPTIONS = ("id", "-id", "price", "-price", "name", "-name")
+
+_SORT_COLUMNS = {
+    "id": None,
+    "price": Item.price,
+    "name": Item.name,
+}
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """
+    並び順の指定をキー名と降順かどうかに分解する
+    
+    Args:
+        sort: SORT_OPTIONSのいずれか（先頭の-は降順）
+        
+    Returns:
+        Tuple[str, bool]: キー名と、降順の場合はTrue
+    """
+    return sort.lstrip("-"), sort.startswith("-")
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    """
+    前方一致の範囲検索の上限（この値未満）を求める
+    
+    末尾の最大の文字（U+10FFFF）は次の文字がないため取り除いてから置き換えます。
+    
+    Args:
+        prefix: 空でない接頭辞
+        
+    Returns:
+        Optional[str]: 接頭辞の最後の文字を次の文字に置き換えた文字列、
+        接頭辞がすべてU+10FFFFで上限がない場合はNone
+    """
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return None
+    code = ord(stem[-1]) + 1
+    # サロゲートはUTF-8に符号化できないため、次の文字として飛ばす
+    if 0xD800 <= code <= 0xDFFF:
+        code = 0xE000
+    return stem[:-1] + chr(code)
+
+def apply_item_filters(
+    query: Query,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_tax: Optional[float] = None,
+    max_tax: Optional[float] = None,
+    name_prefix: Optional[str] = None
+) -> Query:
+    """
+    アイテム一覧のクエリに絞り込み条件を追加する
+    
+    範囲はいずれも両端を含みます。
+    
+    Args:
+        query: 所有者で絞り込んだアイテムのクエリ
+        min_price: 価格の下限
+        max_price: 価格の上限
+        min_tax: 税金の下限
+        max_tax: 税金の上限
+        name_prefix: 名前の接頭辞（大文字と小文字を区別）
+        
+    Returns:
+        Query: 条件を追加したクエリ
+    """
+    if min_price is not None:
+        query = query.filter(Item.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Item.price <= max_price)
+    if min_tax is not None:
+        query = query.filter(Item.tax >= min_tax)
+    if max_tax is not None:
+        query = query.filter(Item.tax <= max_tax)
+    if name_prefix:
+        # LIKEは大文字と小文字を区別しないためインデックスを使用できず、範囲比較に変換する
+        query = query.filter(Item.name >= name_prefix)
+        upper_bound = prefix_upper_bound(name_prefix)
+        if upper_bound is not None:
+            query = query.filter(Item.name < upper_bound)
+    return query
+
+def apply_item_sort(query: Query, sort: str, cursor: Optional[str] = None) -> Query:
+    """
+    アイテム一覧のクエリに並び順とカーソル位置を適用する
+    
+    並び替えキーが同じアイテムはIDで順序付けます。カーソルがある場合は
+    (並び替えキー, id)の行値比較で前のページの最後のアイテムより後から取得します。
+    
+    Args:
+        query: 絞り込み済みのアイテムのクエリ
+        sort: SORT_OPTIONSのいずれか
+        cursor: 前のページのカーソル文字列（同じ並び順で生成されたもの）
+        
+    Returns:
+        Query: 並び順とカーソル位置を適用したクエリ
+        
+    Raises:
+        InvalidCursor: カーソルが不正な場合や、並び順が一致しない場合
+    """
+    key, descending = parse_sort(sort)
+    column = _SORT_COLUMNS[key]
+    
+    if cursor is not None:
+        keys = decode_cursor(cursor)
+        if keys.get("sort", "id") != sort:
+            raise InvalidCursor(cursor)
+        try:
+            after_id = int(keys["id"])
+            after_value = keys["value"] if column is not None else None
+        except (KeyError, TypeError, ValueError):
+            raise InvalidCursor(cursor)
+        if column is None:
+            query = query.filter(Item.id < after_id if descending else Item.id > after_id)
+        else:
+            position = tuple_(column, Item.id)
+            after = tuple_(after_value, after_id)
+            query = query.filter(position < after if descending else position > after)
+            
+    order = [Item.id.desc() if descending else Item.id]
+    if column is not None:
+        order.insert(0, column.desc() if descending else column)
+    return query.order_by(*order)
+
+def cursor_keys(item: Item, sort: str) -> Dict[str, Any]:
+    """
+    アイテムの位置を表すカーソルのキーを生成する
+    
+    Args:
+        item: ページの最後のアイテム
+        sort: 使用した並び順
+        
+    Returns:
+        Dict[str, Any]: encode_cursorに渡すキー
+    """
+    key, _ = parse_sort(sort)
+    if _SORT_COLUMNS[key] is None:
+        # ID順の昇順は並び順を省略し、以前のカーソルと互換性を保つ
+        return {"id": item.id} if sort == "id" else {"sort": sort, "id": item.id}
+    return {"sort": sort, "value": getattr(item, key), "id": item.id}
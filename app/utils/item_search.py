@@ -0,0 +1,148 @@
+"""
+アイテムの全文検索ユーティリティ
+
+このモジュールはSQLiteのFTS5を使用したアイテム名と説明の全文検索を提供します。
+検索インデックスはitemsテーブルを外部コンテンツとするFTS5仮想テーブル（items_fts）で、
+itemsへの挿入・更新・削除はトリガーによって自動的に反映されます。
+検索結果はBM25のスコア順に並び、一致箇所を強調したスニペットを含みます。
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("app")
+
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+SNIPPET_ELLIPSIS = "…"
+SNIPPET_TOKENS = 16
+
+# 2文字と3文字の前方一致用インデックスを持たせ、短い接頭辞の検索を高速化する
+_CREATE_STATEMENTS = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+        name, description,
+        content='items', content_rowid='id',
+        prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_after_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_after_delete AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_after_update AFTER UPDATE OF name, description ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO items_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+)
+
+def rebuild_search_index(engine: Engine):
+    """
+    検索インデックスをitemsテーブルの内容から再構築する
+    
+    トリガーを作成する前から存在したアイテムを検索対象に含める場合や、
+    インデックスが破損した場合に使用します。
+    
+    Args:
+        engine: データベースエンジン
+    """
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO items_fts(items_fts) VALUES ('rebuild')"))
+    logger.info("Item search index rebuilt")
+
+def ensure_search_index(engine: Engine):
+    """
+    検索インデックスと同期用のトリガーを作成する
+    
+    既存のデータベースでインデックスを新たに作成した場合は、
+    既存のアイテムを取り込むために再構築します。
+    
+    Args:
+        engine: データベースエンジン
+    """
+    with engine.begin() as connection:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'")
+        ).first() is not None
+        for statement in _CREATE_STATEMENTS:
+            connection.execute(text(statement))
+    if not exists:
+        rebuild_search_index(engine)
+
+def build_match_query(query: str) -> str:
+    """
+    検索文字列をFTS5のMATCH式に変換する
+    
+    空白で区切られた語をすべて含むアイテムを検索します。各語は引用符で囲んで
+    FTS5の演算子として解釈されないようにし、末尾が*の語は前方一致として扱います。
+    
+    Args:
+        query: ユーザーが入力した検索文字列
+        
+    Returns:
+        str: FTS5のMATCH式（検索する語がない場合は空文字列）
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " AND ".join(terms)
+
+def search_items(
+    db: Session,
+    owner_id: int,
+    match: str,
+    limit: int,
+    after: Optional[Tuple[float, int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    ユーザーのアイテムを全文検索する
+    
+    結果はBM25のスコア（小さいほど関連性が高い）、アイテムIDの順に並びます。
+    
+    Args:
+        db: データベースセッション
+        owner_id: アイテムの所有者のユーザーID
+        match: build_match_queryで生成したMATCH式
+        limit: 取得する件数の上限
+        after: 前のページの最後の結果の(スコア, ID)（キーセットページネーション用）
+        
+    Returns:
+        List[Dict[str, Any]]: アイテムの属性に、スコア（rank）とスニペット（snippet）を加えた辞書のリスト
+    """
+    params = {
+        "match": match,
+        "owner_id": owner_id,
+        "limit": limit,
+        "start": SNIPPET_START,
+        "end": SNIPPET_END,
+        "ellipsis": SNIPPET_ELLIPSIS,
+        "tokens": SNIPPET_TOKENS,
+    }
+    seek = ""
+    if after is not None:
+        seek = "AND (bm25(items_fts) > :after_rank OR (bm25(items_fts) = :after_rank AND items.id > :after_id))"
+        params["after_rank"], params["after_id"] = after
+        
+    rows = db.execute(text(f"""
+        SELECT items.id, items.name, items.description, items.price, items.tax, items.version,
+               bm25(items_fts) AS rank,
+               snippet(items_fts, -1, :start, :end, :ellipsis, :tokens) AS snippet
+        FROM items_fts JOIN items ON items.id = items_fts.rowid
+        WHERE items_fts MATCH :match AND items.owner_id = :owner_id {seek}
+        ORDER BY rank, items.id
+        LIMIT :limit
+    """), params)
+    return [dict(row._mapping) for row in rows]
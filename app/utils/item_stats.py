@@ -0,0 +1,196 @@
+"""
+アイテム集計ユーティリティ
+
+このモジュールはユーザーごとのアイテムの件数、合計、平均、価格のヒストグラムを
+求める機能を提供します。件数と合計はトリガーで差分更新されるitem_statsテーブルから
+取得し、最小値・最大値とヒストグラムは(owner_id, price, id)のインデックスを使って
+SQLのGROUP BYで計算します。
+"""
+import logging
+from typing import Any, Dict, List
+from sqlalchemy import Integer, func, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.item import Item
+from app.models.item_stats import ItemStats
+
+logger = logging.getLogger("app")
+
+_TRIGGER_NAMES = ("item_stats_after_insert", "item_stats_after_delete", "item_stats_after_update")
+
+_TRIGGER_STATEMENTS = (
+    """
+    CREATE TRIGGER item_stats_after_insert AFTER INSERT ON items BEGIN
+        INSERT INTO item_stats (owner_id, item_count, price_sum, tax_sum, version)
+        VALUES (new.owner_id, 1, coalesce(new.price, 0), coalesce(new.tax, 0), 1)
+        ON CONFLICT (owner_id) DO UPDATE SET
+            item_count = item_count + 1,
+            price_sum = price_sum + excluded.price_sum,
+            tax_sum = tax_sum + excluded.tax_sum,
+            version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER item_stats_after_delete AFTER DELETE ON items BEGIN
+        UPDATE item_stats SET
+            item_count = item_count - 1,
+            price_sum = price_sum - coalesce(old.price, 0),
+            tax_sum = tax_sum - coalesce(old.tax, 0),
+            version = version + 1
+        WHERE owner_id = old.owner_id;
+    END
+    """,
+    """
+    CREATE TRIGGER item_stats_after_update AFTER UPDATE ON items BEGIN
+        UPDATE item_stats SET
+            item_count = item_count - 1,
+            price_sum = price_sum - coalesce(old.price, 0),
+            tax_sum = tax_sum - coalesce(old.tax, 0),
+            version = version + 1
+        WHERE owner_id = old.owner_id;
+        INSERT INTO item_stats (owner_id, item_count, price_sum, tax_sum, version)
+        VALUES (new.owner_id, 1, coalesce(new.price, 0), coalesce(new.tax, 0), 1)
+        ON CONFLICT (owner_id) DO UPDATE SET
+            item_count = item_count + 1,
+            price_sum = price_sum + excluded.price_sum,
+            tax_sum = tax_sum + excluded.tax_sum,
+            version = version + 1;
+    END
+    """,
+)
+
+def rebuild_item_stats(engine: Engine):
+    """
+    集計テーブルをitemsテーブルの内容から再計算する
+    
+    差分更新による浮動小数点の誤差が蓄積した場合にも使用できます。
+    バージョンは引き継いで増加させるため、再計算の前に発行されたETagは一致しなくなります。
+    
+    Args:
+        engine: データベースエンジン
+    """
+    with engine.begin() as connection:
+        connection.execute(text("""
+            UPDATE item_stats SET item_count = 0, price_sum = 0, tax_sum = 0, version = version + 1
+            WHERE owner_id NOT IN (SELECT DISTINCT owner_id FROM items WHERE owner_id IS NOT NULL)
+        """))
+        # SELECTを伴うUPSERTでは構文の曖昧さを避けるためWHEREが必要
+        connection.execute(text("""
+            INSERT INTO item_stats (owner_id, item_count, price_sum, tax_sum, version)
+            SELECT owner_id, count(*), coalesce(sum(price), 0), coalesce(sum(tax), 0), 1
+            FROM items WHERE owner_id IS NOT NULL GROUP BY owner_id
+            ON CONFLICT (owner_id) DO UPDATE SET
+                item_count = excluded.item_count,
+                price_sum = excluded.price_sum,
+                tax_sum = excluded.tax_sum,
+                version = version + 1
+        """))
+    logger.info("Item stats rebuilt")
+
+def ensure_item_stats(engine: Engine):
+    """
+    集計用のトリガーを作成する
+    
+    トリガーの定義の変更を反映するため、起動のたびに作り直します。
+    トリガーが存在しなかった場合は、既存のアイテムから集計テーブルを再計算します。
+    
+    Args:
+        engine: データベースエンジン
+    """
+    with engine.begin() as connection:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'item_stats_after_insert'")
+        ).first() is not None
+        for name in _TRIGGER_NAMES:
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        for statement in _TRIGGER_STATEMENTS:
+            connection.execute(text(statement))
+    if not exists:
+        rebuild_item_stats(engine)
+
+def get_collection_version(db: Session, owner_id: int) -> int:
+    """
+    ユーザーのアイテム全体のバージョンを取得する
+    
+    いずれかのアイテムが作成・更新・削除されるたびに増加します。
+    
+    Args:
+        db: データベースセッション
+        owner_id: アイテムの所有者のユーザーID
+        
+    Returns:
+        int: バージョン（アイテムを作成したことがない場合は0）
+    """
+    version = db.query(ItemStats.version).filter(ItemStats.owner_id == owner_id).scalar()
+    return version or 0
+
+def price_histogram(db: Session, owner_id: int, min_price: float, max_price: float, buckets: int) -> List[Dict[str, Any]]:
+    """
+    価格の等幅ヒストグラムを求める
+    
+    Args:
+        db: データベースセッション
+        owner_id: アイテムの所有者のユーザーID
+        min_price: 価格の最小値（最初の区間の下限）
+        max_price: 価格の最大値（最後の区間の上限）
+        buckets: 区間の数
+        
+    Returns:
+        List[Dict[str, Any]]: 区間ごとの下限（lower）、上限（upper）、アイテム数（count）
+    """
+    width = (max_price - min_price) / buckets
+    if width <= 0:
+        count = db.query(func.count(Item.id)).filter(Item.owner_id == owner_id, Item.price.isnot(None)).scalar()
+        return [{"lower": min_price, "upper": max_price, "count": count}]
+        
+    # 最大値ちょうどのアイテムは最後の区間に含める
+    bucket = func.min(func.cast((Item.price - min_price) / width, Integer), buckets - 1)
+    rows = db.query(bucket.label("bucket"), func.count()).filter(
+        Item.owner_id == owner_id, Item.price.isnot(None)
+    ).group_by("bucket").all()
+    counts = dict(rows)
+    return [
+        {
+            "lower": min_price + width * index,
+            "upper": max_price if index == buckets - 1 else min_price + width * (index + 1),
+            "count": counts.get(index, 0),
+        }
+        for index in range(buckets)
+    ]
+
+def get_item_stats(db: Session, owner_id: int, buckets: int = 0) -> Dict[str, Any]:
+    """
+    ユーザーのアイテムの集計値を取得する
+    
+    Args:
+        db: データベースセッション
+        owner_id: アイテムの所有者のユーザーID
+        buckets: 価格のヒストグラムの区間数（0の場合はヒストグラムを求めない）
+        
+    Returns:
+        Dict[str, Any]: 件数、価格と税金の合計、平均価格、最小・最大価格、ヒストグラム
+    """
+    summary = db.get(ItemStats, owner_id)
+    count = summary.item_count if summary else 0
+    total_price = summary.price_sum if summary else 0.0
+    total_tax = summary.tax_sum if summary else 0.0
+    
+    # 集計関数を1つずつ問い合わせることで、SQLiteがインデックスの端のみを参照する
+    owned = db.query(Item).filter(Item.owner_id == owner_id)
+    min_price = owned.with_entities(func.min(Item.price)).scalar()
+    max_price = owned.with_entities(func.max(Item.price)).scalar()
+    
+    histogram = []
+    if buckets > 0 and min_price is not None:
+        histogram = price_histogram(db, owner_id, min_price, max_price, buckets)
+        
+    return {
+        "count": count,
+        "total_price": total_price,
+        "total_tax": total_tax,
+        "average_price": total_price / count if count else None,
+        "min_price": min_price,
+        "max_price": max_price,
+        "histogram": histogram,
+    }
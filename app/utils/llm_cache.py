@@ -0,0 +1,227 @@
+"""
+AI応答キャッシュユーティリティ
+
+このモジュールは/llm/chatの応答を完全一致でキャッシュする機能を提供します。
+キャッシュキーは正規化されたメッセージ、max_tokens、temperature、モデル名から生成されます。
+メモリ上の件数上限付きLRUキャッシュと、任意のSQLite永続層の2段構成で、
+各エントリはTTLを過ぎると無効になります。永続層へのアクセスは独自のセッションを使用して
+スレッドプールで実行し、イベントループ上ではメモリ層のみを参照します。
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.models.llm_cache import LLMCacheEntry
+
+logger = logging.getLogger("app")
+
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_TTL_SECONDS = float(os.environ.get("LLM_CACHE_TTL_SECONDS", "3600"))
+LLM_CACHE_PERSISTENT = os.environ.get("LLM_CACHE_PERSISTENT", "0") == "1"
+# この値以下のtemperatureのリクエストをキャッシュ対象とする（デフォルトは決定的なリクエストのみ）
+LLM_CACHE_MAX_TEMPERATURE = float(os.environ.get("LLM_CACHE_MAX_TEMPERATURE", "0"))
+
+def make_cache_key(
+    messages: List[Dict[str, str]],
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+    model: str
+) -> str:
+    """
+    キャッシュキーを生成する
+    
+    メッセージのroleとcontent（前後の空白を除去）のみを使用して正規化し、
+    生成パラメータとモデル名を含めたSHA-256ハッシュを返します。
+    
+    Args:
+        messages: メッセージ辞書のリスト（role, contentキーを持つ）
+        max_tokens: 生成する最大トークン数
+        temperature: 応答の多様性を制御するパラメータ
+        model: 使用するモデル名
+        
+    Returns:
+        str: 16進数のキャッシュキー
+    """
+    normalized = [
+        {"role": message["role"], "content": message["content"].strip()}
+        for message in messages
+    ]
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": normalized,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    AI応答キャッシュ
+    
+    メモリ上のLRUキャッシュと任意のSQLite永続層を持つ完全一致キャッシュです。
+    ヒット数、ミス数、バイパス数、追い出し数を記録します。
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        persistent: bool = LLM_CACHE_PERSISTENT,
+        max_temperature: float = LLM_CACHE_MAX_TEMPERATURE,
+        enabled: bool = LLM_CACHE_ENABLED
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self.max_temperature = max_temperature
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+        
+    def is_cacheable(self, temperature: Optional[float]) -> bool:
+        """
+        リクエストがキャッシュ対象かどうかを判定する
+        
+        Args:
+            temperature: リクエストのtemperature
+            
+        Returns:
+            bool: キャッシュ対象の場合はTrue
+        """
+        return self.enabled and (temperature or 0.0) <= self.max_temperature
+        
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュから応答を取得する
+        
+        メモリ層を先に参照し、見つからない場合は永続層をスレッドプールで参照します。
+        永続層でヒットしたエントリはメモリ層に昇格されます。
+        
+        Args:
+            key: make_cache_keyで生成したキー
+            
+        Returns:
+            Optional[Dict[str, Any]]: キャッシュされた応答、存在しない場合はNone
+        """
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            
+        if self.persistent:
+            entry = await run_in_threadpool(_load_persistent, key, now)
+            if entry is not None:
+                value, expires_at = entry
+                self._store(key, value, expires_at)
+                self.persistent_hits += 1
+                return value
+                
+        self.misses += 1
+        return None
+        
+    async def set(self, key: str, value: Dict[str, Any]):
+        """
+        応答をキャッシュに保存する
+        
+        メモリ層に保存し、永続層が有効な場合はスレッドプールで永続層にも保存します。
+        
+        Args:
+            key: make_cache_keyで生成したキー
+            value: 保存する応答
+        """
+        expires_at = time.time() + self.ttl_seconds
+        self._store(key, value, expires_at)
+        
+        if self.persistent:
+            await run_in_threadpool(_save_persistent, key, value, expires_at)
+            
+    def record_bypass(self):
+        """
+        キャッシュをバイパスしたリクエストを記録する
+        """
+        self.bypasses += 1
+        
+    def clear(self):
+        """
+        メモリ層のキャッシュをすべて削除する
+        """
+        self._entries.clear()
+        
+    def stats(self) -> Dict[str, Any]:
+        """
+        キャッシュの統計情報を取得する
+        
+        Returns:
+            Dict[str, Any]: ヒット数、ミス数、ヒット率などの統計情報
+        """
+        lookups = self.hits + self.persistent_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "persistent": self.persistent,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.persistent_hits) / lookups if lookups else 0.0,
+        }
+        
+    def _store(self, key: str, value: Dict[str, Any], expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+response_cache = ResponseCache()
+
+def _load_persistent(key: str, now: float) -> Optional[Tuple[Dict[str, Any], float]]:
+    # 期限切れの行は参照時に削除する
+    db = SessionLocal()
+    try:
+        row = db.query(LLMCacheEntry).filter(LLMCacheEntry.key == key).first()
+        if row is None:
+            return None
+        if row.expires_at > now:
+            return json.loads(row.response), row.expires_at
+        db.delete(row)
+        db.commit()
+        return None
+    finally:
+        db.close()
+
+def _save_persistent(key: str, value: Dict[str, Any], expires_at: float):
+    db = SessionLocal()
+    try:
+        db.merge(LLMCacheEntry(
+            key=key,
+            response=json.dumps(value, ensure_ascii=False),
+            expires_at=expires_at
+        ))
+        db.commit()
+    finally:
+        db.close()
@@ -3,18 +3,62 @@ OpenAI APIクライアントユーティリティ
 
 このモジュールはOpenAI APIとの通信を処理するためのユーティリティ関数を提供します。
 環境変数からAPIキーを取得し、チャット完了APIを使用してAI応答を生成します。
+
+クライアントはAsyncOpenAIを使用し、イベントループをブロックせずにAPIを呼び出します。
+HTTP接続はプロセス内で共有されるコネクションプールを利用し、
+タイムアウトと同時実行数の上限は環境変数で設定できます。
 """
 import os
+import asyncio
 import logging
-from openai import OpenAI
-from typing import Dict, List, Any, Optional
+import httpx
+from openai import AsyncOpenAI
+from typing import AsyncIterator, Dict, List, Any, Optional
+
+from app.utils.resilience import call_with_resilience
 
 logger = logging.getLogger("app")
 
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", ""))
+OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-3.5-turbo")
+# ローカルのスタブサーバー（app/scripts/fake_openai_server.py）などに接続先を切り替える場合に指定する
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL") or None
+OPENAI_CONNECT_TIMEOUT = float(os.environ.get("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_READ_TIMEOUT = float(os.environ.get("OPENAI_READ_TIMEOUT", "60"))
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_MAX_IN_FLIGHT = int(os.environ.get("OPENAI_MAX_IN_FLIGHT", "32"))
+
+http_client = httpx.AsyncClient(
+    timeout=httpx.Timeout(
+        OPENAI_READ_TIMEOUT,
+        connect=OPENAI_CONNECT_TIMEOUT,
+    ),
+    limits=httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    ),
+)
+
+client = AsyncOpenAI(
+    api_key=os.environ.get("OPENAI_API_KEY", ""),
+    base_url=OPENAI_BASE_URL,
+    http_client=http_client,
+    # リトライはcall_with_resilienceで行うため、SDK側のリトライは無効にする
+    max_retries=0,
+)
+
+_in_flight = asyncio.Semaphore(OPENAI_MAX_IN_FLIGHT)
+
+async def close_client():
+    """
+    共有HTTPクライアントを閉じる
+    
+    アプリケーション終了時に呼び出され、コネクションプールを解放します。
+    """
+    await client.close()
 
 async def generate_response(
-    messages: List[Dict[str, str]], 
+    messages: List[Dict[str, str]],
     max_tokens: Optional[int] = 1000,
     temperature: Optional[float] = 0.7
 ) -> Dict[str, Any]:
@@ -23,6 +67,7 @@ async def generate_response(
     
     プロンプトテンプレートから生成されたメッセージリストを使用して、
     OpenAI APIにリクエストを送信し、AIからの応答を取得します。
+    同時に実行されるAPI呼び出しはOPENAI_MAX_IN_FLIGHTまでに制限されます。
     
     Args:
         messages: メッセージ辞書のリスト（role, contentキーを持つ）
@@ -42,12 +87,16 @@ async def generate_response(
             raise ValueError("OpenAI API key not configured")
             
         # OpenAI APIにリクエストを送信
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            max_tokens=max_tokens,
-            temperature=temperature
-        )
+        async def create():
+            async with _in_flight:
+                return await client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
+                
+        response = await call_with_resilience(create)
         
         return {
             "response": response.choices[0].message.content,
@@ -61,3 +110,77 @@ async def generate_response(
     except Exception as e:
         logger.error(f"Error generating OpenAI response: {str(e)}")
         raise
+
+def stream_response(
+    messages: List[Dict[str, str]],
+    max_tokens: Optional[int] = 1000,
+    temperature: Optional[float] = 0.7
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    OpenAI APIのストリーミングモードで応答を生成する
+    
+    生成されたトークンを到着順に返す非同期イテレータを作成します。
+    各要素は"delta"イベント（content）で、最後に"done"イベント
+    （model, usage）が1つ返されます。
+    
+    リトライとサーキットブレーカーは最初の要素を取得する時点で適用され、
+    ストリームを開始できなかった場合はその例外が最初の要素の取得時に送出されます。
+    
+    Args:
+        messages: メッセージ辞書のリスト（role, contentキーを持つ）
+        max_tokens: 生成する最大トークン数（オプション、デフォルト: 1000）
+        temperature: 応答の多様性を制御するパラメータ（オプション、デフォルト: 0.7）
+        
+    Returns:
+        AsyncIterator[Dict[str, Any]]: eventとdataキーを持つ辞書の非同期イテレータ
+        
+    Raises:
+        ValueError: APIキーが設定されていない場合
+    """
+    if not client.api_key or client.api_key == "":
+        logger.error("OpenAI API key not found")
+        raise ValueError("OpenAI API key not configured")
+        
+    return _stream_chunks(messages, max_tokens, temperature)
+
+async def _stream_chunks(
+    messages: List[Dict[str, str]],
+    max_tokens: Optional[int],
+    temperature: Optional[float]
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    ストリーミング応答のチャンクをイベント辞書に変換する
+    
+    ストリームが終了するまで同時実行数の枠を保持します。
+    """
+    try:
+        async with _in_flight:
+            # リトライとサーキットブレーカーはストリームの開始までに適用する
+            stream = await call_with_resilience(
+                lambda: client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+            )
+            
+            model = None
+            usage = None
+            async for chunk in stream:
+                model = chunk.model or model
+                if chunk.usage:
+                    usage = {
+                        "prompt_tokens": chunk.usage.prompt_tokens,
+                        "completion_tokens": chunk.usage.completion_tokens,
+                        "total_tokens": chunk.usage.total_tokens
+                    }
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield {"event": "delta", "data": {"content": chunk.choices[0].delta.content}}
+                    
+        yield {"event": "done", "data": {"model": model, "usage": usage}}
+    except Exception as e:
+        logger.error(f"Error streaming OpenAI response: {str(e)}")
+        raise
@@ -0,0 +1,57 @@
+"""
+カーソルページネーションユーティリティ
+
+このモジュールはキーセット（シーク）方式のページネーションで使用する
+不透明なカーソル文字列の生成と解析を提供します。カーソルには前のページの
+最後の行の並び替えキーが含まれ、次のページはそのキーより後の行から
+インデックスを使って取得されます。OFFSETと異なり、ページの深さに関わらず
+一定の時間で取得できます。
+"""
+import json
+import base64
+import binascii
+from typing import Any, Dict
+
+class InvalidCursor(ValueError):
+    """
+    カーソル文字列が不正であることを示す例外
+    """
+    
+    def __init__(self, cursor: str):
+        super().__init__(f"Invalid cursor: {cursor}")
+        self.cursor = cursor
+
+def encode_cursor(keys: Dict[str, Any]) -> str:
+    """
+    並び替えキーからカーソル文字列を生成する
+    
+    Args:
+        keys: 前のページの最後の行の並び替えキー（JSONに変換可能な値）
+        
+    Returns:
+        str: URLセーフなBase64形式のカーソル文字列
+    """
+    payload = json.dumps(keys, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    カーソル文字列から並び替えキーを取り出す
+    
+    Args:
+        cursor: encode_cursorで生成されたカーソル文字列
+        
+    Returns:
+        Dict[str, Any]: 並び替えキー
+        
+    Raises:
+        InvalidCursor: カーソル文字列が不正な場合
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        keys = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError, binascii.Error):
+        raise InvalidCursor(cursor)
+    if not isinstance(keys, dict):
+        raise InvalidCursor(cursor)
+    return keys
@@ -0,0 +1,160 @@
+"""
+パスワードハッシュ処理のワーカープールユーティリティ
+
+このモジュールはbcryptによるパスワードのハッシュ化と検証を、専用の上限付き
+スレッドプールで実行する機能を提供します。bcryptは1回あたり数百ミリ秒のCPUを使用するため、
+リクエスト処理と同じスレッドプールで実行するとログインが集中したときに
+他の同期エンドポイントが処理されなくなります。
+
+bcryptの計算中はGILが解放されるため、スレッドでも並列に実行されます。
+実行中と待機中の件数の合計が上限に達した場合は、待機させずに即座に拒否します。
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from app.utils.auth import get_password_hash, verify_password
+
+logger = logging.getLogger("app")
+
+AUTH_HASH_WORKERS = int(os.environ.get("AUTH_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+AUTH_HASH_MAX_QUEUE = int(os.environ.get("AUTH_HASH_MAX_QUEUE", "16"))
+AUTH_HASH_RETRY_AFTER_SECONDS = int(os.environ.get("AUTH_HASH_RETRY_AFTER_SECONDS", "2"))
+
+class PasswordPoolSaturated(Exception):
+    """
+    パスワード処理のワーカープールが飽和しているためリクエストが拒否されたことを示す例外
+    
+    Attributes:
+        retry_after: クライアントが再試行するまでの推奨待機秒数
+    """
+    
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing pool is saturated")
+        self.retry_after = retry_after
+
+class PasswordHashingPool:
+    """
+    パスワード処理のワーカープール
+    
+    workers個のスレッドでハッシュ化と検証を実行し、空きを待つ処理はmax_queue件までに制限します。
+    """
+    
+    def __init__(
+        self,
+        workers: int = AUTH_HASH_WORKERS,
+        max_queue: int = AUTH_HASH_MAX_QUEUE,
+        retry_after: int = AUTH_HASH_RETRY_AFTER_SECONDS
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        self._in_flight = 0
+        self._running = 0
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.max_in_flight = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+        
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        ワーカープールで関数を実行する
+        
+        Args:
+            func: 実行する関数
+            *args: 関数の引数
+            
+        Returns:
+            Any: 関数の戻り値
+            
+        Raises:
+            PasswordPoolSaturated: 実行中と待機中の件数の合計が上限に達している場合
+        """
+        if self._in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            logger.warning("Password hashing pool saturated, rejecting request")
+            raise PasswordPoolSaturated(self.retry_after)
+            
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._measure, time.monotonic(), func, args
+        )
+        # クライアントが切断しても投入済みの処理は実行されるため、完了するまで件数に含める
+        future.add_done_callback(self._release)
+        return await asyncio.shield(future)
+        
+    async def hash(self, password: str) -> str:
+        """
+        パスワードをハッシュ化する
+        
+        Raises:
+            PasswordPoolSaturated: ワーカープールが飽和している場合
+        """
+        return await self.run(get_password_hash, password)
+        
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        パスワードを検証する
+        
+        Raises:
+            PasswordPoolSaturated: ワーカープールが飽和している場合
+        """
+        return await self.run(verify_password, plain_password, hashed_password)
+        
+    def stats(self) -> Dict[str, Any]:
+        """
+        ワーカープールの統計情報を取得する
+        
+        Returns:
+            Dict[str, Any]: 実行中・待機中の件数、使用率、拒否数、待機時間と処理時間などの統計情報
+        """
+        running = self._running
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": running,
+            "queue_depth": max(0, self._in_flight - running),
+            "utilization": running / self.workers if self.workers else 0.0,
+            "max_in_flight": self.max_in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": self.total_wait_seconds / self.completed if self.completed else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+            "avg_run_seconds": self.total_run_seconds / self.completed if self.completed else 0.0,
+        }
+        
+    def shutdown(self):
+        """
+        ワーカースレッドを終了する
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        
+    def _release(self, future: asyncio.Future):
+        self._in_flight -= 1
+        
+    def _measure(self, submitted: float, func: Callable[..., Any], args: tuple) -> Any:
+        # ワーカースレッドで実行されるため、統計はロックを取得して更新する
+        started = time.monotonic()
+        waited = started - submitted
+        with self._lock:
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self.completed += 1
+                self.total_wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+                self.total_run_seconds += time.monotonic() - started
+
+password_pool = PasswordHashingPool()
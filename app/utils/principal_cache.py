@@ -0,0 +1,163 @@
+"""
+認証済みユーザーのキャッシュユーティリティ
+
+このモジュールはトークンの主体（ユーザー名）から読み込んだユーザーを、
+件数上限付きのTTLキャッシュに保持する機能を提供します。保護されたエンドポイントへの
+リクエストごとに行っていたユーザーの検索を、キャッシュのミス時のみに減らします。
+
+ユーザーの行がORMで更新・削除された場合（アカウントの無効化を含む）は、
+コミット時に該当するエントリを削除します。キャッシュはプロセスごとに保持されるため、
+他のプロセスでの変更はTTLが過ぎるまで反映されません。
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.models.user import User
+
+logger = logging.getLogger("app")
+
+AUTH_PRINCIPAL_CACHE_ENABLED = os.environ.get("AUTH_PRINCIPAL_CACHE_ENABLED", "1") == "1"
+AUTH_PRINCIPAL_CACHE_MAX_ENTRIES = int(os.environ.get("AUTH_PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+AUTH_PRINCIPAL_CACHE_TTL_SECONDS = float(os.environ.get("AUTH_PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+class PrincipalCache:
+    """
+    認証済みユーザーのキャッシュ
+    
+    ユーザー名をキーとするLRUキャッシュで、各エントリはTTLを過ぎると無効になります。
+    保持するユーザーはセッションから切り離されたインスタンスで、複数のリクエストから
+    同時に参照されるため、読み込み済みの属性のみを使用してください。
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+        enabled: bool = AUTH_PRINCIPAL_CACHE_ENABLED
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # 同期の依存関数はスレッドプールで実行されるため、操作をロックで保護する
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.generation = 0
+        
+    def get(self, username: str) -> Optional[User]:
+        """
+        キャッシュからユーザーを取得する
+        
+        Args:
+            username: トークンの主体のユーザー名
+            
+        Returns:
+            Optional[User]: キャッシュされたユーザー、存在しないか期限切れの場合はNone
+        """
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None:
+                user, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(username)
+                    self.hits += 1
+                    return user
+                del self._entries[username]
+            self.misses += 1
+        return None
+        
+    def set(self, user: User, generation: int):
+        """
+        ユーザーをキャッシュに保存する
+        
+        読み込みを始めてから無効化が行われた場合は、変更前の行を読み込んだ可能性があるため保存しません。
+        
+        Args:
+            user: セッションから切り離したユーザー
+            generation: 読み込みを始める前に取得したgenerationの値
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[user.username] = (user, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(user.username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+                
+    def invalidate(self, username: str):
+        """
+        ユーザーのエントリを削除する
+        
+        Args:
+            username: 削除するユーザーのユーザー名
+        """
+        with self._lock:
+            self.generation += 1
+            if self._entries.pop(username, None) is not None:
+                self.invalidations += 1
+                
+    def clear(self):
+        """
+        キャッシュをすべて削除する
+        """
+        with self._lock:
+            self._entries.clear()
+            
+    def stats(self) -> Dict[str, Any]:
+        """
+        キャッシュの統計情報を取得する
+        
+        Returns:
+            Dict[str, Any]: ヒット数、ミス数、ヒット率などの統計情報
+        """
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+principal_cache = PrincipalCache()
+
+def _mark_changed(mapper, connection, target: User):
+    # 変更はコミットされるまで他のリクエストから見えないため、削除はコミット時に行う
+    session = object_session(target)
+    if session is None:
+        return
+    changed = session.info.setdefault("changed_principals", set())
+    changed.add(target.username)
+    # ユーザー名が変更された場合は変更前のエントリも削除する
+    changed.update(name for name in inspect(target).attrs.username.history.deleted if name)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed(session: Session):
+    for username in session.info.pop("changed_principals", ()):
+        principal_cache.invalidate(username)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed(session: Session):
+    session.info.pop("changed_principals", None)
+
+event.listen(User, "after_update", _mark_changed)
+event.listen(User, "after_delete", _mark_changed)
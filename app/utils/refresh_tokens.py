@@ -0,0 +1,195 @@
+"""
+リフレッシュトークンユーティリティ
+
+このモジュールはリフレッシュトークンの発行、ローテーション、再利用の検出を提供します。
+リフレッシュトークンはランダムな値で、データベースにはSHA-256ハッシュのみを保存します。
+アクセストークンの更新はハッシュの一意インデックスによる1回の検索で行うため、
+パスワードによるログインのようなbcryptの計算を必要としません。
+
+トークンは1回のみ使用でき、使用すると同じファミリーの新しいトークンが発行されます。
+使用済みのトークンが再び提示された場合は漏洩したものとみなし、ファミリー全体を失効させます。
+"""
+import os
+import uuid
+import asyncio
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+logger = logging.getLogger("app")
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS = float(os.environ.get("REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS", "3600"))
+
+class RefreshTokenInvalid(Exception):
+    """
+    リフレッシュトークンが無効であることを示す例外
+    
+    Attributes:
+        reason: 無効な理由（unknown / revoked / expired / inactive / reused）
+    """
+    
+    def __init__(self, reason: str):
+        super().__init__(f"Refresh token is invalid: {reason}")
+        self.reason = reason
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def issue_refresh_token(db: Session, user_id: int, family_id: Optional[str] = None) -> str:
+    """
+    リフレッシュトークンを発行する
+    
+    呼び出し側でコミットする必要があります。
+    
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        family_id: ローテーションの系列の識別子（省略するとログインとして新しい系列を作成する）
+        
+    Returns:
+        str: リフレッシュトークン
+    """
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        token_hash=_hash(token),
+        family_id=family_id or uuid.uuid4().hex,
+        user_id=user_id,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token
+
+def _revoke_family(db: Session, family_id: str, now: datetime):
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+def rotate_refresh_token(db: Session, token: str) -> Tuple[User, str]:
+    """
+    リフレッシュトークンを使用済みにし、同じファミリーの新しいトークンを発行する
+    
+    トークンとユーザーはハッシュの一意インデックスによる1回の検索で取得します。
+    使用済みの記録は未使用であることを条件とする更新で行うため、同じトークンを
+    同時に提示された場合も1つのリクエストのみが成功します。
+    
+    Args:
+        db: データベースセッション
+        token: クライアントが提示したリフレッシュトークン
+        
+    Returns:
+        Tuple[User, str]: トークンの所有者と、新しいリフレッシュトークン
+        
+    Raises:
+        RefreshTokenInvalid: トークンが存在しない、失効・期限切れ、ユーザーが非アクティブ、
+            または使用済みのトークンが再利用された場合（reason="reused"、ファミリー全体を失効させる）
+    """
+    now = datetime.utcnow()
+    row = db.execute(
+        select(RefreshToken, User)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == _hash(token))
+    ).first()
+    if row is None:
+        raise RefreshTokenInvalid("unknown")
+    refresh, user = row
+    if refresh.revoked_at is not None:
+        raise RefreshTokenInvalid("revoked")
+    if refresh.used_at is not None:
+        logger.warning(f"Refresh token reuse detected for user {user.username}, revoking token family")
+        _revoke_family(db, refresh.family_id, now)
+        raise RefreshTokenInvalid("reused")
+    if refresh.expires_at <= now:
+        raise RefreshTokenInvalid("expired")
+    if not user.is_active:
+        raise RefreshTokenInvalid("inactive")
+        
+    claimed = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == refresh.id, RefreshToken.used_at.is_(None), RefreshToken.revoked_at.is_(None))
+        .values(used_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if claimed == 0:
+        # 検索から更新までの間に同じトークンが使用された
+        db.rollback()
+        logger.warning(f"Concurrent refresh token reuse detected for user {user.username}, revoking token family")
+        _revoke_family(db, refresh.family_id, now)
+        raise RefreshTokenInvalid("reused")
+        
+    new_token = issue_refresh_token(db, user.id, refresh.family_id)
+    db.commit()
+    return user, new_token
+
+def revoke_refresh_token(db: Session, token: str, username: str) -> bool:
+    """
+    リフレッシュトークンのファミリー全体を失効させる（ログアウト時に使用）
+    
+    他のユーザーのトークンを失効させられないよう、usernameのユーザーが所有するトークンのみを対象とします。
+    
+    Args:
+        db: データベースセッション
+        token: 失効させるリフレッシュトークン
+        username: ログアウトするユーザーのユーザー名（アクセストークンの主体）
+        
+    Returns:
+        bool: 失効させたトークンがあった場合はTrue（存在しない、他のユーザーの、または失効済みのトークンの場合はFalse）
+    """
+    family = select(RefreshToken.family_id).join(User, User.id == RefreshToken.user_id).where(
+        RefreshToken.token_hash == _hash(token), User.username == username
+    ).scalar_subquery()
+    revoked = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return revoked > 0
+
+def prune_refresh_tokens(engine: Engine) -> int:
+    """
+    有効期限を過ぎたリフレッシュトークンの行を削除する
+    
+    Args:
+        engine: データベースエンジン
+        
+    Returns:
+        int: 削除した行数
+    """
+    with engine.begin() as connection:
+        deleted = connection.execute(
+            RefreshToken.__table__.delete().where(RefreshToken.expires_at < datetime.utcnow())
+        ).rowcount
+    if deleted:
+        logger.info(f"Pruned {deleted} expired refresh tokens")
+    return deleted
+
+async def run_pruning(engine: Engine, interval: float = REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS):
+    """
+    期限切れのリフレッシュトークンの削除を一定間隔で実行し続ける
+    
+    アプリケーションのライフサイクルでタスクとして起動し、終了時にキャンセルします。
+    
+    Args:
+        engine: データベースエンジン
+        interval: 削除を実行する間隔（秒）
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(prune_refresh_tokens, engine)
+        except Exception as e:
+            logger.error(f"Refresh token pruning failed: {str(e)}")
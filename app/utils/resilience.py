@@ -0,0 +1,308 @@
+"""
+上流API呼び出しの耐障害性ユーティリティ
+
+このモジュールはOpenAI API呼び出しのリトライとサーキットブレーカーを提供します。
+一時的なエラー（429、5xx、接続エラー、タイムアウト）のみをリトライ対象とし、
+指数バックオフにジッターを加えた間隔で再試行します。上流がRetry-Afterヘッダーを
+返した場合はその値を優先します。エラー率が閾値を超えるとサーキットブレーカーが開き、
+一定時間は上流を呼び出さずに即座に失敗します。
+"""
+import os
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+import openai
+
+logger = logging.getLogger("app")
+
+LLM_RETRY_MAX_ATTEMPTS = int(os.environ.get("LLM_RETRY_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY = float(os.environ.get("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.environ.get("LLM_RETRY_MAX_DELAY", "8"))
+LLM_BREAKER_FAILURE_RATE = float(os.environ.get("LLM_BREAKER_FAILURE_RATE", "0.5"))
+LLM_BREAKER_MIN_CALLS = int(os.environ.get("LLM_BREAKER_MIN_CALLS", "10"))
+LLM_BREAKER_WINDOW_SECONDS = float(os.environ.get("LLM_BREAKER_WINDOW_SECONDS", "30"))
+LLM_BREAKER_OPEN_SECONDS = float(os.environ.get("LLM_BREAKER_OPEN_SECONDS", "30"))
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """
+    サーキットブレーカーが開いているため呼び出しが拒否されたことを示す例外
+    
+    Attributes:
+        retry_after: ブレーカーが半開状態に移行するまでの秒数
+    """
+    
+    def __init__(self, retry_after: float):
+        super().__init__("OpenAI API circuit breaker is open")
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """
+    サーキットブレーカー
+    
+    直近の時間窓内の呼び出し結果を記録し、失敗率が閾値を超えると開状態になります。
+    開状態の間は呼び出しを即座に拒否し、一定時間後に半開状態へ移行して
+    1件の試行呼び出しを許可します。試行が成功すれば閉状態に戻り、失敗すれば再び開きます。
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        failure_rate: float = LLM_BREAKER_FAILURE_RATE,
+        min_calls: int = LLM_BREAKER_MIN_CALLS,
+        window_seconds: float = LLM_BREAKER_WINDOW_SECONDS,
+        open_seconds: float = LLM_BREAKER_OPEN_SECONDS
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._results: Deque[Tuple[float, bool]] = deque()
+        self.times_opened = 0
+        self.rejected = 0
+        
+    @property
+    def state(self) -> str:
+        """
+        現在の状態（closed / open / half_open）
+        """
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+        
+    def before_call(self):
+        """
+        呼び出し前に状態を確認する
+        
+        Raises:
+            CircuitOpenError: ブレーカーが開いている場合、または半開状態で試行中の場合
+        """
+        state = self.state
+        if state == self.OPEN:
+            self.rejected += 1
+            raise CircuitOpenError(self.open_seconds - (time.monotonic() - self._opened_at))
+        if state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(1)
+            self._probe_in_flight = True
+            
+    def record_success(self):
+        """
+        呼び出しの成功を記録する
+        """
+        if self._state == self.HALF_OPEN:
+            logger.info("OpenAI API circuit breaker closed")
+            self._state = self.CLOSED
+            self._probe_in_flight = False
+            self._results.clear()
+        self._record(True)
+        
+    def abandon_probe(self):
+        """
+        半開状態の試行呼び出しが結果を返さずに中断されたことを記録する
+        """
+        self._probe_in_flight = False
+        
+    def record_failure(self):
+        """
+        呼び出しの失敗を記録し、必要に応じてブレーカーを開く
+        """
+        if self._state == self.HALF_OPEN:
+            self._open()
+            return
+        self._record(False)
+        total = len(self._results)
+        failures = sum(1 for _, ok in self._results if not ok)
+        if self._state == self.CLOSED and total >= self.min_calls and failures / total >= self.failure_rate:
+            self._open()
+            
+    def stats(self) -> Dict[str, Any]:
+        """
+        サーキットブレーカーの状態と統計情報を取得する
+        
+        Returns:
+            Dict[str, Any]: 状態、時間窓内の呼び出し数と失敗率、開いた回数など
+        """
+        state = self.state
+        self._prune()
+        total = len(self._results)
+        failures = sum(1 for _, ok in self._results if not ok)
+        return {
+            "state": state,
+            "window_calls": total,
+            "window_failure_rate": failures / total if total else 0.0,
+            "failure_rate_threshold": self.failure_rate,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+        
+    def _record(self, ok: bool):
+        self._results.append((time.monotonic(), ok))
+        self._prune()
+        
+    def _prune(self):
+        cutoff = time.monotonic() - self.window_seconds
+        while self._results and self._results[0][0] < cutoff:
+            self._results.popleft()
+            
+    def _open(self):
+        logger.warning("OpenAI API circuit breaker opened")
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._results.clear()
+        self.times_opened += 1
+
+def is_retryable(exc: Exception) -> bool:
+    """
+    例外がリトライ対象の一時的なエラーかどうかを判定する
+    
+    Args:
+        exc: 上流呼び出しで発生した例外
+        
+    Returns:
+        bool: 接続エラー、タイムアウト、リトライ対象のステータスコードの場合はTrue
+    """
+    if isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """
+    上流のレスポンスヘッダーから再試行までの待機秒数を取得する
+    
+    retry-after-ms、retry-after（秒数またはHTTP日付）の順に参照します。
+    
+    Args:
+        exc: 上流呼び出しで発生した例外
+        
+    Returns:
+        Optional[float]: 待機秒数、ヘッダーがない場合はNone
+    """
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+    return None
+
+def backoff_delay(attempt: int, exc: Exception) -> float:
+    """
+    次の再試行までの待機秒数を計算する
+    
+    Retry-Afterがあればその値を使用し、なければ指数バックオフの上限までの
+    一様乱数（フルジッター）を使用します。
+    
+    Args:
+        attempt: 0から始まる試行回数
+        exc: 直前の呼び出しで発生した例外
+        
+    Returns:
+        float: 待機秒数
+    """
+    retry_after = retry_after_seconds(exc)
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+
+class RetryStats:
+    """
+    リトライの統計情報
+    
+    上流呼び出しの回数、再試行の回数、再試行を断念した回数を記録します。
+    """
+    
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+        self.gave_up = 0
+        
+    def stats(self) -> Dict[str, Any]:
+        """
+        リトライの統計情報を取得する
+        
+        Returns:
+            Dict[str, Any]: 呼び出し数、再試行数、再試行を断念した数
+        """
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "max_attempts": LLM_RETRY_MAX_ATTEMPTS,
+        }
+
+llm_breaker = CircuitBreaker()
+llm_retry_stats = RetryStats()
+
+async def call_with_resilience(
+    func: Callable[[], Awaitable[Any]],
+    breaker: CircuitBreaker = llm_breaker,
+    max_attempts: int = LLM_RETRY_MAX_ATTEMPTS
+) -> Any:
+    """
+    サーキットブレーカーとリトライを適用して上流APIを呼び出す
+    
+    一時的なエラーの場合は最大max_attempts回まで再試行します。
+    Retry-Afterで指定された待機時間がLLM_RETRY_MAX_DELAYを超える場合は再試行しません。
+    リトライ対象外のエラー（400、401など）は上流が応答しているため失敗として数えません。
+    
+    Args:
+        func: 上流呼び出しを行うコルーチンを返す関数
+        breaker: 使用するサーキットブレーカー
+        max_attempts: 最大試行回数
+        
+    Returns:
+        Any: funcの結果
+        
+    Raises:
+        CircuitOpenError: ブレーカーが開いている場合
+        Exception: 再試行しても成功しなかった場合は最後の例外
+    """
+    llm_retry_stats.calls += 1
+    for attempt in range(max_attempts):
+        breaker.before_call()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            breaker.abandon_probe()
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            delay = backoff_delay(attempt, e)
+            if attempt + 1 >= max_attempts or delay > LLM_RETRY_MAX_DELAY:
+                llm_retry_stats.gave_up += 1
+                raise
+            llm_retry_stats.retries += 1
+            logger.warning(f"Retrying OpenAI API call in {delay:.2f}s after error: {str(e)}")
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
@@ -0,0 +1,100 @@
+"""
+リクエスト集約（シングルフライト）ユーティリティ
+
+このモジュールは同一内容の同時リクエストを1回の上流呼び出しに集約する機能を提供します。
+同じキーの処理が実行中の場合、後続のリクエストは新たに呼び出しを行わず、
+実行中の処理の結果を共有して待機します。
+"""
+import os
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple, Type
+
+logger = logging.getLogger("app")
+
+LLM_SINGLE_FLIGHT_ENABLED = os.environ.get("LLM_SINGLE_FLIGHT_ENABLED", "1") == "1"
+
+class SingleFlight:
+    """
+    シングルフライト
+    
+    キーごとに実行中のタスクを1つだけ保持し、同じキーの呼び出しに共有します。
+    最初の呼び出し元がキャンセルされても共有タスクは継続するため、
+    待機中の他の呼び出し元には影響しません。
+    """
+    
+    def __init__(self, enabled: bool = LLM_SINGLE_FLIGHT_ENABLED):
+        self.enabled = enabled
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.retried = 0
+        
+    async def do(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[Any]],
+        unshared_errors: Tuple[Type[BaseException], ...] = ()
+    ) -> Any:
+        """
+        キーに対応する処理を実行し、結果を返す
+        
+        同じキーの処理が実行中の場合はその結果を待ち、
+        実行中でない場合はfuncを呼び出して新しい共有タスクを開始します。
+        
+        Args:
+            key: リクエストを識別するキー
+            func: 上流呼び出しを行うコルーチンを返す関数
+            unshared_errors: 処理を開始した呼び出し元に固有の理由による例外（同時実行数の制限による拒否など）。
+                待機していた呼び出し元には送出せず、それぞれのfuncで処理をやり直します
+            
+        Returns:
+            Any: funcの結果（例外の場合は同じ例外が送出されます）
+        """
+        if not self.enabled:
+            return await func()
+            
+        while True:
+            task = self._in_flight.get(key)
+            leader = task is None
+            if leader:
+                self.executions += 1
+                task = asyncio.ensure_future(func())
+                self._in_flight[key] = task
+                task.add_done_callback(lambda done: self._finish(key, done))
+            else:
+                self.coalesced += 1
+                logger.info(f"Coalesced request into in-flight call {key[:12]}")
+                
+            try:
+                return await asyncio.shield(task)
+            except unshared_errors:
+                if leader:
+                    raise
+                self.retried += 1
+                logger.info(f"In-flight call {key[:12]} was rejected for its caller, retrying")
+        
+    def stats(self) -> Dict[str, Any]:
+        """
+        シングルフライトの統計情報を取得する
+        
+        Returns:
+            Dict[str, Any]: 実行中のキー数、上流呼び出し数、集約されたリクエスト数、やり直した数
+        """
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._in_flight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "retried": self.retried,
+        }
+        
+    def _finish(self, key: str, task: asyncio.Task):
+        # やり直しで同じキーの新しいタスクが登録されている場合は残す
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # 全ての呼び出し元がキャンセルされた場合も例外を回収して警告を抑止する
+        if not task.cancelled():
+            task.exception()
+
+llm_single_flight = SingleFlight()
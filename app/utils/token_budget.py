@@ -0,0 +1,177 @@
+"""
+日次トークン予算ユーティリティ
+
+このモジュールはユーザーごとの1日あたりのトークン使用量を記録し、
+予算を超えるリクエストをOpenAI APIに送信する前に拒否する機能を提供します。
+使用量はtoken_usageテーブルにユーザー・日付ごとに1行で集計されます。
+
+リクエストは送信前にプロンプトと生成する最大トークン数の合計を、予算に収まる場合のみ
+加算する条件付きUPSERTで予約します。予算の判定と加算が1文で行われるため、
+同時リクエストでも予算を超えて受け付けることはありません。完了後は実際の使用量を加算し、予約を解放します。
+"""
+import os
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.token_usage import TokenUsage
+
+logger = logging.getLogger("app")
+
+# 0以下の場合は日次予算を適用しない
+LLM_DAILY_TOKEN_BUDGET = int(os.environ.get("LLM_DAILY_TOKEN_BUDGET", "200000"))
+
+class TokenBudgetExceeded(Exception):
+    """
+    日次トークン予算を超えることを示す例外
+    
+    Attributes:
+        used: 本日すでに消費したトークン数
+        requested: このリクエストで消費する可能性のあるトークン数
+        budget: 日次トークン予算
+    """
+    
+    def __init__(self, used: int, requested: int, budget: int):
+        super().__init__(f"Daily token budget exceeded: {used} used + {requested} requested > {budget}")
+        self.used = used
+        self.requested = requested
+        self.budget = budget
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+def get_usage_today(db: Session, user_id: int) -> int:
+    """
+    本日のトークン使用量を取得する
+    
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        
+    Returns:
+        int: 本日消費したトークン数
+    """
+    row = db.query(TokenUsage.tokens).filter(
+        TokenUsage.user_id == user_id,
+        TokenUsage.day == _today()
+    ).first()
+    return row[0] if row else 0
+
+class TokenReservation:
+    """
+    日次トークン予算の予約
+    
+    Attributes:
+        user_id: ユーザーID
+        day: 予約した日付（UTC、YYYY-MM-DD形式）
+        tokens: 予約したトークン数（予算を適用しない場合は0）
+    """
+    
+    def __init__(self, user_id: int, day: str, tokens: int):
+        self.user_id = user_id
+        self.day = day
+        self.tokens = tokens
+
+def reserve_tokens(user_id: int, requested: int) -> TokenReservation:
+    """
+    リクエストが消費する可能性のあるトークン数を日次トークン予算から予約する
+    
+    予約は使用量に加算されるため、完了後にrelease_token_reservationで解放する必要があります。
+    データベースにアクセスするため、非同期処理からはスレッドプールで呼び出してください。
+    
+    Args:
+        user_id: ユーザーID
+        requested: プロンプトのトークン数と生成する最大トークン数の合計
+        
+    Returns:
+        TokenReservation: 予約
+        
+    Raises:
+        TokenBudgetExceeded: 予算を超える場合
+    """
+    day = _today()
+    if LLM_DAILY_TOKEN_BUDGET <= 0:
+        return TokenReservation(user_id, day, 0)
+        
+    statement = insert(TokenUsage).values(user_id=user_id, day=day, tokens=requested)
+    statement = statement.on_conflict_do_update(
+        index_elements=[TokenUsage.user_id, TokenUsage.day],
+        set_={"tokens": TokenUsage.tokens + statement.excluded.tokens},
+        where=TokenUsage.tokens + statement.excluded.tokens <= LLM_DAILY_TOKEN_BUDGET
+    ).returning(TokenUsage.tokens)
+    db = SessionLocal()
+    try:
+        # 本日の行がない場合の挿入には条件が適用されないため、予算を超える要求は先に拒否する
+        reserved = db.execute(statement).first() if requested <= LLM_DAILY_TOKEN_BUDGET else None
+        if reserved is None:
+            used = get_usage_today(db, user_id)
+            db.rollback()
+            logger.warning(f"Daily token budget exceeded for user ID {user_id}: {used} used, {requested} requested")
+            raise TokenBudgetExceeded(used, requested, LLM_DAILY_TOKEN_BUDGET)
+        db.commit()
+    finally:
+        db.close()
+    return TokenReservation(user_id, day, requested)
+
+def release_token_reservation(reservation: TokenReservation):
+    """
+    予約したトークン数を使用量から差し引く
+    
+    実際の使用量はrecord_token_usageで別に加算します。
+    
+    Args:
+        reservation: reserve_tokensで取得した予約
+    """
+    record_token_usage(reservation.user_id, -reservation.tokens, reservation.day)
+
+def record_token_usage(user_id: int, tokens: int, day: Optional[str] = None):
+    """
+    消費したトークン数を使用量に加算する
+    
+    ストリーミング応答の完了時など、リクエストのセッションが利用できない場面からも
+    呼び出されるため、独自のセッションで1文のUPSERTを実行します。
+    データベースにアクセスするため、非同期処理からはスレッドプールで呼び出してください。
+    
+    Args:
+        user_id: ユーザーID
+        tokens: 消費したトークン数
+        day: 加算する日付（省略時は本日）
+    """
+    if not tokens:
+        return
+    statement = insert(TokenUsage).values(user_id=user_id, day=day or _today(), tokens=tokens)
+    statement = statement.on_conflict_do_update(
+        index_elements=[TokenUsage.user_id, TokenUsage.day],
+        set_={"tokens": TokenUsage.tokens + statement.excluded.tokens}
+    )
+    db = SessionLocal()
+    try:
+        db.execute(statement)
+        db.commit()
+    finally:
+        db.close()
+
+def usage_summary(db: Session, user_id: int) -> Dict[str, Any]:
+    """
+    本日のトークン使用量と予算の概要を取得する
+    
+    使用量には実行中のリクエストが予約しているトークン数を含みます。
+    
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        
+    Returns:
+        Dict[str, Any]: 日付、使用量、予算、残量
+    """
+    used = get_usage_today(db, user_id)
+    budget = LLM_DAILY_TOKEN_BUDGET if LLM_DAILY_TOKEN_BUDGET > 0 else None
+    return {
+        "day": _today(),
+        "used_tokens": used,
+        "daily_budget": budget,
+        "remaining_tokens": max(budget - used, 0) if budget is not None else None,
+    }
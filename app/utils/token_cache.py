@@ -0,0 +1,148 @@
+"""
+検証済みJWTのキャッシュユーティリティ
+
+このモジュールは署名と有効期限の検証に成功したJWTのクレームを、
+トークンのハッシュをキーとする件数上限付きのLRUキャッシュに保持する機能を提供します。
+同じトークンが有効期限までに繰り返し提示されるため、2回目以降の署名検証を省略できます。
+
+エントリはトークンのexp（壁時計）と、キャッシュに保存してからの経過時間（単調時計）の
+両方で期限を判定します。壁時計が巻き戻された場合でも保存から一定時間で再検証され、
+失効させたトークンはinvalidateで即座にエントリを削除できます。
+"""
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+AUTH_TOKEN_CACHE_ENABLED = os.environ.get("AUTH_TOKEN_CACHE_ENABLED", "1") == "1"
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000"))
+# 有効期限とは別に、保存してから再検証するまでの最大秒数
+AUTH_TOKEN_CACHE_MAX_TTL_SECONDS = float(os.environ.get("AUTH_TOKEN_CACHE_MAX_TTL_SECONDS", "300"))
+
+def token_hash(token: str) -> str:
+    """
+    トークンのキャッシュキーを生成する
+    
+    トークンそのものをメモリに保持しないよう、SHA-256ハッシュを使用します。
+    
+    Args:
+        token: JWTトークン
+        
+    Returns:
+        str: 16進数のハッシュ
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+class VerifiedTokenCache:
+    """
+    検証済みJWTのキャッシュ
+    
+    トークンのハッシュをキーとするLRUキャッシュで、検証済みのクレームを保持します。
+    ヒット数、ミス数、期限切れ数、追い出し数を記録します。
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = AUTH_TOKEN_CACHE_MAX_ENTRIES,
+        max_ttl_seconds: float = AUTH_TOKEN_CACHE_MAX_TTL_SECONDS,
+        enabled: bool = AUTH_TOKEN_CACHE_ENABLED
+    ):
+        self.max_entries = max_entries
+        self.max_ttl_seconds = max_ttl_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+        
+    def get(self, token: str, leeway: float = 0) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュから検証済みのクレームを取得する
+        
+        Args:
+            token: JWTトークン
+            leeway: expの判定に許容する時計のずれ（秒、jwt.decodeと同じ値を指定する）
+            
+        Returns:
+            Optional[Dict[str, Any]]: クレーム、存在しないか期限切れの場合はNone
+        """
+        if not self.enabled:
+            return None
+        key = token_hash(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                claims, exp, stored_at = entry
+                if (exp is None or time.time() <= exp + leeway) and time.monotonic() - stored_at < self.max_ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                del self._entries[key]
+                self.expired += 1
+            self.misses += 1
+        return None
+        
+    def set(self, token: str, claims: Dict[str, Any]):
+        """
+        検証済みのクレームをキャッシュに保存する
+        
+        Args:
+            token: 検証に成功したJWTトークン
+            claims: jwt.decodeで取得したクレーム
+        """
+        if not self.enabled:
+            return
+        exp = claims.get("exp")
+        key = token_hash(token)
+        with self._lock:
+            self._entries[key] = (claims, exp, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+                
+    def invalidate(self, token: str):
+        """
+        トークンのエントリを削除する
+        
+        Args:
+            token: 削除するJWTトークン
+        """
+        with self._lock:
+            if self._entries.pop(token_hash(token), None) is not None:
+                self.invalidations += 1
+                
+    def clear(self):
+        """
+        キャッシュをすべて削除する
+        """
+        with self._lock:
+            self._entries.clear()
+            
+    def stats(self) -> Dict[str, Any]:
+        """
+        キャッシュの統計情報を取得する
+        
+        Returns:
+            Dict[str, Any]: ヒット数、ミス数、ヒット率などの統計情報
+        """
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "max_ttl_seconds": self.max_ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+verified_token_cache = VerifiedTokenCache()
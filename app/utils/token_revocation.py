@@ -0,0 +1,185 @@
+"""
+トークン失効リストユーティリティ
+
+このモジュールはログアウトなどで失効させたアクセストークンのjtiを、SQLiteのrevoked_tokensテーブルと
+プロセス内の集合の2段構成で管理する機能を提供します。リクエストごとの失効確認は
+プロセス内の集合の参照のみで行い、データベースは参照しません。
+
+集合は起動時にテーブルから構築し、失効時に追加します。他のプロセスで失効させたトークンは、
+一定間隔ごとに前回読み込んだ連番以降の行のみを読み込んで取り込みます。
+有効期限を過ぎたトークンはjwt.decodeで拒否されるため、時計のずれの猶予を置いて集合とテーブルの両方から削除します。
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger("app")
+
+AUTH_REVOCATION_SYNC_SECONDS = float(os.environ.get("AUTH_REVOCATION_SYNC_SECONDS", "5"))
+AUTH_REVOCATION_PRUNE_INTERVAL_SECONDS = float(os.environ.get("AUTH_REVOCATION_PRUNE_INTERVAL_SECONDS", "3600"))
+# 有効期限の判定に時計のずれ（JWT_LEEWAY_SECONDS）を許容するため、期限後もこの秒数だけ保持する
+AUTH_REVOCATION_RETAIN_SECONDS = float(os.environ.get("AUTH_REVOCATION_RETAIN_SECONDS", "300"))
+
+class RevocationList:
+    """
+    トークン失効リスト
+    
+    失効させたトークンのjtiと有効期限（UNIX時刻）をプロセス内に保持します。
+    """
+    
+    def __init__(self, sync_seconds: float = AUTH_REVOCATION_SYNC_SECONDS):
+        self.sync_seconds = sync_seconds
+        self._revoked: Dict[str, float] = {}
+        self._last_id = 0
+        self._synced_at = 0.0
+        self._engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.rejected = 0
+        self.syncs = 0
+        
+    def load(self, engine: Engine):
+        """
+        期限切れの行を削除し、テーブルから失効リストを構築する
+        
+        Args:
+            engine: データベースエンジン
+        """
+        self._engine = engine
+        prune_revoked_tokens(engine)
+        with self._lock:
+            self._revoked.clear()
+            self._last_id = 0
+        self.sync()
+        logger.info(f"Token revocation list loaded with {len(self._revoked)} entries")
+        
+    def sync(self):
+        """
+        前回読み込んだ連番以降に他のプロセスで失効させたトークンを取り込む
+        """
+        if self._engine is None:
+            return
+        with self._lock:
+            self._synced_at = time.monotonic()
+            last_id = self._last_id
+        with self._engine.connect() as connection:
+            rows = connection.execute(
+                select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at)
+                .where(RevokedToken.id > last_id)
+                .order_by(RevokedToken.id)
+            ).all()
+        cutoff = time.time() - AUTH_REVOCATION_RETAIN_SECONDS
+        with self._lock:
+            for row_id, jti, expires_at in rows:
+                self._revoked[jti] = _timestamp(expires_at)
+                self._last_id = max(self._last_id, row_id)
+            # 有効期限を過ぎたトークンはjwt.decodeで拒否されるため、猶予を過ぎたものは集合から取り除く
+            for jti in [jti for jti, exp in self._revoked.items() if exp < cutoff]:
+                del self._revoked[jti]
+            self.syncs += 1
+            
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """
+        トークンが失効しているかを判定する
+        
+        前回の取り込みからsync_seconds以上経過している場合は、先に差分を取り込みます。
+        
+        Args:
+            jti: トークンのID（jtiを持たないトークンの場合はNone）
+            
+        Returns:
+            bool: 失効している場合はTrue
+        """
+        if time.monotonic() - self._synced_at >= self.sync_seconds:
+            self.sync()
+        self.checks += 1
+        if jti is not None and jti in self._revoked:
+            self.rejected += 1
+            return True
+        return False
+        
+    def revoke(self, db: Session, jti: str, expires_at: float):
+        """
+        トークンを失効させる
+        
+        Args:
+            db: データベースセッション
+            jti: 失効させるトークンのID
+            expires_at: トークンの有効期限（UNIX時刻）
+        """
+        db.add(RevokedToken(jti=jti, expires_at=datetime.utcfromtimestamp(expires_at)))
+        try:
+            db.commit()
+        except IntegrityError:
+            # 既に失効している
+            db.rollback()
+        with self._lock:
+            self._revoked[jti] = expires_at
+            
+    def stats(self) -> Dict[str, Any]:
+        """
+        失効リストの統計情報を取得する
+        
+        Returns:
+            Dict[str, Any]: 保持しているjtiの数、確認数、拒否数、取り込み回数
+        """
+        return {
+            "size": len(self._revoked),
+            "sync_seconds": self.sync_seconds,
+            "checks": self.checks,
+            "rejected": self.rejected,
+            "syncs": self.syncs,
+        }
+
+revocation_list = RevocationList()
+
+def _timestamp(value: datetime) -> float:
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+def prune_revoked_tokens(engine: Engine) -> int:
+    """
+    有効期限を過ぎた失効トークンの行を削除する
+    
+    Args:
+        engine: データベースエンジン
+        
+    Returns:
+        int: 削除した行数
+    """
+    with engine.begin() as connection:
+        deleted = connection.execute(
+            RevokedToken.__table__.delete().where(
+                RevokedToken.expires_at < datetime.utcnow() - timedelta(seconds=AUTH_REVOCATION_RETAIN_SECONDS)
+            )
+        ).rowcount
+    if deleted:
+        logger.info(f"Pruned {deleted} expired revoked tokens")
+    return deleted
+
+async def run_pruning(engine: Engine, interval: float = AUTH_REVOCATION_PRUNE_INTERVAL_SECONDS):
+    """
+    期限切れの失効トークンの削除を一定間隔で実行し続ける
+    
+    アプリケーションのライフサイクルでタスクとして起動し、終了時にキャンセルします。
+    
+    Args:
+        engine: データベースエンジン
+        interval: 削除を実行する間隔（秒）
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(prune_revoked_tokens, engine)
+        except Exception as e:
+            logger.error(f"Revoked token pruning failed: {str(e)}")
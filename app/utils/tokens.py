@@ -0,0 +1,166 @@
+"""
+トークン数計算ユーティリティ
+
+このモジュールはOpenAI APIに送信する前にプロンプトのトークン数をローカルで計算し、
+モデルのコンテキスト長を超えるリクエストを拒否または切り詰める機能を提供します。
+
+tiktokenがインストールされている場合はモデルに対応したトークナイザーを使用し、
+インストールされていない場合は文字種に基づく概算値を使用します。
+システムプロンプトなど繰り返し使用される文字列のトークン数はキャッシュされます。
+"""
+import os
+import re
+import math
+import logging
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from app.prompts.chat_prompt import SYSTEM_PROMPT, DEFAULT_PROMPT
+from app.utils.openai_client import OPENAI_MODEL
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger("app")
+
+LLM_CONTEXT_TOKENS = int(os.environ.get("LLM_CONTEXT_TOKENS", "16385"))
+
+# チャット形式のメッセージ1件ごと、および応答の開始に加算されるトークン数
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+_CJK_PATTERN = re.compile(r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+class TokenLimitExceeded(Exception):
+    """
+    プロンプトがモデルのコンテキスト長を超えていることを示す例外
+    
+    Attributes:
+        prompt_tokens: プロンプトのトークン数
+        limit: プロンプトに使用できるトークン数の上限
+    """
+    
+    def __init__(self, prompt_tokens: int, limit: int):
+        super().__init__(f"Prompt is too long: {prompt_tokens} tokens (limit {limit})")
+        self.prompt_tokens = prompt_tokens
+        self.limit = limit
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    if tiktoken is None:
+        logger.info("tiktoken is not installed, using approximate token counts")
+        return None
+    try:
+        return tiktoken.encoding_for_model(OPENAI_MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+def _approximate_tokens(text: str) -> int:
+    # 日本語などのCJK文字は1文字1トークン、それ以外は4文字1トークンとして概算する
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+def _count(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return _approximate_tokens(text)
+    return len(encoding.encode(text))
+
+@lru_cache(maxsize=1024)
+def count_tokens(text: str) -> int:
+    """
+    文字列のトークン数を計算する
+    
+    システムプロンプトや会話履歴など繰り返し使用される文字列を対象とし、
+    同じ文字列の計算結果はキャッシュされます。
+    
+    Args:
+        text: トークン数を計算する文字列
+        
+    Returns:
+        int: トークン数
+    """
+    return _count(text)
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """
+    チャット形式のメッセージリスト全体のトークン数を計算する
+    
+    Args:
+        messages: メッセージ辞書のリスト（role, contentキーを持つ）
+        
+    Returns:
+        int: メッセージの区切りと応答開始分を含むトークン数
+    """
+    return sum(
+        TOKENS_PER_MESSAGE + count_tokens(message["role"]) + count_tokens(message["content"])
+        for message in messages
+    ) + TOKENS_PER_REPLY
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    文字列を指定したトークン数以内に切り詰める
+    
+    Args:
+        text: 切り詰める文字列
+        max_tokens: 切り詰め後の最大トークン数
+        
+    Returns:
+        str: 先頭からmax_tokensトークン以内の文字列
+    """
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text)[:max_tokens])
+        
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if _approximate_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+def preflight_prompt(prompt: str, max_tokens: int, truncate: bool = False) -> Tuple[str, int]:
+    """
+    プロンプトがモデルのコンテキスト長に収まるかを事前に確認する
+    
+    システムプロンプトとテンプレートを含めたトークン数に、生成する最大トークン数を
+    加えた値がLLM_CONTEXT_TOKENSを超える場合は、拒否するか切り詰めます。
+    
+    Args:
+        prompt: ユーザーの入力プロンプト
+        max_tokens: 生成する最大トークン数
+        truncate: Trueの場合は上限を超えた部分を切り詰め、Falseの場合は拒否する
+        
+    Returns:
+        Tuple[str, int]: 確認済み（必要に応じて切り詰めた）プロンプトと、
+        メッセージ全体のトークン数
+        
+    Raises:
+        TokenLimitExceeded: truncateがFalseでコンテキスト長を超える場合
+    """
+    # テンプレート部分のトークン数は毎回同じためキャッシュから取得される
+    overhead = (
+        2 * TOKENS_PER_MESSAGE + TOKENS_PER_REPLY
+        + count_tokens("system") + count_tokens("user")
+        + count_tokens(SYSTEM_PROMPT)
+        + count_tokens(DEFAULT_PROMPT.format(user_input=""))
+    )
+    limit = LLM_CONTEXT_TOKENS - (max_tokens or 0) - overhead
+    # ユーザー入力は毎回異なるためキャッシュを使用しない
+    prompt_tokens = _count(prompt)
+    
+    if prompt_tokens > limit:
+        if not truncate or limit <= 0:
+            logger.warning(f"Rejected prompt with {prompt_tokens} tokens (limit {limit})")
+            raise TokenLimitExceeded(prompt_tokens, max(limit, 0))
+        logger.info(f"Truncating prompt from {prompt_tokens} to {limit} tokens")
+        prompt = truncate_to_tokens(prompt, limit)
+        prompt_tokens = _count(prompt)
+        
+    return prompt, overhead + prompt_tokens